@@ -0,0 +1,126 @@
+"""Benchmark da aplicação ASGI completa em processo: latência p50/p95/p99 e vazão por endpoint.
+
+Uso: python -m benchmarks.bench_api [--url postgresql+psycopg2://...] [--size 10000] [--requests 500] [--concurrency 10]
+
+As requisições passam por todo o FastAPI (roteamento, validação, serialização) via
+`httpx.ASGITransport`, sem rede. A dependência `get_async_db` aponta para o banco sintético e o
+cache de leitura é desligado, para que cada requisição chegue ao banco.
+
+Atenção: o banco indicado em `--url` é recriado (DROP/CREATE das tabelas) antes da medição.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from benchmarks.datasets import build_database
+from benchmarks.stats import summarize
+from db.book_models import Book_Model
+from db.config import get_async_db, to_async_url
+from main import app
+from routers import book_routers
+from services.async_book_service import AsyncBookService
+from services.book_loader import BookLoader
+from services.book_service import BookService
+
+# Mede `requests` chamadas de `call(client, index)` com até `concurrency` requisições simultâneas
+async def measure_endpoint(client, call, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    timings, errors = [], 0
+
+    async def timed(index: int):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await call(client, index)
+            timings.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed(index) for index in range(requests)))
+    summary = summarize(timings, elapsed=time.perf_counter() - start)
+    summary["errors"] = errors
+    return summary
+
+async def run_endpoints(url: str, book_ids: list, requests: int, concurrency: int):
+    engine = create_async_engine(to_async_url(url))
+    TestingAsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_test_db
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            first_page = (await client.get("/books", params={"limit": 50})).json()
+            created_ids = []
+
+            async def create(client, index):
+                book = {"titulo": f"Criado {index}", "autor": "Autor", "categoria": "Benchmark", "valor": 10.0}
+                response = await client.post("/books", json=[book])
+                created_ids.extend(created["id"] for created in response.json().get("data", []))
+                return response
+
+            endpoints = {
+                "GET /": lambda client, index: client.get("/"),
+                "GET /books": lambda client, index: client.get("/books", params={"limit": 50}),
+                "GET /books?cursor": lambda client, index: client.get("/books", params={"limit": 50, "cursor": first_page["next_cursor"]}),
+                "GET /books?autor": lambda client, index: client.get("/books", params={"limit": 50, "autor": "Tolkien"}),
+                "GET /books?q": lambda client, index: client.get("/books", params={"limit": 20, "q": "senhor aneis"}),
+                "GET /books/{book_id}": lambda client, index: client.get(f"/books/{book_ids[index % len(book_ids)]}"),
+                "POST /books/batch-get": lambda client, index: client.post("/books/batch-get", json={
+                    "ids": [book_ids[(index + offset) % len(book_ids)] for offset in range(50)]
+                }),
+                "POST /books": create,
+                "PUT /books": lambda client, index: client.put("/books", json={
+                    "id": book_ids[index % len(book_ids)], "titulo": f"Atualizado {index}", "autor": "Autor", "categoria": "Benchmark", "valor": 12.0
+                }),
+                "DELETE /books/{book_id}": lambda client, index: client.delete(f"/books/{created_ids[index]}"),
+            }
+
+            results = {}
+            for name, call in endpoints.items():
+                results[name] = await measure_endpoint(client, call, requests, concurrency)
+            return results
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+        await engine.dispose()
+
+# Cria o banco sintético e mede todos os endpoints; sem `url`, usa um arquivo SQLite temporário
+# (o banco precisa ser compartilhado entre as conexões síncronas e assíncronas)
+def run(url: str, size: int, requests: int, concurrency: int):
+    # O cache de leitura é desligado para medir o caminho completo até o banco
+    cached_service, cached_loader = book_routers.book_service, book_routers.book_loader
+    book_routers.book_service = AsyncBookService(BookService())
+    if cached_loader is not None:
+        book_routers.book_loader = BookLoader(book_routers.book_service)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            url = url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            engine, Session = build_database(size, url=url)
+            with Session() as db:
+                # Um id distinto por requisição do PUT, para não haver conflitos entre requisições simultâneas
+                book_ids = db.scalars(select(Book_Model.book_id).order_by(Book_Model.book_id).limit(requests)).all()
+            engine.dispose()
+            return asyncio.run(run_endpoints(url, book_ids, requests, concurrency))
+    finally:
+        book_routers.book_service, book_routers.book_loader = cached_service, cached_loader
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="URL síncrona do banco; padrão: arquivo SQLite temporário")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.url, args.size, args.requests, args.concurrency), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compara a vazão de GET /books entre a sessão síncrona (bloqueando o event loop) e a sessão assíncrona.
+
+Uso: python -m benchmarks.bench_async [--url postgresql+psycopg2://...] [--size 10000] [--concurrency 1 10 50]
+
+Cada variante roda uma rota `async def` dentro do mesmo processo, acionada por clientes concorrentes:
+- sync: a rota chama o `BookService` com uma `Session` síncrona (comportamento anterior das rotas)
+- async: a rota aguarda o `AsyncBookService` com uma `AsyncSession` (asyncpg/aiosqlite)
+
+O ganho aparece quando o banco tem latência de rede (PostgreSQL); com SQLite local as consultas
+são tão rápidas que as duas variantes ficam próximas.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from benchmarks.datasets import build_database
+from db.config import to_async_url
+from services.async_book_service import AsyncBookService
+from services.book_service import BookService
+
+PAGE_SIZE = 50
+
+def build_apps(url: str, size: int):
+    engine, SessionLocal = build_database(size, url=url)
+    async_engine = create_async_engine(to_async_url(url))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    book_service = BookService()
+    async_book_service = AsyncBookService(book_service)
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/books")
+    async def sync_books():
+        db = SessionLocal()
+        try:
+            return book_service.list_books_page(db, limit=PAGE_SIZE)[0]
+        finally:
+            db.close()
+
+    async_app = FastAPI()
+
+    @async_app.get("/books")
+    async def async_books():
+        async with AsyncSessionLocal() as db:
+            return (await async_book_service.list_books_page(db, limit=PAGE_SIZE))[0]
+
+    return {"sync": sync_app, "async": async_app}, [engine, async_engine]
+
+# Dispara `requests` chamadas com no máximo `concurrency` em voo e retorna as requisições por segundo
+async def measure(app, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def call():
+            async with semaphore:
+                response = await client.get("/books")
+                response.raise_for_status()
+
+        await call()
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+async def run(url: str, size: int, requests: int, concurrency_levels):
+    apps, engines = build_apps(url, size)
+    results = []
+    try:
+        for concurrency in concurrency_levels:
+            result = {"concurrency": concurrency}
+            for name, app in apps.items():
+                result[f"{name}_rps"] = round(await measure(app, requests, concurrency), 1)
+            results.append(result)
+    finally:
+        engines[0].dispose()
+        await engines[1].dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="URL síncrona do banco; padrão: arquivo SQLite temporário")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        results = asyncio.run(run(url, args.size, args.requests, args.concurrency))
+
+    print(f"{'concorrência':>12} {'sync (req/s)':>14} {'async (req/s)':>14}")
+    for result in results:
+        print(f"{result['concurrency']:>12} {result['sync_rps']:>14} {result['async_rps']:>14}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Teste de carga de GET /books variando o tamanho do pool de conexões assíncrono.
+
+Uso: python -m benchmarks.bench_pool [--url postgresql+psycopg2://...] [--pool-sizes 1 2 5 10] [--concurrency 20]
+
+A aplicação completa roda no `TestClient` (como em `tests/`), com a dependência `get_async_db`
+apontando para um engine com o tamanho de pool testado e sem overflow. Para cada tamanho são
+medidos a vazão, a latência p95 e as métricas do pool (espera no checkout e timeouts).
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from benchmarks.datasets import build_database
+from db.config import get_async_db, to_async_url
+from db.pool_metrics import PoolMetrics, instrumented_pool
+from main import app
+from routers import book_routers
+from services.async_book_service import AsyncBookService
+from services.book_service import BookService
+
+def run_pool_size(url: str, pool_size: int, requests: int, concurrency: int, pool_timeout: float):
+    metrics = PoolMetrics(f"pool-{pool_size}")
+    engine = create_async_engine(
+        to_async_url(url),
+        poolclass=instrumented_pool(AsyncAdaptedQueuePool, metrics),
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=pool_timeout
+    )
+    metrics.attach(engine)
+    TestingAsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def get_test_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_test_db
+    latencies, errors = [], 0
+    try:
+        with TestClient(app) as client:
+            def call(index: int):
+                start = time.perf_counter()
+                # Filtros diferentes a cada chamada, para que as respostas não venham do cache
+                response = client.get("/books", params={"limit": 50, "titulo": str(index % 1000)})
+                return response.status_code, time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                for status_code, latency in executor.map(call, range(requests)):
+                    latencies.append(latency)
+                    errors += status_code != 200
+            elapsed = time.perf_counter() - start
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+
+    latencies.sort()
+    snapshot = metrics.snapshot()
+    return {
+        "pool_size": pool_size,
+        "rps": round(requests / elapsed, 1),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "errors": errors,
+        "checkout_wait_max_ms": snapshot["checkout_wait"]["max_ms"],
+        "timeouts": snapshot["timeouts"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="URL síncrona do banco; padrão: arquivo SQLite temporário")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--pool-timeout", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # O cache de leitura é desligado para que todas as requisições usem o pool
+    book_routers.book_service = AsyncBookService(BookService())
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = args.url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        engine, _ = build_database(args.size, url=url)
+        engine.dispose()
+
+        print(f"{'pool':>5} {'req/s':>8} {'p95 (ms)':>9} {'espera máx (ms)':>16} {'timeouts':>9} {'erros':>6}")
+        for pool_size in args.pool_sizes:
+            result = run_pool_size(url, pool_size, args.requests, args.concurrency, args.pool_timeout)
+            print(
+                f"{result['pool_size']:>5} {result['rps']:>8} {result['p95_ms']:>9} "
+                f"{result['checkout_wait_max_ms']:>16} {result['timeouts']:>9} {result['errors']:>6}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Compara a busca textual indexada (`q=`) com o filtro `ilike('%...%')` em catálogos crescentes.
+
+Uso: python -m benchmarks.bench_search [--sizes 1000 10000 100000] [--repeat 50]
+
+Com o índice, o custo por busca cresce bem menos que o tamanho do catálogo; o filtro
+`ilike` com curinga inicial percorre a tabela inteira e cresce linearmente.
+"""
+import argparse
+import time
+from benchmarks.datasets import build_database
+from services.book_service import BookService
+
+book_service = BookService()
+
+# Mede o tempo médio (ms) de uma chamada
+def measure(function, repeat: int):
+    function()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def run(sizes, repeat: int):
+    results = []
+    for size in sizes:
+        engine, Session = build_database(size)
+        db = Session()
+        try:
+            # Termo seletivo: apenas um livro do catálogo possui esse número no título
+            term = str(size // 2)
+            search_ms = measure(lambda: book_service.search_books(db, term, limit=20), repeat)
+            scan_ms = measure(lambda: book_service.list_books_page(db, titulo=term, limit=20), repeat)
+        finally:
+            db.close()
+            engine.dispose()
+        results.append({"size": size, "search_ms": round(search_ms, 3), "ilike_ms": round(scan_ms, 3)})
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'livros':>10} {'busca q= (ms)':>15} {'ilike (ms)':>12}")
+    for result in run(args.sizes, args.repeat):
+        print(f"{result['size']:>10} {result['search_ms']:>15} {result['ilike_ms']:>12}")
+
+if __name__ == "__main__":
+    main()
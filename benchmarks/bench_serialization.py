@@ -0,0 +1,73 @@
+"""Compara a serialização de listagens: caminho anterior (ORM + revalidação Pydantic) versus caminho rápido.
+
+Uso: python -m benchmarks.bench_serialization [--sizes 1000 10000 100000] [--repeat 5]
+
+- orm_pydantic: objetos do ORM -> `Book_Model.json()` -> validação do `BookListResponse` ->
+  `jsonable_encoder` -> `json.dumps`, como o FastAPI faz com o `response_model`
+- fast: tuplas de colunas -> dicionários -> bytes JSON (orjson), como as rotas de leitura fazem agora
+"""
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from benchmarks.datasets import build_database
+from db.book_models import Book_Model
+from db.book_schemas import BookListResponse
+from services.book_service import BOOK_COLUMNS, tuple_json
+from utils.serialization import dumps
+
+response_adapter = TypeAdapter(BookListResponse)
+
+def orm_pydantic(db) -> bytes:
+    books = [book.json() for book in db.scalars(select(Book_Model)).all()]
+    content = response_adapter.validate_python({"success": "Livros disponiveis na StandLivros", "data": books})
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False).encode("utf-8")
+
+def fast(db) -> bytes:
+    books = [tuple_json(book) for book in db.execute(select(*BOOK_COLUMNS)).all()]
+    return dumps({"success": "Livros disponiveis na StandLivros", "data": books, "next_cursor": None})
+
+# Mede o melhor tempo (ms) entre as repetições; a sessão é limpa para não reaproveitar objetos do ORM
+def measure(Session, function, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        db = Session()
+        try:
+            start = time.perf_counter()
+            function(db)
+            timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+    return min(timings)
+
+def run(sizes, repeat: int):
+    results = []
+    for size in sizes:
+        engine, Session = build_database(size)
+        try:
+            orm_ms = measure(Session, orm_pydantic, repeat)
+            fast_ms = measure(Session, fast, repeat)
+        finally:
+            engine.dispose()
+        results.append({
+            "size": size,
+            "orm_pydantic_ms": round(orm_ms, 2),
+            "fast_ms": round(fast_ms, 2),
+            "speedup": round(orm_ms / fast_ms, 1)
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'livros':>10} {'ORM + Pydantic (ms)':>20} {'rápido (ms)':>12} {'ganho':>7}")
+    for result in run(args.sizes, args.repeat):
+        print(f"{result['size']:>10} {result['orm_pydantic_ms']:>20} {result['fast_ms']:>12} {result['speedup']:>6}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark dos métodos do `BookService` chamados diretamente sobre um catálogo sintético.
+
+Uso: python -m benchmarks.bench_service [--url postgresql+psycopg2://...] [--size 10000] [--iterations 200]
+
+Atenção: o banco indicado em `--url` é recriado (DROP/CREATE das tabelas) antes da medição.
+"""
+import argparse
+import json
+from sqlalchemy import select
+from benchmarks.datasets import build_database
+from benchmarks.stats import measure
+from db.book_models import Book_Model
+from services.book_service import BookService
+
+# Executa cada método do serviço (sem cache) e retorna o resumo por método
+def run(url: str, size: int, iterations: int):
+    engine, Session = build_database(size, url=url)
+    book_service = BookService()
+    db = Session()
+    try:
+        book_ids = db.scalars(select(Book_Model.book_id).order_by(Book_Model.book_id).limit(iterations + 10)).all()
+        first_page_cursor = book_service.list_books_page(db, limit=50)[1]
+
+        def new_books(index: int, count: int, prefix: str):
+            return [
+                {"titulo": f"{prefix} {index}-{offset}", "autor": "Autor", "categoria": "Benchmark", "valor": 10.0}
+                for offset in range(count)
+            ]
+
+        created_ids = []
+
+        def create_and_track(index: int):
+            created_ids.extend(book["id"] for book in book_service.create_book(db, new_books(index, 1, "Criado")))
+
+        scenarios = {
+            "list_books_page": lambda index: book_service.list_books_page(db, limit=50),
+            "list_books_page_cursor": lambda index: book_service.list_books_page(db, limit=50, cursor=first_page_cursor),
+            "list_books_page_filtered": lambda index: book_service.list_books_page(db, autor="Tolkien", limit=50),
+            "search_books": lambda index: book_service.search_books(db, "senhor aneis", limit=20),
+            "get_facets": lambda index: book_service.get_facets(db),
+            "get_book": lambda index: book_service.get_book(db, book_ids[index % len(book_ids)]),
+            "create_book": create_and_track,
+            "create_book_batch_100": lambda index: book_service.create_book(db, new_books(index, 100, "Lote")),
+            "update_book": lambda index: book_service.update_book(
+                db, {"id": book_ids[index % len(book_ids)], "titulo": f"Atualizado {index}", "autor": "Autor", "categoria": "Benchmark", "valor": 12.0}
+            ),
+            "delete_book": lambda index: book_service.delete_book(db, created_ids[index]),
+        }
+
+        results = {}
+        for name, scenario in scenarios.items():
+            # Sem aquecimento no delete: cada execução remove um livro criado no cenário anterior
+            results[name] = measure(scenario, iterations, warmup=0 if name == "delete_book" else 2)
+
+        # O streaming do catálogo inteiro é medido poucas vezes, pois cada execução lê todos os livros
+        results["stream_books_full"] = measure(lambda index: sum(1 for _ in book_service.stream_books(db)), 3, warmup=1)
+        return results
+    finally:
+        db.close()
+        engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="URL síncrona do banco; padrão: SQLite em memória")
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run(args.url, args.size, args.iterations), indent=2))
+
+if __name__ == "__main__":
+    main()
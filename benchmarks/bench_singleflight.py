@@ -0,0 +1,88 @@
+"""Teste de carga do agrupamento de listagens idênticas (single-flight): comandos SQL por requisição.
+
+Uso: python -m benchmarks.bench_singleflight [--url postgresql+psycopg2://...] [--size 10000] [--requests 1000] [--concurrency 200]
+
+Dispara `--requests` requisições idênticas de `GET /books?categoria=...`, com até `--concurrency`
+simultâneas, uma vez com o agrupamento ligado e outra desligado, e compara a quantidade de comandos
+SQL executados, a latência e a vazão. O cache de leitura fica desligado nas duas medições.
+
+Atenção: o banco indicado em `--url` é recriado (DROP/CREATE das tabelas) antes da medição.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import httpx
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from benchmarks.bench_api import measure_endpoint
+from benchmarks.datasets import build_database
+from db.config import get_async_db, to_async_url
+from main import app
+from routers import book_routers
+from services.async_book_service import AsyncBookService
+from services.book_service import BookService
+from utils.singleflight import SingleFlight
+
+# Mede as requisições idênticas com e sem o agrupamento, contando os comandos SQL de cada medição
+async def run_load(url: str, requests: int, concurrency: int, category: str):
+    engine = create_async_engine(to_async_url(url))
+    TestingAsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    queries = 0
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+
+    async def get_test_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = get_test_db
+    cached_flights = book_routers.listing_flights
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            results = {}
+            for name, flights in (("sem_single_flight", None), ("com_single_flight", SingleFlight())):
+                book_routers.listing_flights = flights
+                queries = 0
+                summary = await measure_endpoint(
+                    client, lambda client, index: client.get("/books", params={"categoria": category}), requests, concurrency
+                )
+                summary["queries"] = queries
+                summary["queries_per_request"] = round(queries / requests, 3)
+                results[name] = summary
+            return results
+    finally:
+        book_routers.listing_flights = cached_flights
+        app.dependency_overrides.pop(get_async_db, None)
+        await engine.dispose()
+
+def run(url: str, size: int, requests: int, concurrency: int, category: str = "Ficção"):
+    # O cache de leitura é desligado para que as requisições cheguem ao banco
+    cached_service = book_routers.book_service
+    book_routers.book_service = AsyncBookService(BookService())
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            url = url or f"sqlite:///{os.path.join(directory, 'bench.db')}"
+            engine, _ = build_database(size, url=url)
+            engine.dispose()
+            return asyncio.run(run_load(url, requests, concurrency, category))
+    finally:
+        book_routers.book_service = cached_service
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default=None, help="URL síncrona do banco (padrão: SQLite temporário)")
+    parser.add_argument("--size", type=int, default=10000, help="Quantidade de livros no banco sintético")
+    parser.add_argument("--requests", type=int, default=1000, help="Quantidade de requisições idênticas")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requisições simultâneas")
+    parser.add_argument("--categoria", default="Ficção", help="Categoria filtrada nas requisições")
+    args = parser.parse_args()
+    print(json.dumps(run(args.url, args.size, args.requests, args.concurrency, args.categoria), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Mede a inicialização a frio da aplicação: importação do `main` e ciclo de vida até a prontidão.
+
+Uso: python -m benchmarks.bench_startup [--runs 5] [--top 15] [--env METRICS_ENABLED=false ...]
+
+Cada execução roda em um processo novo com `python -X importtime -c "import main"`, então nada vem
+de importações anteriores (os arquivos .pyc já compilados são usados, como em um container). Reporta o
+tempo total de importação, o tempo próprio dos módulos do repositório (roteadores, serviços, modelos;
+inclui a montagem das rotas e dos esquemas do pydantic), o tempo de cada pacote externo e os módulos mais
+lentos. Com `--ready`, mede também o ciclo de vida até a prontidão (migração, pools e caches aquecidos)
+e a primeira montagem do esquema OpenAPI.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from benchmarks.stats import summarize
+
+# Pacotes do repositório; os demais módulos contam como dependências externas
+REPO_PACKAGES = ("main", "routers", "services", "db", "utils")
+
+# Linha do `-X importtime`: tempo próprio, tempo acumulado (microssegundos) e módulo indentado pela profundidade
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$")
+
+# Script do processo filho com `--ready`: importa, monta o esquema e executa o ciclo de vida
+READY_SCRIPT = """
+import asyncio, json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.app.openapi()
+openapi = time.perf_counter()
+async def lifespan():
+    async with main.app.router.lifespan_context(main.app):
+        return time.perf_counter()
+ready = asyncio.run(lifespan())
+print(json.dumps({"import": imported - start, "openapi": openapi - imported, "ready": ready - openapi}))
+"""
+
+# Tempos de importação de um processo, por módulo: {módulo: (próprio, acumulado)} em microssegundos
+def parse_importtime(stderr: str) -> dict:
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+# Resumo de uma importação: total do `main`, tempo próprio do repositório e de cada pacote externo
+def summarize_imports(modules: dict) -> dict:
+    packages = {}
+    for name, (self_us, _) in modules.items():
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    repo_us = sum(packages.get(package, 0) for package in REPO_PACKAGES)
+    return {
+        "total_ms": modules.get("main", (0, 0))[1] / 1000,
+        "repo_ms": repo_us / 1000,
+        "packages_ms": {
+            package: elapsed / 1000 for package, elapsed in packages.items() if package not in REPO_PACKAGES
+        },
+    }
+
+# Importa o `main` em um processo novo e retorna os tempos por módulo
+def measure_import(env: dict = None) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True, env={**os.environ, **(env or {})}
+    )
+    return parse_importtime(result.stderr)
+
+# Executa importação, esquema OpenAPI e ciclo de vida em um processo novo; retorna as durações em segundos
+def measure_ready(env: dict = None) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", READY_SCRIPT],
+        capture_output=True, text=True, check=True, env={**os.environ, **(env or {})}
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run(runs: int, top: int = 15, env: dict = None, ready: bool = False):
+    imports = [measure_import(env) for _ in range(runs)]
+    summaries = [summarize_imports(modules) for modules in imports]
+
+    # Módulos mais lentos pelo tempo próprio, na mediana das execuções
+    slowest = {}
+    for name in imports[0]:
+        samples = sorted(modules[name][0] for modules in imports if name in modules)
+        slowest[name] = samples[len(samples) // 2] / 1000
+    packages = {}
+    for summary in summaries:
+        for package, elapsed in summary["packages_ms"].items():
+            packages.setdefault(package, []).append(elapsed)
+
+    report = {
+        "import": summarize([summary["total_ms"] / 1000 for summary in summaries]),
+        "import_repo": summarize([summary["repo_ms"] / 1000 for summary in summaries]),
+        "packages_ms": {
+            package: round(sorted(samples)[len(samples) // 2], 3)
+            for package, samples in sorted(packages.items(), key=lambda item: -sorted(item[1])[len(item[1]) // 2])[:top]
+        },
+        "slowest_modules_ms": dict(sorted(slowest.items(), key=lambda item: -item[1])[:top]),
+    }
+    if ready:
+        timings = [measure_ready(env) for _ in range(runs)]
+        for stage in ("import", "openapi", "ready"):
+            report[f"cold_{stage}"] = summarize([timing[stage] for timing in timings])
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--env", nargs="*", default=[], help="variáveis NOME=valor dos processos medidos")
+    parser.add_argument("--ready", action="store_true", help="mede também o ciclo de vida até a prontidão")
+    args = parser.parse_args()
+
+    env = dict(item.split("=", 1) for item in args.env)
+    print(json.dumps(run(args.runs, args.top, env, args.ready), indent=2))
+
+if __name__ == "__main__":
+    main()
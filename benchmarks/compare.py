@@ -0,0 +1,54 @@
+"""Compara dois resultados de `benchmarks.run` e falha quando alguma operação regrediu.
+
+Uso: python -m benchmarks.compare baseline.json atual.json [--threshold 0.2] [--metric p95_ms]
+
+Uma operação regride quando a métrica atual passa do valor de referência em mais que
+`--threshold` (0.2 = 20%). Diferenças abaixo de `--min-delta-ms` são ignoradas, para que
+ruído em operações de microssegundos não quebre a verificação. O código de saída é 1 se houver
+regressão, o que permite usar o script em CI.
+"""
+import argparse
+import json
+import sys
+
+# Compara as operações presentes nos dois resultados e retorna uma linha por operação
+def compare_results(baseline: dict, current: dict, metric: str = "p95_ms", threshold: float = 0.2, min_delta_ms: float = 0.5):
+    comparison = []
+    for name, summary in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before, after = baseline["results"][name][metric], summary[metric]
+        change = (after - before) / before if before else 0.0
+        comparison.append({
+            "name": name,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 3),
+            "regression": change > threshold and after - before > min_delta_ms
+        })
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--metric", default="p95_ms", choices=["mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with open(args.baseline, encoding="utf-8") as baseline, open(args.current, encoding="utf-8") as current:
+        comparison = compare_results(json.load(baseline), json.load(current), args.metric, args.threshold, args.min_delta_ms)
+
+    print(f"{'operação':<45} {'antes':>9} {'depois':>9} {'variação':>9}")
+    for row in comparison:
+        flag = "  REGRESSÃO" if row["regression"] else ""
+        print(f"{row['name']:<45} {row['baseline']:>9} {row['current']:>9} {row['change']:>+9.1%}{flag}")
+
+    regressions = [row["name"] for row in comparison if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} operação(ões) acima do limite de {args.threshold:.0%} em {args.metric}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
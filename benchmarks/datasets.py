@@ -0,0 +1,59 @@
+import random
+import uuid
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from db.config import Base
+from db.book_models import Book_Model
+import db.search  # noqa: F401 - registra o índice de busca antes do create_all
+from utils.books import books as sample_books
+
+# Vocabulário usado para variar os títulos gerados a partir do exemplo em `utils/books.py`
+WORDS = [
+    "Amanhecer", "Código", "Destino", "Economia", "Floresta", "Guerra", "História", "Ilusão",
+    "Jornada", "Lógica", "Memória", "Noite", "Oceano", "Poder", "Questão", "Razão",
+    "Silêncio", "Tempo", "Universo", "Verdade", "Vento", "Sombra", "Cidade", "Coração",
+]
+
+# Gera `size` livros sintéticos no formato do JSON da entidade Livros
+def generate_books(size: int, seed: int = 42):
+    generator = random.Random(seed)
+    for index in range(size):
+        template = sample_books[index % len(sample_books)]
+        extra_words = " ".join(generator.sample(WORDS, 2))
+        yield {
+            "titulo": f"{template['titulo']} {extra_words} {index}",
+            "autor": template["autor"],
+            "categoria": template["categoria"],
+            "valor": round(template["valor"] * generator.uniform(0.5, 2.0), 2),
+        }
+
+# Converte um livro do formato da API para as colunas da tabela `StandLivros`
+def to_row(book: dict):
+    return {
+        "book_id": str(uuid.uuid4()),
+        "book_title": book["titulo"],
+        "book_author": book["autor"],
+        "book_category": book["categoria"],
+        "book_price": book["valor"],
+    }
+
+# Insere `size` livros sintéticos na tabela em lotes
+def seed_books(engine, size: int, batch_size: int = 5000, seed: int = 42):
+    rows = []
+    with engine.begin() as connection:
+        for book in generate_books(size, seed=seed):
+            rows.append(to_row(book))
+            if len(rows) >= batch_size:
+                connection.execute(insert(Book_Model), rows)
+                rows = []
+        if rows:
+            connection.execute(insert(Book_Model), rows)
+
+# Cria um banco SQLite temporário (arquivo ou memória) com `size` livros e retorna (engine, Session)
+def build_database(size: int, url: str = "sqlite://", seed: int = 42):
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    seed_books(engine, size, seed=seed)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
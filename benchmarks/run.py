@@ -0,0 +1,77 @@
+"""Executa a suíte de benchmarks (serviço e API) e grava os resultados em JSON.
+
+Uso: python -m benchmarks.run [--targets sqlite postgres] [--size 10000] [--output bench_results.json]
+
+Alvos:
+- sqlite: banco SQLite (em memória no serviço, arquivo temporário na API)
+- postgres: banco PostgreSQL local indicado em `BENCH_POSTGRES_URL` ou `--postgres-url`;
+  as tabelas desse banco são recriadas, então use um banco exclusivo para benchmarks
+
+O arquivo gerado pode ser comparado com um resultado anterior usando `benchmarks.compare`.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from benchmarks import bench_api, bench_service
+
+# Commit atual do repositório, para identificar a versão medida
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Executa os benchmarks de cada alvo e retorna os resultados com chaves `<suíte>.<alvo>.<operação>`
+def run(targets: dict, size: int, iterations: int, requests: int, concurrency: int):
+    results = {}
+    for target, url in targets.items():
+        for name, summary in bench_service.run(url or "sqlite://", size, iterations).items():
+            results[f"service.{target}.{name}"] = summary
+        for name, summary in bench_api.run(url, size, requests, concurrency).items():
+            results[f"api.{target}.{name}"] = summary
+
+    return {
+        "meta": {
+            "commit": current_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "targets": sorted(targets),
+            "size": size,
+            "iterations": iterations,
+            "requests": requests,
+            "concurrency": concurrency
+        },
+        "results": results
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", nargs="+", choices=["sqlite", "postgres"], default=["sqlite"])
+    parser.add_argument("--postgres-url", default=os.getenv("BENCH_POSTGRES_URL"))
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=200, help="chamadas por método do serviço")
+    parser.add_argument("--requests", type=int, default=500, help="requisições por endpoint da API")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+
+    if "postgres" in args.targets and not args.postgres_url:
+        parser.error("o alvo postgres exige BENCH_POSTGRES_URL ou --postgres-url")
+    targets = {target: args.postgres_url if target == "postgres" else None for target in args.targets}
+
+    report = run(targets, args.size, args.iterations, args.requests, args.concurrency)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+
+    print(f"{'operação':<45} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'ops/s':>9}")
+    for name, summary in report["results"].items():
+        print(f"{name:<45} {summary['p50_ms']:>9} {summary['p95_ms']:>9} {summary['p99_ms']:>9} {summary['ops_per_s']:>9}")
+    print(f"\nResultados gravados em {args.output}")
+
+if __name__ == "__main__":
+    main()
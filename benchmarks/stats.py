@@ -0,0 +1,37 @@
+import statistics
+import time
+
+# Percentil por interpolação linear (p entre 0 e 100)
+def percentile(sorted_values: list, p: float):
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+# Resume as durações (em segundos) de uma operação: percentis, média e vazão
+def summarize(timings: list, elapsed: float = None):
+    values = sorted(timings)
+    elapsed = elapsed if elapsed is not None else sum(values)
+    return {
+        "samples": len(values),
+        "mean_ms": round(statistics.fmean(values) * 1000, 3),
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "ops_per_s": round(len(values) / elapsed, 1) if elapsed else None
+    }
+
+# Executa `function(index)` `iterations` vezes (após `warmup` execuções) e resume as durações.
+# Cada execução recebe um índice distinto, inclusive no aquecimento, para gerar dados únicos.
+def measure(function, iterations: int, warmup: int = 2):
+    for index in range(warmup):
+        function(index)
+
+    timings = []
+    for index in range(warmup, warmup + iterations):
+        start = time.perf_counter()
+        function(index)
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
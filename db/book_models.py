@@ -1,16 +1,49 @@
-from sqlalchemy import Column, String, Float
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Float, Integer, DateTime, Index, JSON, Text, event, func, insert, inspect, select, text
 from db.config import Base
 
+# Data e hora atual em UTC, usada nas colunas `updated_at`
+def utc_now():
+    return datetime.now(timezone.utc)
+
+# Condições dos índices parciais da tabela `StandLivros` (livros ativos e marcas de remoção)
+LIVE_BOOKS = {"sqlite_where": text("deleted_at IS NULL"), "postgresql_where": text("deleted_at IS NULL")}
+TOMBSTONES = {"sqlite_where": text("deleted_at IS NOT NULL"), "postgresql_where": text("deleted_at IS NOT NULL")}
+
 # Modelo SQLAlchemy que representa a tabela `StandLivros` no banco de dados PostgreSQL
 class Book_Model(Base):
     __tablename__ = 'StandLivros'
+    # Os índices das listagens (e a unicidade de título e categoria) são parciais: cobrem apenas os livros
+    # ativos, os únicos lidos pelas listagens. Um livro removido vira uma marca de remoção (`deleted_at`
+    # preenchido) até ser expurgado pela compactação (`services/compaction.py`).
+    __table_args__ = (
+        # Um mesmo título não pode se repetir na mesma categoria, nem sob escritas concorrentes
+        Index('uq_StandLivros_title_category', 'book_title', 'book_category', unique=True, **LIVE_BOOKS),
+        # Índices compostos das listagens ordenadas: cada ordenação termina no `book_id`, então as
+        # páginas (e o cursor keyset) saem na ordem do índice, sem ordenar em memória. Também atendem
+        # os filtros por título, autor, categoria exata e faixa de valor.
+        Index('ix_StandLivros_title_id', 'book_title', 'book_id', **LIVE_BOOKS),
+        Index('ix_StandLivros_author_id', 'book_author', 'book_id', **LIVE_BOOKS),
+        Index('ix_StandLivros_price_id', 'book_price', 'book_id', **LIVE_BOOKS),
+        Index('ix_StandLivros_category_price_id', 'book_category', 'book_price', 'book_id', **LIVE_BOOKS),
+        # Sincronização incremental (`updated_since`): livros alterados e removidos, na ordem da alteração
+        Index('ix_StandLivros_updated_at_id', 'updated_at', 'book_id'),
+        # Compactação: apenas as marcas de remoção, na ordem da remoção
+        Index('ix_StandLivros_deleted_at', 'deleted_at', **TOMBSTONES),
+    )
 
     # Definição das colunas da tabela
     book_id = Column(String, primary_key=True, index=True)
-    book_title = Column(String, index=True)
-    book_author = Column(String, index=True)
-    book_category = Column(String, index=True)
+    book_title = Column(String)
+    book_author = Column(String)
+    book_category = Column(String)
     book_price = Column(Float)
+    # Versão do livro: valor do contador de alterações do catálogo na última escrita do livro. Os valores
+    # padrão do banco preenchem os livros existentes quando a migração adiciona as colunas.
+    book_version = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utc_now, server_default=text("CURRENT_TIMESTAMP"))
+    # Data da remoção; nulo nos livros ativos
+    deleted_at = Column(DateTime(timezone=True))
 
     # Construtor da classe `Book_Model` que inicializa um objeto livro.
     def __init__(self, book_id, book_title, book_author, book_category, book_price):
@@ -29,5 +62,107 @@ class Book_Model(Base):
             "categoria": self.book_category,
             "valor": self.book_price
         }
-        
-        
+
+# Quantidade máxima de valores repetidos listados no erro da migração
+DUPLICATES_REPORTED = 10
+
+# Valores das colunas do índice único `index` repetidos entre os livros ativos, com a quantidade de livros
+def _duplicate_keys(connection, index, limit: int = DUPLICATES_REPORTED):
+    columns = list(index.columns)
+    return connection.execute(
+        select(*columns, func.count())
+        .where(Book_Model.deleted_at.is_(None), *(column.is_not(None) for column in columns))
+        .group_by(*columns)
+        .having(func.count() > 1)
+        .order_by(*columns)
+        .limit(limit)
+    ).all()
+
+# Cria os índices da tabela `StandLivros` que ainda não existem em bancos criados antes deles
+# (o `create_all` só cria tabelas novas). Um índice único só é criado se os livros ativos não o violam;
+# caso contrário, a migração falha listando os valores repetidos, que precisam ser corrigidos antes.
+def ensure_book_indexes(engine):
+    existing = {index["name"] for index in inspect(engine).get_indexes(Book_Model.__tablename__)}
+    for index in Book_Model.__table__.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            with engine.connect() as connection:
+                duplicates = _duplicate_keys(connection, index)
+            if duplicates:
+                columns = ", ".join(column.name for column in index.columns)
+                listed = "; ".join(f"{tuple(row[:-1])}: {row[-1]} livros" for row in duplicates)
+                raise RuntimeError(
+                    f"Não foi possível criar o índice único '{index.name}': há livros ativos repetidos em ({columns}). "
+                    f"{listed}. Corrija ou remova os livros repetidos e execute a migração novamente."
+                )
+        index.create(bind=engine, checkfirst=True)
+
+# Modelo da tabela `StandLivrosCatalogo`, com uma única linha que guarda o contador de alterações
+# do catálogo. Cada escrita incrementa o contador na mesma transação; ele identifica a versão
+# das listagens (ETag) sem precisar consultar os livros.
+class Catalog_Model(Base):
+    __tablename__ = 'StandLivrosCatalogo'
+
+    CATALOG_ID = 1
+
+    catalog_id = Column(Integer, primary_key=True)
+    change_counter = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utc_now)
+
+# Cria a linha única do contador junto com a tabela
+@event.listens_for(Catalog_Model.__table__, "after_create")
+def create_catalog_row(target, connection, **kwargs):
+    connection.execute(insert(target).values(catalog_id=Catalog_Model.CATALOG_ID, change_counter=0, updated_at=utc_now()))
+
+# Modelo da tabela `StandLivrosFacetas`, com o resumo opcional das facetas do catálogo: quantidade de
+# livros e soma dos valores por categoria, autor e faixa de valor (além do total). Mantida por
+# triggers quando `BOOK_FACETS_SUMMARY` está ligado (ver `db/facets.py`).
+class Facet_Model(Base):
+    __tablename__ = 'StandLivrosFacetas'
+
+    facet = Column(String, primary_key=True)
+    facet_value = Column(String, primary_key=True)
+    book_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0.0)
+
+# Modelo da tabela `StandLivrosJobs`, com as tarefas em segundo plano (ver `services/jobs.py`). O estado
+# fica no banco para sobreviver a reinícios: tarefas pendentes são retomadas quando a fila inicia.
+class Job_Model(Base):
+    __tablename__ = 'StandLivrosJobs'
+    # Fila de tarefas pendentes (e recuperação das interrompidas) em ordem de criação
+    __table_args__ = (
+        Index('ix_StandLivrosJobs_status_created', 'job_status', 'created_at'),
+    )
+
+    job_id = Column(String, primary_key=True)
+    job_operation = Column(String, nullable=False)
+    job_status = Column(String, nullable=False)
+    job_payload = Column(JSON, nullable=False)
+    job_progress = Column(Integer, nullable=False, default=0)
+    job_total = Column(Integer, nullable=False, default=0)
+    job_result = Column(JSON)
+    job_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utc_now)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    # Atualizado a cada progresso; tarefas em execução sem atualização recente foram interrompidas
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utc_now)
+
+# Modelo da tabela `StandLivrosAlteracoes`, o registro de alterações do catálogo: uma linha por livro
+# criado, alterado ou removido, gravada na mesma transação da escrita. Como toda escrita começa
+# incrementando o contador do catálogo (lock na linha única de `StandLivrosCatalogo`), as escritas são
+# serializadas e a sequência cresce na ordem dos commits.
+class Change_Model(Base):
+    __tablename__ = 'StandLivrosAlteracoes'
+    # No SQLite, AUTOINCREMENT impede que a sequência reutilize valores após a remoção das últimas linhas
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    CHANGE_UPSERT = "upsert"
+    CHANGE_DELETE = "delete"
+
+    change_seq = Column(Integer, primary_key=True, autoincrement=True)
+    book_id = Column(String, nullable=False)
+    change_type = Column(String, nullable=False)
+    catalog_version = Column(Integer, nullable=False)
+    changed_at = Column(DateTime(timezone=True), nullable=False, default=utc_now)
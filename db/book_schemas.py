@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional, List
 
 class BookModel(BaseModel):
     id: Optional[str] = None #UUID gerado automaticamente
@@ -29,6 +30,134 @@ class BookResponse(BaseModel):
 class BookListResponse(BaseModel):
     success: str
     data: List[BookResponse]
+    next_cursor: Optional[str] = None # Cursor opaco para buscar a próxima página
+
+class BookBatchRequest(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=5000)
+
+    class Config:
+        json_schema_extra = {
+            "example": {"ids": ["0b6d6f4e-5c1e-4a57-9a84-3c2f1f1a7d10", "5a4c2b1e-9d8f-4e3a-b2c1-7f6e5d4c3b2a"]}
+        }
+
+class BookBatchResponse(BaseModel):
+    success: str
+    data: List[BookResponse] # Na ordem dos ids pedidos
+    missing: List[str] # Ids não encontrados
+
+class BookChange(BaseModel):
+    seq: int # Sequência da alteração no registro, crescente na ordem dos commits
+    tipo: Literal["upsert", "delete"]
+    id: str
+    versao: int # Versão do catálogo gravada pela alteração
+    alterado_em: datetime
+    livro: Optional[BookResponse] = None # Estado atual do livro; nulo se ele foi removido
+
+class BookChangesResponse(BaseModel):
+    success: str
+    data: List[BookChange]
+    next: int # Valor de `since` para a próxima chamada
+    has_more: bool # Há mais alterações além de `limit`
+
+class FacetValue(BaseModel):
+    valor: str
+    total: int
+
+class PriceBucket(BaseModel):
+    min: float
+    max: Optional[float] = None # A última faixa não tem limite superior
+    total: int
+
+class PriceFacet(BaseModel):
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    faixas: List[PriceBucket]
+
+class BookFacets(BaseModel):
+    total: int
+    categorias: List[FacetValue]
+    autores: List[FacetValue]
+    valor: PriceFacet
+
+class BookFacetsResponse(BaseModel):
+    success: str
+    data: BookFacets
+
+class ImportRowError(BaseModel):
+    linha: int
+    erro: str
+
+class BookImportResult(BaseModel):
+    linhas: int # Registros lidos do arquivo (sem o cabeçalho do CSV)
+    importados: int
+    erros: List[ImportRowError]
+    erros_omitidos: int # Erros além do limite devolvido na resposta
+
+class BookImportResponse(BaseModel):
+    success: str
+    data: BookImportResult
+
+class PriceFilter(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=1000) # Ids dos livros, além dos filtros da listagem
+    titulo: Optional[str] = None
+    autor: Optional[str] = None
+    categoria: Optional[str] = None
+    categoria_exata: Optional[str] = None
+    valor_min: Optional[float] = Field(None, ge=0)
+    valor_max: Optional[float] = Field(None, ge=0)
+
+class PriceAdjustment(BaseModel):
+    filtro: PriceFilter
+    operacao: Literal["set", "percent", "add", "round"]
+    valor: float # Novo valor, percentual, acréscimo ou centavos finais do arredondamento
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filtro": {"categoria_exata": "Finanças"},
+                "operacao": "percent",
+                "valor": 10
+            }
+        }
+
+class PriceAdjustmentResult(BaseModel):
+    total: int
+    livros: Optional[List[BookResponse]] = None # Ausente no `dry_run`
+
+class PriceAdjustmentResponse(BaseModel):
+    success: str
+    data: PriceAdjustmentResult
+
+class JobRequest(BaseModel):
+    operacao: str # Operação registrada em `services/jobs.py`, ex.: `create_books`
+    dados: Any # Dados da operação, ex.: a lista de livros
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "operacao": "create_books",
+                "dados": [
+                    {"titulo": "O Senhor dos Anéis", "autor": "J.R.R. Tolkien", "categoria": "Ficção Fantástica", "valor": 59.90}
+                ]
+            }
+        }
+
+class JobStatus(BaseModel):
+    id: str
+    operacao: str
+    status: str # pendente, executando, concluido ou falhou
+    progresso: int
+    total: int
+    resultado: Optional[Any] = None
+    erro: Optional[str] = None
+    criado_em: datetime
+    iniciado_em: Optional[datetime] = None
+    concluido_em: Optional[datetime] = None
+
+class JobResponse(BaseModel):
+    success: str
+    data: JobStatus
 
 class ErrorResponse(BaseModel):
     detail: str
\ No newline at end of file
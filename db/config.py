@@ -1,17 +1,87 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base, sessionmaker
 from dotenv import load_dotenv
+from db.pool_metrics import ASYNC_POOL_CLASS, SYNC_POOL_CLASS, async_pool_metrics, sync_pool_metrics
 import os
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///:memory:")  # SQLite em memória como padrão
+# SQLite em arquivo como padrão: um banco em memória existe por conexão, e os engines síncrono e
+# assíncrono (e cada thread do pool) veriam bancos vazios diferentes
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./standlivros.db")
+
+# Drivers assíncronos equivalentes aos drivers síncronos suportados
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Converte a URL síncrona para o driver assíncrono do mesmo banco (asyncpg ou aiosqlite)
+def to_async_url(url: str) -> str:
+    parsed_url = make_url(url)
+    return parsed_url.set(drivername=ASYNC_DRIVERS.get(parsed_url.get_backend_name(), parsed_url.drivername)).render_as_string(hide_password=False)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+# Configuração do pool de conexões por variáveis de ambiente (valores por processo)
+POOL_SETTINGS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+
+# Tempo máximo de cada comando no PostgreSQL, em milissegundos (0 desativa)
+STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# SQLite em memória usa um pool próprio (uma conexão por thread), sem fila para configurar
+def _is_memory_sqlite(url: str) -> bool:
+    parsed_url = make_url(url)
+    return parsed_url.get_backend_name() == "sqlite" and parsed_url.database in (None, "", ":memory:")
+
+# A aplicação recusa o SQLite em memória ao iniciar: a migração, o pool síncrono e o assíncrono
+# abririam cada um o seu banco vazio, e a inicialização falharia em uma tabela inexistente
+def ensure_shared_database(url: str = DATABASE_URL):
+    if _is_memory_sqlite(url):
+        raise RuntimeError(
+            f"DATABASE_URL={url} aponta para um SQLite em memória, que não é compartilhado entre conexões; "
+            "use um arquivo (sqlite:///./standlivros.db) ou o PostgreSQL"
+        )
+
+# Argumentos de conexão de cada driver: SQLite compartilhado entre threads e statement_timeout no PostgreSQL
+def _connect_args(url: str) -> dict:
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() == "sqlite":
+        return {"check_same_thread": False} if parsed_url.get_driver_name() == "pysqlite" else {}
+    if parsed_url.get_backend_name() == "postgresql" and STATEMENT_TIMEOUT_MS:
+        if parsed_url.get_driver_name() == "asyncpg":
+            return {"server_settings": {"statement_timeout": str(STATEMENT_TIMEOUT_MS)}}
+        return {"options": f"-c statement_timeout={STATEMENT_TIMEOUT_MS}"}
+    return {}
+
+# Argumentos do engine: pool com fila instrumentado e configurado, exceto no SQLite em memória
+def _engine_options(url: str, pool_class) -> dict:
+    options = {"connect_args": _connect_args(url)}
+    if not _is_memory_sqlite(url):
+        options.update(POOL_SETTINGS, poolclass=pool_class)
+    return options
 
 # Configurar o motor e sessão do SQLAlchemy
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, SYNC_POOL_CLASS))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor e sessão assíncronos usados pelas rotas da API, sem bloquear o event loop durante as consultas
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_engine_options(ASYNC_DATABASE_URL, ASYNC_POOL_CLASS))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Registra as métricas de checkout, conexões em uso, overflow e timeouts dos dois pools
+sync_pool_metrics.attach(engine)
+async_pool_metrics.attach(async_engine)
+
 # Classe base para passar ao modelo de teabelas SQLAlchemy
 Base = declarative_base()
 
@@ -22,3 +92,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Função para obter uma sessão assíncrona do banco de dados
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,155 @@
+import os
+from sqlalchemy import case, delete, func, insert, literal, select, union_all
+from db.book_models import Book_Model, Facet_Model
+
+# Facetas do catálogo (contagens por categoria e autor, estatísticas e faixas de valor).
+# Sem filtros, podem ser lidas da tabela de resumo `StandLivrosFacetas`, mantida por triggers:
+# - SQLite: triggers AFTER INSERT/DELETE/UPDATE com UPSERT na tabela de resumo
+# - PostgreSQL: uma função plpgsql chamada por um trigger de linha
+
+FACET_TABLE = Facet_Model.__tablename__
+
+# Liga a tabela de resumo; desligado, as facetas são sempre calculadas com GROUP BY
+FACETS_SUMMARY_ENABLED = os.getenv("BOOK_FACETS_SUMMARY", "false").lower() in ("1", "true", "yes")
+
+# Limites das faixas de valor: `10,25` gera as faixas [0, 10), [10, 25) e [25, ∞)
+PRICE_BUCKET_EDGES = tuple(
+    float(edge) for edge in os.getenv("BOOK_FACET_PRICE_EDGES", "10,25,50,100,200").split(",") if edge.strip()
+)
+
+# Intervalos (mínimo, máximo) de cada faixa de valor; a última não tem máximo
+def price_bucket_bounds(edges=PRICE_BUCKET_EDGES):
+    lower_bounds = (0.0,) + edges
+    upper_bounds = edges + (None,)
+    return list(zip(lower_bounds, upper_bounds))
+
+# Índice (como texto) da faixa de valor do livro, para o GROUP BY
+def price_bucket_expression(price, edges=PRICE_BUCKET_EDGES):
+    price = func.coalesce(price, 0)
+    return case(
+        *((price < edge, literal(str(index))) for index, edge in enumerate(edges)),
+        else_=literal(str(len(edges)))
+    )
+
+# Mesma expressão em SQL literal, usada nos triggers (`row` é `new` ou `old`)
+def _price_bucket_sql(row: str, edges=PRICE_BUCKET_EDGES):
+    whens = " ".join(f"WHEN coalesce({row}.book_price, 0) < {edge!r} THEN '{index}'" for index, edge in enumerate(edges))
+    return f"CASE {whens} ELSE '{len(edges)}' END"
+
+# Linhas somadas à tabela de resumo para um livro (`sign` = 1 na inclusão, -1 na remoção).
+# Marcas de remoção (`deleted_at` preenchido) não contam nas facetas.
+def _facet_values_sql(row: str, sign: int):
+    count = f"CASE WHEN {row}.deleted_at IS NULL THEN {sign} ELSE 0 END"
+    price = f"{count} * coalesce({row}.book_price, 0)"
+    return ", ".join([
+        f"('total', '', {count}, {price})",
+        f"('categoria', coalesce({row}.book_category, ''), {count}, {price})",
+        f"('autor', coalesce({row}.book_author, ''), {count}, {price})",
+        f"('faixa_valor', {_price_bucket_sql(row)}, {count}, {price})",
+    ])
+
+def _facet_upsert_sql(row: str, sign: int):
+    return f"""
+        INSERT INTO "{FACET_TABLE}"(facet, facet_value, book_count, price_sum)
+        VALUES {_facet_values_sql(row, sign)}
+        ON CONFLICT(facet, facet_value) DO UPDATE SET
+            book_count = "{FACET_TABLE}".book_count + excluded.book_count,
+            price_sum = "{FACET_TABLE}".price_sum + excluded.price_sum;
+    """
+
+# Colunas que alteram as facetas; atualizações só da versão ou do título não disparam os triggers
+FACET_COLUMNS = "book_category, book_author, book_price, deleted_at"
+
+def _sqlite_create_statements():
+    return [
+        f"""
+        CREATE TRIGGER "{FACET_TABLE}_ai" AFTER INSERT ON "StandLivros" BEGIN
+            {_facet_upsert_sql("new", 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER "{FACET_TABLE}_ad" AFTER DELETE ON "StandLivros" BEGIN
+            {_facet_upsert_sql("old", -1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER "{FACET_TABLE}_au" AFTER UPDATE OF {FACET_COLUMNS} ON "StandLivros" BEGIN
+            {_facet_upsert_sql("old", -1)}
+            {_facet_upsert_sql("new", 1)}
+        END
+        """,
+    ]
+
+SQLITE_DROP_STATEMENTS = [
+    f'DROP TRIGGER IF EXISTS "{FACET_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FACET_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FACET_TABLE}_au"',
+]
+
+def _postgres_create_statements():
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION standlivros_facets_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('DELETE', 'UPDATE') THEN
+                {_facet_upsert_sql("OLD", -1)}
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                {_facet_upsert_sql("NEW", 1)}
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"""
+        CREATE TRIGGER "{FACET_TABLE}_sync"
+        AFTER INSERT OR DELETE OR UPDATE OF {FACET_COLUMNS} ON "StandLivros"
+        FOR EACH ROW EXECUTE FUNCTION standlivros_facets_sync()
+        """,
+    ]
+
+POSTGRES_DROP_STATEMENTS = [
+    f'DROP TRIGGER IF EXISTS "{FACET_TABLE}_sync" ON "StandLivros"',
+]
+
+# Recalcula toda a tabela de resumo a partir dos livros, com um GROUP BY por faceta
+def rebuild_facet_summary(connection):
+    price = func.coalesce(Book_Model.book_price, 0)
+    aggregates = (func.count(), func.coalesce(func.sum(price), 0.0))
+    live = Book_Model.deleted_at.is_(None)
+    summary = union_all(
+        select(literal("total"), literal(""), *aggregates).where(live),
+        *(
+            select(literal(facet), value, *aggregates).where(live).group_by(value)
+            for facet, value in (
+                ("categoria", func.coalesce(Book_Model.book_category, "")),
+                ("autor", func.coalesce(Book_Model.book_author, "")),
+                ("faixa_valor", price_bucket_expression(Book_Model.book_price)),
+            )
+        )
+    )
+    connection.execute(delete(Facet_Model))
+    connection.execute(
+        insert(Facet_Model).from_select(["facet", "facet_value", "book_count", "price_sum"], summary)
+    )
+
+# Liga ou desliga a tabela de resumo no banco. Ligada, recria os triggers (as faixas de valor podem
+# ter mudado) e reconstrói o resumo; desligada, remove os triggers para não pesar nas escritas.
+def ensure_facet_summary(engine, enabled: bool = FACETS_SUMMARY_ENABLED):
+    with engine.begin() as connection:
+        dialect_name = connection.dialect.name
+        if dialect_name == "sqlite":
+            drop_statements, create_statements = SQLITE_DROP_STATEMENTS, _sqlite_create_statements()
+        elif dialect_name == "postgresql":
+            drop_statements, create_statements = POSTGRES_DROP_STATEMENTS, _postgres_create_statements()
+        else:
+            return
+
+        for statement in drop_statements:
+            connection.exec_driver_sql(statement)
+        if enabled:
+            for statement in create_statements:
+                connection.exec_driver_sql(statement)
+            rebuild_facet_summary(connection)
+        else:
+            connection.execute(delete(Facet_Model))
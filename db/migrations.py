@@ -0,0 +1,92 @@
+import contextlib
+import os
+import sys
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateColumn
+from db.config import Base, engine
+from db.book_models import ensure_book_indexes
+from db.facets import ensure_facet_summary
+from db.search import ensure_search_index
+
+# Migração do esquema: tabelas, colunas novas, índices, busca textual e resumo das facetas. Roda uma
+# única vez antes dos workers (`python -m db.migrations` ou `server.py`), sob um lock exclusivo, para
+# que vários processos iniciando juntos não executem o DDL ao mesmo tempo.
+
+# Chave do advisory lock da migração no PostgreSQL
+MIGRATION_LOCK_KEY = int(os.getenv("DB_MIGRATION_LOCK_KEY", "7262001"))
+
+# Lock exclusivo da migração: advisory lock no PostgreSQL, `flock` em um arquivo ao lado do banco no
+# SQLite em arquivo; no SQLite em memória não há outro processo para disputar
+@contextlib.contextmanager
+def migration_lock(engine):
+    url = make_url(engine.url)
+    if url.get_backend_name() == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            try:
+                yield
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    elif url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        import fcntl
+
+        with open(f"{url.database}.migrate.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+# Adiciona às tabelas existentes as colunas do modelo que ainda não possuem (o `create_all` só cria
+# tabelas novas), como a `deleted_at` em bancos anteriores à remoção lógica e a `book_version` e a
+# `updated_at` em bancos anteriores às requisições condicionais. Colunas obrigatórias precisam de um valor
+# padrão no banco para preencher as linhas existentes; as demais exigem uma migração escrita à mão.
+def ensure_columns(engine):
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Coluna obrigatória ausente em {table.name}: {column.name}")
+                ddl = str(CreateColumn(column).compile(dialect=connection.dialect))
+                if connection.dialect.name == "sqlite":
+                    ddl = _constant_sqlite_default(connection, ddl)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+
+# O SQLite só aceita valores padrão constantes no ADD COLUMN: o CURRENT_TIMESTAMP vira a data da migração,
+# gravada nas linhas existentes (as tabelas criadas pelo `create_all` mantêm o CURRENT_TIMESTAMP)
+def _constant_sqlite_default(connection, ddl: str) -> str:
+    if "DEFAULT CURRENT_TIMESTAMP" not in ddl:
+        return ddl
+    now = connection.exec_driver_sql("SELECT CURRENT_TIMESTAMP").scalar_one()
+    return ddl.replace("DEFAULT CURRENT_TIMESTAMP", f"DEFAULT '{now}'")
+
+# Executa todas as etapas da migração; cada etapa verifica o que já existe, então repetir é seguro
+def migrate(engine=engine):
+    with migration_lock(engine):
+        Base.metadata.create_all(bind=engine)
+        ensure_columns(engine)
+        ensure_book_indexes(engine)
+        ensure_search_index(engine)
+        ensure_facet_summary(engine)
+
+# Compacta o banco (VACUUM fora de transação), sob o lock da migração. O índice de busca do SQLite usa
+# chaves inteiras próprias, que o VACUUM preserva, então não precisa ser reconstruído.
+def vacuum(engine=engine):
+    with migration_lock(engine):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.exec_driver_sql("VACUUM")
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["vacuum"]:
+        vacuum()
+    else:
+        migrate()
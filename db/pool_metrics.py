@@ -0,0 +1,97 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites (em segundos) dos buckets do histograma de espera por uma conexão do pool
+CHECKOUT_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Métricas de um pool de conexões: espera no checkout, conexões em uso, overflow e timeouts
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.engine = None
+        self._lock = threading.Lock()
+        self._counters = {"checkouts": 0, "checkins": 0, "connects": 0, "invalidations": 0, "timeouts": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_buckets = [0] * (len(CHECKOUT_WAIT_BUCKETS) + 1)
+
+    def count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def record_checkout_wait(self, seconds: float):
+        with self._lock:
+            self._wait_total += seconds
+            self._wait_max = max(self._wait_max, seconds)
+            for index, limit in enumerate(CHECKOUT_WAIT_BUCKETS):
+                if seconds <= limit:
+                    self._wait_buckets[index] += 1
+                    break
+            else:
+                self._wait_buckets[-1] += 1
+
+    # Registra os listeners de eventos no pool do engine (síncrono ou assíncrono)
+    def attach(self, engine):
+        self.engine = getattr(engine, "sync_engine", engine)
+        event.listen(self.engine, "checkout", lambda *args: self.count("checkouts"))
+        event.listen(self.engine, "checkin", lambda *args: self.count("checkins"))
+        event.listen(self.engine, "connect", lambda *args: self.count("connects"))
+        event.listen(self.engine, "invalidate", lambda *args: self.count("invalidations"))
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            wait_total, wait_max = self._wait_total, self._wait_max
+            buckets = list(self._wait_buckets)
+
+        waits = sum(buckets)
+        histogram = {f"le_{limit}": count for limit, count in zip(CHECKOUT_WAIT_BUCKETS, buckets)}
+        histogram["le_inf"] = buckets[-1]
+
+        snapshot = {
+            **counters,
+            "checkout_wait": {
+                "count": waits,
+                "avg_ms": round(wait_total / waits * 1000, 3) if waits else None,
+                "max_ms": round(wait_max * 1000, 3),
+                "buckets": histogram
+            }
+        }
+
+        # Estado atual do pool, disponível apenas nos pools com fila (QueuePool)
+        pool = self.engine.pool if self.engine is not None else None
+        if isinstance(pool, QueuePool):
+            snapshot.update({
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0)
+            })
+        return snapshot
+
+# Cria uma subclasse do pool que mede o tempo de espera por uma conexão e conta os timeouts.
+# O SQLAlchemy não emite evento antes do checkout, então a espera é medida em `_do_get`
+# (inclui a abertura de uma conexão nova quando o pool ainda não tem conexões ociosas).
+def instrumented_pool(pool_class, metrics: PoolMetrics):
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.count("timeouts")
+                raise
+            metrics.record_checkout_wait(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = InstrumentedPool.__qualname__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+# Métricas dos pools síncrono e assíncrono da aplicação
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+SYNC_POOL_CLASS = instrumented_pool(QueuePool, sync_pool_metrics)
+ASYNC_POOL_CLASS = instrumented_pool(AsyncAdaptedQueuePool, async_pool_metrics)
@@ -0,0 +1,160 @@
+import re
+from sqlalchemy import DDL, event, func, literal_column, table, column
+from db.book_models import Book_Model
+
+# Índice de busca textual da tabela `StandLivros`:
+# - SQLite: tabela virtual FTS5 sincronizada por triggers, com remoção de acentos no tokenizador
+# - PostgreSQL: índices GIN trigram (pg_trgm) sobre o texto sem acentos (unaccent)
+
+FTS_TABLE = "StandLivros_fts"
+
+# Pesos do ranking bm25 para título, autor e categoria (nessa ordem)
+FTS_WEIGHTS = (10.0, 5.0, 2.0)
+
+# Chaves inteiras estáveis do índice FTS5: o `rowid` implícito de `StandLivros` (chave primária em texto)
+# pode ser renumerado pelo VACUUM, então cada livro recebe aqui um INTEGER PRIMARY KEY próprio, que o
+# VACUUM preserva e que é o `rowid` do livro no índice
+FTS_IDS_TABLE = "StandLivros_fts_ids"
+
+# Id do livro no índice, pela chave primária de `StandLivros`
+FTS_ROWID = f'(SELECT search_rowid FROM "{FTS_IDS_TABLE}" WHERE book_id = {{}}.book_id)'
+
+SQLITE_CREATE_STATEMENTS = [
+    f"""
+    CREATE TABLE IF NOT EXISTS "{FTS_IDS_TABLE}" (
+        search_rowid INTEGER PRIMARY KEY,
+        book_id VARCHAR NOT NULL UNIQUE
+    )
+    """,
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS "{FTS_TABLE}" USING fts5(
+        book_title, book_author, book_category,
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ai" AFTER INSERT ON "StandLivros" BEGIN
+        INSERT OR IGNORE INTO "{FTS_IDS_TABLE}"(book_id) VALUES (new.book_id);
+        INSERT INTO "{FTS_TABLE}"(rowid, book_title, book_author, book_category)
+        VALUES ({FTS_ROWID.format("new")}, new.book_title, new.book_author, new.book_category);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_ad" AFTER DELETE ON "StandLivros" BEGIN
+        DELETE FROM "{FTS_TABLE}" WHERE rowid = {FTS_ROWID.format("old")};
+        DELETE FROM "{FTS_IDS_TABLE}" WHERE book_id = old.book_id;
+    END
+    """,
+    # Só as colunas pesquisadas reindexam o livro; alterações de valor, versão e remoção lógica não
+    f"""
+    CREATE TRIGGER IF NOT EXISTS "{FTS_TABLE}_au" AFTER UPDATE OF book_title, book_author, book_category ON "StandLivros" BEGIN
+        UPDATE "{FTS_TABLE}" SET book_title = new.book_title, book_author = new.book_author, book_category = new.book_category
+        WHERE rowid = {FTS_ROWID.format("new")};
+    END
+    """,
+]
+
+# Preenche o índice com os livros existentes; executado só quando o índice é criado
+SQLITE_POPULATE_STATEMENTS = [
+    f'INSERT OR IGNORE INTO "{FTS_IDS_TABLE}"(book_id) SELECT book_id FROM "StandLivros" ORDER BY book_id',
+    f"""
+    INSERT INTO "{FTS_TABLE}"(rowid, book_title, book_author, book_category)
+    SELECT ids.search_rowid, b.book_title, b.book_author, b.book_category
+    FROM "StandLivros" b JOIN "{FTS_IDS_TABLE}" ids ON ids.book_id = b.book_id
+    """,
+]
+
+SQLITE_DROP_STATEMENTS = [
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ai"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_ad"',
+    f'DROP TRIGGER IF EXISTS "{FTS_TABLE}_au"',
+    f'DROP TABLE IF EXISTS "{FTS_TABLE}"',
+    f'DROP TABLE IF EXISTS "{FTS_IDS_TABLE}"',
+]
+
+# Expressão pesquisada no PostgreSQL: título, autor e categoria em minúsculas e sem acentos
+POSTGRES_SEARCH_EXPRESSION = (
+    "standlivros_unaccent(lower("
+    "coalesce(book_title, '') || ' ' || coalesce(book_author, '') || ' ' || coalesce(book_category, '')"
+    "))"
+)
+
+POSTGRES_CREATE_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    # `unaccent` não é IMMUTABLE, então é encapsulada para poder ser usada em índices de expressão
+    """
+    CREATE OR REPLACE FUNCTION standlivros_unaccent(text) RETURNS text AS
+    $$ SELECT public.unaccent('public.unaccent', $1) $$
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS "ix_StandLivros_search_trgm" ON "StandLivros"
+    USING gin ({POSTGRES_SEARCH_EXPRESSION} gin_trgm_ops)
+    """,
+    # Índices trigram por coluna atendem os filtros `ilike('%...%')` de título, autor e categoria
+    'CREATE INDEX IF NOT EXISTS "ix_StandLivros_book_title_trgm" ON "StandLivros" USING gin (book_title gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "ix_StandLivros_book_author_trgm" ON "StandLivros" USING gin (book_author gin_trgm_ops)',
+    'CREATE INDEX IF NOT EXISTS "ix_StandLivros_book_category_trgm" ON "StandLivros" USING gin (book_category gin_trgm_ops)',
+]
+
+# Cria o índice de busca junto com a tabela `StandLivros` e o remove antes do DROP da tabela
+for statement in SQLITE_CREATE_STATEMENTS:
+    event.listen(Book_Model.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+for statement in POSTGRES_CREATE_STATEMENTS:
+    event.listen(Book_Model.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_DROP_STATEMENTS:
+    event.listen(Book_Model.__table__, "before_drop", DDL(statement).execute_if(dialect="sqlite"))
+
+# Garante o índice de busca em bancos criados antes dele existir. No SQLite, o índice só é preenchido
+# quando é criado; o índice antigo, ligado ao `rowid` implícito de `StandLivros`, é recriado uma vez.
+def ensure_search_index(engine):
+    with engine.begin() as connection:
+        if connection.dialect.name == "sqlite":
+            fts_sql = connection.exec_driver_sql(
+                f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = '{FTS_TABLE}'"
+            ).scalar()
+            if fts_sql is not None and "content='StandLivros'" not in fts_sql:
+                for statement in SQLITE_CREATE_STATEMENTS:
+                    connection.exec_driver_sql(statement)
+                return
+            for statement in SQLITE_DROP_STATEMENTS + SQLITE_CREATE_STATEMENTS + SQLITE_POPULATE_STATEMENTS:
+                connection.exec_driver_sql(statement)
+        elif connection.dialect.name == "postgresql":
+            for statement in POSTGRES_CREATE_STATEMENTS:
+                connection.exec_driver_sql(statement)
+
+# Separa o texto pesquisado em termos, descartando pontuação e operadores da sintaxe de busca
+def search_terms(q: str):
+    return re.findall(r"\w+", q or "")
+
+# Aplica a busca textual `q` à consulta de livros, ordenando pela relevância do resultado
+def apply_search(query, dialect_name: str, terms: list):
+    if dialect_name == "sqlite":
+        fts = table(FTS_TABLE, column("rowid"))
+        fts_ids = table(FTS_IDS_TABLE, column("search_rowid"), column("book_id"))
+        fts_column = literal_column(f'"{FTS_TABLE}"')
+        # Cada termo vira uma busca por prefixo; todos os termos precisam aparecer no livro
+        match_expression = " ".join(f'"{term}"*' for term in terms)
+        return (
+            query.join(fts_ids, fts_ids.c.book_id == Book_Model.book_id)
+            .join(fts, fts.c.rowid == fts_ids.c.search_rowid)
+            .filter(fts_column.op("MATCH")(match_expression))
+            .order_by(func.bm25(fts_column, *FTS_WEIGHTS), Book_Model.book_id)
+        )
+
+    if dialect_name == "postgresql":
+        search_expression = literal_column(POSTGRES_SEARCH_EXPRESSION)
+        for term in terms:
+            query = query.filter(search_expression.like(func.concat("%", func.standlivros_unaccent(term.lower()), "%")))
+        similarity = func.word_similarity(func.standlivros_unaccent(" ".join(terms).lower()), search_expression)
+        return query.order_by(similarity.desc(), Book_Model.book_id)
+
+    # Demais bancos: busca sem índice, apenas para manter o comportamento funcional
+    for term in terms:
+        query = query.filter(
+            Book_Model.book_title.ilike(f"%{term}%")
+            | Book_Model.book_author.ilike(f"%{term}%")
+            | Book_Model.book_category.ilike(f"%{term}%")
+        )
+    return query.order_by(Book_Model.book_id)
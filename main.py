@@ -1,9 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routers.book_routers import book_router
-from db.config import Base, engine
+from routers.book_routers import book_router, book_service
+from routers.job_routers import job_router, job_queue
+from routers.internal_routers import internal_router
+from routers.health_routers import health_router
+from services.compaction import tombstone_compactor
+from services.snapshot import book_snapshot, snapshot_refresher
+from services.startup import start_up, startup_state
+from db.config import engine, async_engine
+from utils.metrics import METRICS_ENABLED, install_metrics
+from utils.profiling import PROFILING_ENABLED, install_profiling
+from utils.openapi import install_openapi_schema
+
+# Ciclo de vida da aplicação: os workers das tarefas em segundo plano iniciam com o servidor (retomando
+# as tarefas pendentes no banco) e terminam as tarefas em execução antes de encerrar. Com a réplica em
+# memória ligada, o atualizador carrega o catálogo e traz as alterações feitas por outros processos.
+# A compactação expurga periodicamente as marcas de remoção vencidas. Antes de tudo, a inicialização
+# migra o esquema (se configurada), aquece os pools e os caches e só então marca o worker como pronto;
+# no encerramento, a prontidão é retirada primeiro para o balanceador parar de enviar requisições, e as
+# conexões dos pools são fechadas por último.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_up(startup_state, book_service, snapshot=book_snapshot)
+    job_queue.start()
+    if snapshot_refresher is not None:
+        snapshot_refresher.start()
+    if tombstone_compactor is not None:
+        tombstone_compactor.start()
+    yield
+    startup_state.ready = False
+    if tombstone_compactor is not None:
+        tombstone_compactor.stop()
+    if snapshot_refresher is not None:
+        snapshot_refresher.stop()
+    job_queue.stop()
+    # Fecha as conexões dos pools (abertas no aquecimento), sem esperar o coletor de lixo
+    await async_engine.dispose()
+    engine.dispose()
 
 # Criação da aplicação FastAPI com parâmetros de documentação da API Swagger
 app = FastAPI (
+    lifespan=lifespan,
     title="Documentação StandLivros",
     version="1.0",
     description="""
@@ -21,6 +58,7 @@ app = FastAPI (
         - Criar livros: Permite criar um ou mais livros no sistema.
         - Atualizar ou Criar livros: Atualiza as informações de um livro existente ou cria um novo livro se não houver correspondente.
         - Deletar livros: Permite a exclusão de um livro existente baseado no ID.
+        - Tarefas em segundo plano: Executa criações e atualizações de livros em lote fora da requisição, com progresso consultável.
         
         Para mais informações, consulte a documentação completa abaixo.
     """,
@@ -34,12 +72,32 @@ app = FastAPI (
 # Roteadores definidos no módulo `book_routers`
 app.include_router(book_router)
 
-# Criar as tabelas no banco de dados se ainda não existirem
-Base.metadata.create_all(bind=engine)
+# Tarefas em segundo plano (`POST /jobs` e `GET /jobs/{job_id}`)
+app.include_router(job_router)
+
+# Sondas de saúde (`GET /health/live` e `GET /health/ready`)
+app.include_router(health_router)
+
+# Endpoints internos de operação (métricas do cache e do pool de conexões)
+app.include_router(internal_router)
+
+# Esquema OpenAPI servido do arquivo gerado no build, quando `OPENAPI_SCHEMA_FILE` aponta para ele
+install_openapi_schema(app)
+
+# Métricas no formato Prometheus em `GET /metrics` (latência por rota, banco, cache e listagens)
+if METRICS_ENABLED:
+    from routers.metrics_routers import metrics_router
+
+    app.include_router(metrics_router)
+    install_metrics(app, [engine, async_engine])
+
+# Instrumentação opcional: tempos por etapa no cabeçalho `Server-Timing` e profiler `?__profile=1`
+if PROFILING_ENABLED:
+    install_profiling(app, [engine, async_engine])
 
 # Iniciar servidor FastAPI usando Uvicorn
 if __name__ == '__main__':
     import uvicorn
 
-    # Configuração do servidor para rodar localmente
+    # Configuração do servidor para rodar localmente, com recarga automática (em produção, use `server.py`)
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,16 +1,94 @@
-from fastapi import APIRouter, Depends, status, HTTPException
-from sqlalchemy.orm import Session
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from services.book_service import BookService
-from db.book_schemas import BookModel, BookListResponse, ErrorResponse
-from typing import List, Optional
-from db.config import get_db
+from services.async_book_service import AsyncBookService
+from services.book_loader import BOOK_LOADER_ENABLED, BookLoader
+from services.book_service import BookService, DEFAULT_CHANGES_LIMIT, DEFAULT_FACET_LIMIT, DEFAULT_PAGE_SIZE, validate_price_range
+from services.change_feed import ChangeBroadcaster
+from services.cache import book_cache
+from services.snapshot import book_snapshot
+from db.book_schemas import BookModel, BookBatchRequest, BookBatchResponse, BookChangesResponse, BookFacetsResponse, BookImportResponse, BookListResponse, ErrorResponse, PriceAdjustment, PriceAdjustmentResponse
+from db.facets import FACETS_SUMMARY_ENABLED
+from typing import List, Literal, Optional
+from db.config import get_async_db, AsyncSessionLocal
+from utils.exporting import EXPORT_FORMATS, export_chunks
+from utils.importing import ImportFormatError, import_format, iter_import_records
+from utils.serialization import FastJSONResponse, dumps
+from utils.singleflight import SINGLE_FLIGHT_ENABLED, SingleFlight
+from utils.profiling import profile_stage
+from utils.conditional import book_etag, listing_etag, http_date, not_modified, parse_if_match
+from utils.openapi import DocumentedRoute
 
-# Instância dos serviços responsáveis por gerenciar os livros
-book_service = BookService()
+# Tamanho máximo de página aceito na listagem de livros
+MAX_PAGE_SIZE = 1000
+
+# Quantidade máxima de alterações por página em `GET /books/changes`
+MAX_CHANGES_LIMIT = 10000
+
+# Instância dos serviços responsáveis por gerenciar os livros, com o cache de leitura e a réplica em memória compartilhados
+book_service = AsyncBookService(BookService(cache=book_cache, facet_summary=FACETS_SUMMARY_ENABLED, snapshot=book_snapshot))
+
+# Agrupa as buscas concorrentes de `GET /books/{book_id}` em uma única consulta
+book_loader = BookLoader(book_service) if BOOK_LOADER_ENABLED else None
+
+# Uma única leitura periódica do registro de alterações alimenta todos os streams SSE do processo
+change_broadcaster = ChangeBroadcaster(book_service)
+
+# Requisições idênticas e simultâneas de listagens e facetas compartilham a consulta e a resposta serializada
+listing_flights = SingleFlight() if SINGLE_FLIGHT_ENABLED else None
 
 # Roteador principal para gerenciar endpoints relacionados aos livros
-book_router = APIRouter()
+book_router = APIRouter(route_class=DocumentedRoute)
+
+# Documentação das respostas condicionais comuns aos endpoints de livros
+NOT_MODIFIED_RESPONSE = {
+    "description": "A representação não mudou desde o ETag (If-None-Match) ou a data (If-Modified-Since) informados."
+}
+PRECONDITION_FAILED_RESPONSE = {
+    "description": "O livro foi alterado por outra requisição: o If-Match não corresponde à versão atual.",
+    "model": ErrorResponse,
+    "content": {
+        "application/json": {
+            "example": {"detail": "Pré-condição falhou: o livro foi alterado por outra requisição (If-Match)"}
+        }
+    }
+}
+
+GATEWAY_TIMEOUT_RESPONSE = {
+    "description": "A requisição idêntica em andamento não terminou dentro do tempo de espera.",
+    "model": ErrorResponse,
+    "content": {
+        "application/json": {
+            "example": {"detail": "Tempo esgotado aguardando uma consulta idêntica em andamento"}
+        }
+    }
+}
+
+# Resposta JSON gerada por `load()` (bytes já serializados). O ETag identifica a versão do catálogo e os
+# parâmetros normalizados, então é a chave do agrupamento de requisições idênticas simultâneas.
+async def _shared_json_response(etag: str, headers: dict, load):
+    if listing_flights is None:
+        body = await load()
+    else:
+        try:
+            body = await listing_flights.do(etag, load)
+        except TimeoutError:
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Tempo esgotado aguardando uma consulta idêntica em andamento"
+            )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Serializa o conteúdo JSON, medido como a etapa `serialize` do perfil
+def _serialize(content) -> bytes:
+    with profile_stage("serialize"):
+        return dumps(content)
+
+# Cabeçalhos de validação do cache HTTP; `no-cache` faz clientes e CDN revalidarem com o ETag
+def _validator_headers(etag: str, last_modified: datetime):
+    return {"ETag": etag, "Last-Modified": http_date(last_modified), "Cache-Control": "no-cache"}
 
 # Rota raiz da aplicação que retorna uma mensagem de boas-vindas
 @book_router.get("/",
@@ -24,11 +102,42 @@ async def root():
 @book_router.get(
     "/books",  
     status_code=status.HTTP_200_OK,
-    description="Retorna os livros disponíveis na StandLivros.",
+    description=(
+        "Retorna os livros disponíveis na StandLivros, paginados por cursor ou em streaming NDJSON. "
+        "Com `updated_since`, retorna apenas os livros alterados ou removidos a partir dessa data, em ordem de "
+        "alteração, com `versao`, `atualizado_em` e `removido_em` (preenchido nos removidos)."
+    ),
     summary="Retorna os livros.",
     response_description="Livros encontrados",
     response_model= BookListResponse,
     responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {
+                    "example": '{"id": "1", "titulo": "Neuromancer", "autor": "William Gibson", "categoria": "Ficção Científica", "valor": 48.9}'
+                }
+            }
+        },
+        304: NOT_MODIFIED_RESPONSE,
+        504: GATEWAY_TIMEOUT_RESPONSE,
+        410: {
+            "description": "`updated_since` é anterior à retenção das remoções: o cliente deve baixar o catálogo completo.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "`updated_since` é anterior à retenção das remoções (30 dias); sincronize o catálogo completo"}
+                }
+            }
+        },
+        400: {
+            "description": "Cursor de paginação inválido, faixa de valor vazia ou combinação de parâmetros não suportada.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Cursor de paginação inválido"}
+                }
+            }
+        },
         404: {
             "description": "Nenhum livro encontrado.",
             "model": ErrorResponse,
@@ -50,21 +159,365 @@ async def root():
     }
 )
 async def get_books(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     titulo: Optional[str] = None,
     autor: Optional[str] = None,
-    categoria: Optional[str] = None
+    categoria: Optional[str] = None,
+    categoria_exata: Optional[str] = Query(None, description="Filtra pela categoria exata (diferencia maiúsculas e acentos)"),
+    valor_min: Optional[float] = Query(None, ge=0, description="Valor mínimo do livro (inclusive)"),
+    valor_max: Optional[float] = Query(None, ge=0, description="Valor máximo do livro (inclusive)"),
+    sort: Optional[Literal["titulo", "autor", "valor"]] = Query(None, description="Coluna de ordenação; sem `sort`, a ordem é a do id"),
+    order: Literal["asc", "desc"] = Query("asc", description="Direção da ordenação"),
+    q: Optional[str] = Query(None, description="Busca textual por título, autor e categoria, sem diferenciar acentos, ordenada por relevância"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Quantidade máxima de livros por página"),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em `next_cursor` pela página anterior"),
+    stream: bool = Query(False, description="Retorna todos os livros filtrados em NDJSON, um livro por linha"),
+    updated_since: Optional[datetime] = Query(None, description="Sincronização incremental: livros alterados ou removidos a partir desta data (ISO 8601), inclusive"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
 ):
     try:
-        book_list = book_service.list_books(db, titulo=titulo, autor=autor, categoria=categoria)
-        return {"success": "Livros disponiveis na StandLivros", "data": book_list}
+        if q is not None and (stream or cursor or sort):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A busca textual `q` não suporta `stream`, `cursor` nem `sort`"
+            )
+        validate_price_range(valor_min, valor_max)
+
+        filters = dict(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        )
+        if updated_since is not None:
+            if q is not None or stream or sort or any(value is not None for value in filters.values()):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="`updated_since` não suporta filtros, `q`, `stream` nem `sort`"
+                )
+            return await _books_since_response(db, updated_since, limit, cursor, if_none_match, if_modified_since)
+        if stream:
+            return await _stream_books_response(**filters, cursor=cursor, sort=sort, order=order)
+
+        # O ETag da listagem vem do contador de alterações do catálogo: se o cliente já possui essa
+        # versão, responde 304 sem consultar nem serializar os livros
+        change_counter, catalog_updated_at = await book_service.get_catalog_version(db)
+        headers = _validator_headers(
+            listing_etag(change_counter, **filters, q=q, limit=limit, cursor=cursor, sort=sort, order=order),
+            catalog_updated_at
+        )
+        if not_modified(if_none_match, if_modified_since, headers["ETag"], catalog_updated_at):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        async def load_listing():
+            if q is not None:
+                book_list = await book_service.search_books(db, q, **filters, limit=limit, catalog_version=change_counter)
+                next_cursor = None
+            else:
+                book_list, next_cursor = await book_service.list_books_page(
+                    db, **filters, limit=limit, cursor=cursor, sort=sort, order=order, catalog_version=change_counter
+                )
+
+            # Os livros já estão no formato do `BookListResponse`: a resposta é serializada direto em bytes
+            return _serialize({"success": "Livros disponiveis na StandLivros", "data": book_list, "next_cursor": next_cursor})
+
+        return await _shared_json_response(headers["ETag"], headers, load_listing)
+    except HTTPException as error:
+        raise error
     except Exception as error:
         # Captura erros gerais e retorna uma resposta 500 (erro interno)
         raise HTTPException (
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Erro ao listar livros: {error}"
         )
+
+# Página da sincronização incremental, com o mesmo ETag por versão do catálogo das listagens
+async def _books_since_response(db: AsyncSession, updated_since: datetime, limit: int, cursor: str, if_none_match: str, if_modified_since: str):
+    change_counter, catalog_updated_at = await book_service.get_catalog_version(db)
+    headers = _validator_headers(
+        listing_etag(change_counter, updated_since=updated_since.isoformat(), limit=limit, cursor=cursor),
+        catalog_updated_at
+    )
+    if not_modified(if_none_match, if_modified_since, headers["ETag"], catalog_updated_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    async def load_changes():
+        book_list, next_cursor = await book_service.list_books_since(
+            db, updated_since, limit=limit, cursor=cursor, catalog_version=change_counter
+        )
+        return _serialize({"success": "Livros alterados na StandLivros", "data": book_list, "next_cursor": next_cursor})
+
+    return await _shared_json_response(headers["ETag"], headers, load_changes)
+
+# Gera a resposta NDJSON com uma sessão própria, que permanece aberta enquanto os livros são enviados
+async def _stream_books_response(cursor: str = None, sort: str = None, order: str = "asc", **filters):
+    db = AsyncSessionLocal()
+    try:
+        books = await book_service.stream_books(db, **filters, cursor=cursor, sort=sort, order=order)
+    except Exception:
+        await db.close()
+        raise
+
+    async def ndjson_lines():
+        try:
+            async for book in books:
+                yield dumps(book) + b"\n"
+        finally:
+            await db.close()
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
     
+# Endpoint com as facetas dos livros; declarado antes de `/books/{book_id}` para não ser tratado como um ID
+@book_router.get(
+    "/books/facets",
+    status_code=status.HTTP_200_OK,
+    description="Retorna a quantidade de livros por categoria e por autor, além do mínimo, máximo, média e faixas de valor, com os mesmos filtros da listagem.",
+    summary="Retorna as facetas dos livros.",
+    response_description="Facetas dos livros encontrados",
+    response_model=BookFacetsResponse,
+    responses={
+        304: NOT_MODIFIED_RESPONSE,
+        504: GATEWAY_TIMEOUT_RESPONSE,
+        400: {
+            "description": "Faixa de valor vazia.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "`valor_min` não pode ser maior que `valor_max`"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao calcular facetas: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def get_book_facets(
+    db: AsyncSession = Depends(get_async_db),
+    titulo: Optional[str] = None,
+    autor: Optional[str] = None,
+    categoria: Optional[str] = None,
+    categoria_exata: Optional[str] = Query(None, description="Filtra pela categoria exata (diferencia maiúsculas e acentos)"),
+    valor_min: Optional[float] = Query(None, ge=0, description="Valor mínimo do livro (inclusive)"),
+    valor_max: Optional[float] = Query(None, ge=0, description="Valor máximo do livro (inclusive)"),
+    limit: int = Query(DEFAULT_FACET_LIMIT, ge=1, le=MAX_PAGE_SIZE, description="Quantidade máxima de categorias e de autores retornados"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
+    try:
+        validate_price_range(valor_min, valor_max)
+        filters = dict(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        )
+
+        change_counter, catalog_updated_at = await book_service.get_catalog_version(db)
+        headers = _validator_headers(
+            listing_etag(change_counter, facets=True, **filters, limit=limit),
+            catalog_updated_at
+        )
+        if not_modified(if_none_match, if_modified_since, headers["ETag"], catalog_updated_at):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        async def load_facets():
+            facets = await book_service.get_facets(db, **filters, limit=limit, catalog_version=change_counter)
+            return _serialize({"success": "Facetas dos livros na StandLivros", "data": facets})
+
+        return await _shared_json_response(headers["ETag"], headers, load_facets)
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao calcular facetas: {error}"
+        )
+
+# Endpoint de exportação do catálogo completo (ou filtrado) em streaming, para cargas em lote
+@book_router.get(
+    "/books/export",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Exporta os livros filtrados em NDJSON (um livro por linha), CSV (com cabeçalho, no formato aceito por "
+        "`POST /books/import`) ou colunar (uma linha JSON por bloco, com uma lista de valores por coluna). "
+        "Os livros são lidos do banco em blocos e enviados conforme são lidos, com memória constante; "
+        "com `gzip=true` cada bloco é comprimido antes do envio (`Content-Encoding: gzip`)."
+    ),
+    summary="Exporta os livros em streaming",
+    response_description="Arquivo com os livros exportados",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "application/x-ndjson": {"example": '{"id":"1","titulo":"Neuromancer","autor":"William Gibson","categoria":"Ficção Científica","valor":48.9}\n'},
+                "text/csv": {"example": "id,titulo,autor,categoria,valor\n1,Neuromancer,William Gibson,Ficção Científica,48.9\n"},
+            }
+        },
+        400: {
+            "description": "Faixa de valor vazia.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "`valor_min` não pode ser maior que `valor_max`"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao exportar livros: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def export_books(
+    titulo: Optional[str] = None,
+    autor: Optional[str] = None,
+    categoria: Optional[str] = None,
+    categoria_exata: Optional[str] = Query(None, description="Filtra pela categoria exata (diferencia maiúsculas e acentos)"),
+    valor_min: Optional[float] = Query(None, ge=0, description="Valor mínimo do livro (inclusive)"),
+    valor_max: Optional[float] = Query(None, ge=0, description="Valor máximo do livro (inclusive)"),
+    format: Literal["ndjson", "csv", "columnar"] = Query("ndjson", description="Formato do arquivo exportado"),
+    gzip: bool = Query(False, description="Comprime a resposta com gzip, bloco a bloco")
+):
+    try:
+        validate_price_range(valor_min, valor_max)
+        return await _export_books_response(
+            format, gzip,
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        )
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao exportar livros: {error}"
+        )
+
+# Gera a resposta da exportação com uma sessão própria, que permanece aberta enquanto os blocos são enviados
+async def _export_books_response(format: str, compress: bool, **filters):
+    db = AsyncSessionLocal()
+    try:
+        batches = await book_service.export_books(db, **filters)
+    except Exception:
+        await db.close()
+        raise
+
+    async def chunks():
+        try:
+            async for chunk in export_chunks(format, batches, compress=compress):
+                yield chunk
+        finally:
+            await db.close()
+
+    media_type, extension = EXPORT_FORMATS[format]
+    headers = {"Content-Disposition": f'attachment; filename="livros.{extension}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
+
+# Endpoint de sincronização incremental: as alterações do catálogo depois de uma sequência
+@book_router.get(
+    "/books/changes",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Retorna as alterações do catálogo (livros criados, alterados e removidos) com sequência maior que `since`, "
+        "em ordem, com o estado atual de cada livro. Guarde `next` e use-o como `since` na próxima chamada "
+        "para receber apenas o que mudou, em vez de listar o catálogo inteiro."
+    ),
+    summary="Retorna as alterações do catálogo",
+    response_description="Alterações do catálogo",
+    response_model=BookChangesResponse,
+    responses={
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao listar alterações: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def get_book_changes(
+    db: AsyncSession = Depends(get_async_db),
+    since: int = Query(0, ge=0, description="Sequência da última alteração já recebida (`next` da chamada anterior)"),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT, description="Quantidade máxima de alterações")
+):
+    try:
+        changes, next_seq, has_more = await book_service.get_changes(db, since=since, limit=limit)
+        return FastJSONResponse({"success": "Alterações do catálogo", "data": changes, "next": next_seq, "has_more": has_more})
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao listar alterações: {error}"
+        )
+
+# Endpoint com as alterações do catálogo em tempo real (Server-Sent Events)
+@book_router.get(
+    "/books/changes/stream",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Stream SSE com um evento `change` por alteração do catálogo, no formato de `GET /books/changes`, com a "
+        "sequência no `id` do evento. Sem `since`, envia apenas as alterações novas; ao reconectar, o cabeçalho "
+        "`Last-Event-ID` retoma a partir do último evento recebido."
+    ),
+    summary="Stream das alterações do catálogo",
+    response_description="Eventos SSE das alterações",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                "text/event-stream": {
+                    "example": 'id: 42\nevent: change\ndata: {"seq":42,"tipo":"delete","id":"1","versao":17,"alterado_em":"2024-05-01T12:00:00+00:00","livro":null}\n\n'
+                }
+            }
+        },
+        400: {
+            "description": "Cabeçalho `Last-Event-ID` inválido.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "O cabeçalho Last-Event-ID deve ser a sequência de uma alteração"}
+                }
+            }
+        },
+    }
+)
+async def stream_book_changes(
+    since: Optional[int] = Query(None, ge=0, description="Envia também as alterações com sequência maior que `since`"),
+    last_event_id: Optional[str] = Header(None)
+):
+    if last_event_id is not None:
+        try:
+            since = int(last_event_id)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O cabeçalho Last-Event-ID deve ser a sequência de uma alteração"
+            )
+
+    # `X-Accel-Buffering` evita que um proxy nginx segure os eventos no buffer
+    return StreamingResponse(
+        change_broadcaster.events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Endpoint para adicionar um ou mais novos livros
 @book_router.post(
     "/books", 
@@ -94,9 +547,9 @@ async def get_books(
         },
     }
 )
-async def create_book(books: List[BookModel], db: Session = Depends(get_db)):
+async def create_book(books: List[BookModel], db: AsyncSession = Depends(get_async_db)):
     try:
-        created_books = book_service.create_book(db, [book.model_dump() for book in books])
+        created_books = await book_service.create_book(db, [book.model_dump() for book in books])
         return {"success": "Livros criados com sucesso", "data": created_books}
     except HTTPException as error:
         raise error
@@ -106,14 +559,136 @@ async def create_book(books: List[BookModel], db: Session = Depends(get_db)):
             detail=f"Erro ao criar livros: {error}"
         )
 
+# Endpoint para buscar vários livros pelos ids em uma única requisição
+@book_router.post(
+    "/books/batch-get",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Busca até 5000 livros pelos ids com consultas `IN` em blocos, em vez de uma requisição por livro. "
+        "Os livros voltam na ordem dos ids pedidos (sem repetições) e os ids não encontrados ficam em `missing`."
+    ),
+    summary="Busca vários livros pelos IDs",
+    response_description="Livros encontrados",
+    response_model=BookBatchResponse,
+    responses={
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao buscar livros: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def get_books_by_ids(request: BookBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        books, missing = await book_service.get_books(db, request.ids)
+        return FastJSONResponse({"success": "Livros encontrados", "data": books, "missing": missing})
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao buscar livros: {error}"
+        )
+
+# Endpoint para importar um catálogo em CSV ou NDJSON, lido do corpo da requisição em blocos
+@book_router.post(
+    "/books/import",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Importa livros de um arquivo CSV (cabeçalho com titulo, autor, categoria, valor e, opcionalmente, id) "
+        "ou NDJSON (um livro por linha). O arquivo é lido e gravado em lotes, com memória constante. "
+        "Linhas inválidas ou em conflito são relatadas sem interromper a importação, exceto com `strict=true`, "
+        "quando o primeiro erro desfaz toda a importação."
+    ),
+    summary="Importa livros em lote",
+    response_description="Resultado da importação",
+    response_model=BookImportResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}, "example": "titulo,autor,categoria,valor\nNeuromancer,William Gibson,Ficção Científica,48.9\n"},
+                "application/x-ndjson": {"schema": {"type": "string"}, "example": '{"titulo": "Neuromancer", "autor": "William Gibson", "categoria": "Ficção Científica", "valor": 48.9}\n'},
+            }
+        }
+    },
+    responses={
+        400: {
+            "description": "Formato do arquivo inválido (codificação, cabeçalho CSV ou linha longa demais).",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Cabeçalho CSV sem as colunas obrigatórias: valor (0 livros importados antes do erro)"}
+                }
+            }
+        },
+        422: {
+            "description": "Modo estrito: um livro inválido ou em conflito desfez a importação.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Importação desfeita (modo estrito): linha 3: valor: Input should be a valid number"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao importar livros: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def import_books(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Formato do arquivo; sem ele, vem do Content-Type"),
+    strict: bool = Query(False, description="Desfaz toda a importação no primeiro erro")
+):
+    try:
+        records = iter_import_records(import_format(request.headers.get("content-type"), format), request.stream())
+        result = await book_service.import_books(db, records, strict=strict)
+        return {"success": "Importação concluída", "data": result}
+    except ImportFormatError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error)
+        )
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao importar livros: {error}"
+        )
+
 # Endpoint para atualizar ou criar um livro
 @book_router.put("/books",
     status_code=status.HTTP_200_OK,
-    description="Atualiza as informações do livro ou caso ele não existir, cria um novo com as informações",
+    description="Atualiza as informações do livro ou caso ele não existir, cria um novo com as informações (usando o id informado, se houver)",
     summary="Atualiza ou Cria um livro",
     response_description="O livro foi atualizado",
     response_model= BookListResponse,
     responses={
+        409: {
+            "description": "Já existe outro livro com o mesmo título e categoria",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Conflito: o livro já existe na StandLivros"}
+                }
+            }
+        },
+        412: PRECONDITION_FAILED_RESPONSE,
         500: {
             "description": "Erro interno do servidor.",
             "model": ErrorResponse,
@@ -125,10 +700,16 @@ async def create_book(books: List[BookModel], db: Session = Depends(get_db)):
         }
     }
 )
-async def put_or_create_book(book: BookModel, db: Session = Depends(get_db)):
+async def put_or_create_book(
+    book: BookModel,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_match: Optional[str] = Header(None, description="ETag do livro: só atualiza se a versão atual corresponder")
+):
     try:
-        updated_book = book_service.update_book(db, book.model_dump())
-        return {"success": "Livro criado ou atualizado com sucesso", "data": [updated_book]}
+        entry = await book_service.upsert_book(db, book.model_dump(), if_match=parse_if_match(if_match))
+        response.headers["ETag"] = book_etag(entry["version"])
+        return {"success": "Livro criado ou atualizado com sucesso", "data": [entry["book"]]}
     except HTTPException as error:
         raise error
     except Exception as error:
@@ -137,6 +718,107 @@ async def put_or_create_book(book: BookModel, db: Session = Depends(get_db)):
             detail=f"Erro ao atualizar ou criar livros: {error}"
         )
 
+# Endpoint para atualizar ou criar vários livros em um único comando
+@book_router.put("/books/bulk",
+    status_code=status.HTTP_200_OK,
+    description="Atualiza ou cria uma lista de livros com um único INSERT ... ON CONFLICT DO UPDATE, mantendo a ordem enviada",
+    summary="Atualiza ou Cria livros em lote",
+    response_description="Os livros foram atualizados",
+    response_model= BookListResponse,
+    responses={
+        400: {
+            "description": "O mesmo id aparece mais de uma vez no lote.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "O mesmo id de livro aparece mais de uma vez no lote"}
+                }
+            }
+        },
+        409: {
+            "description": "Já existe outro livro com o mesmo título e categoria",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Conflito: um ou mais livros já existem na StandLivros com o mesmo título e categoria"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao atualizar ou criar livros: erro inesperado"}
+                }
+            }
+        }
+    }
+)
+async def put_or_create_books(books: List[BookModel], db: AsyncSession = Depends(get_async_db)):
+    try:
+        updated_books = await book_service.update_books(db, [book.model_dump() for book in books])
+        return {"success": "Livros criados ou atualizados com sucesso", "data": updated_books}
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao atualizar ou criar livros: {error}"
+        )
+
+# Endpoint para reajustar o valor de vários livros com um único comando no banco
+@book_router.patch(
+    "/books/prices",
+    status_code=status.HTTP_200_OK,
+    description=(
+        "Reajusta o valor de todos os livros que atendem ao filtro (mesmos campos da listagem, além de `ids`) com um "
+        "único UPDATE: `set` define o valor, `percent` aplica um percentual, `add` soma um valor e `round` leva ao "
+        "valor mais próximo terminado nos centavos informados (ex.: 0.90). Com `dry_run=true`, apenas conta os livros afetados."
+    ),
+    summary="Reajusta valores em massa",
+    response_description="Livros reajustados",
+    response_model=PriceAdjustmentResponse,
+    responses={
+        400: {
+            "description": "Filtro vazio, faixa de valor vazia ou valor inválido para a operação.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Informe ao menos um filtro para o reajuste de valores"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao reajustar valores: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def adjust_prices(
+    adjustment: PriceAdjustment,
+    db: AsyncSession = Depends(get_async_db),
+    dry_run: bool = Query(False, description="Apenas conta os livros que seriam reajustados")
+):
+    try:
+        result = await book_service.adjust_prices(
+            db, adjustment.operacao, adjustment.valor, dry_run=dry_run, **adjustment.filtro.model_dump()
+        )
+        message = "Livros que seriam reajustados" if dry_run else "Valores reajustados com sucesso"
+        return {"success": message, "data": result}
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao reajustar valores: {error}"
+        )
+
 # Endpoint para buscar detalhes de um livro específico pelo seu ID
 @book_router.get("/books/{book_id}",
     status_code=status.HTTP_200_OK,
@@ -145,6 +827,7 @@ async def put_or_create_book(book: BookModel, db: Session = Depends(get_db)):
     response_description="O livro foi encontrado",
     response_model= BookListResponse,
     responses={
+        304: NOT_MODIFIED_RESPONSE,
         404: {
             "description": "Nenhum livro encontrado com id.",
             "model": ErrorResponse,
@@ -165,10 +848,24 @@ async def put_or_create_book(book: BookModel, db: Session = Depends(get_db)):
         },
     }
 )
-async def get_book_by_id(book_id: str, db: Session = Depends(get_db)):
+async def get_book_by_id(
+    book_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None)
+):
     try:
-        book = book_service.get_book(db, book_id)
-        return {"success": "Livro encontrado", "data": [book]}
+        if book_loader is not None:
+            entry = await book_loader.load(book_id)
+        else:
+            entry = await book_service.get_book_entry(db, book_id)
+        updated_at = datetime.fromisoformat(entry["updated_at"])
+        headers = _validator_headers(book_etag(entry["version"]), updated_at)
+
+        if not_modified(if_none_match, if_modified_since, headers["ETag"], updated_at):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return FastJSONResponse({"success": "Livro encontrado", "data": [entry["book"]]}, headers=headers)
     except HTTPException as error:
         raise error
     except Exception as error:
@@ -195,6 +892,7 @@ async def get_book_by_id(book_id: str, db: Session = Depends(get_db)):
                 }
             }
         },
+        412: PRECONDITION_FAILED_RESPONSE,
         500: {
             "description": "Erro interno do servidor.",
             "model": ErrorResponse,
@@ -206,9 +904,13 @@ async def get_book_by_id(book_id: str, db: Session = Depends(get_db)):
         },
     }
 )
-async def delete_book_by_id(book_id: str, db: Session = Depends(get_db)):
+async def delete_book_by_id(
+    book_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    if_match: Optional[str] = Header(None, description="ETag do livro: só remove se a versão atual corresponder")
+):
     try:
-        book_service.delete_book(db, book_id)
+        await book_service.delete_book(db, book_id, if_match=parse_if_match(if_match))
         return {"success": "Livro deletado", "data": []}
     except HTTPException as error:
         raise error
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from services.startup import ping_database, startup_state
+from utils.openapi import DocumentedRoute
+
+# Roteador das sondas de saúde usadas pelo orquestrador (Docker, Kubernetes, balanceador)
+health_router = APIRouter(prefix="/health", route_class=DocumentedRoute)
+
+# Liveness: o processo responde; não consulta o banco, para um banco fora do ar não reiniciar os workers
+@health_router.get("/live", status_code=status.HTTP_200_OK)
+async def liveness():
+    return {"status": "ok"}
+
+# Readiness: a inicialização terminou e o banco responde; caso contrário 503, e o worker não recebe tráfego
+@health_router.get(
+    "/ready",
+    status_code=status.HTTP_200_OK,
+    responses={503: {"description": "Inicialização em andamento, encerramento em andamento ou banco indisponível"}}
+)
+async def readiness():
+    if not startup_state.ready:
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "starting", **startup_state.stats()})
+    try:
+        await ping_database()
+    except Exception as error:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", **startup_state.stats(), "database": f"{type(error).__name__}: {error}"}
+        )
+    return {"status": "ready", **startup_state.stats()}
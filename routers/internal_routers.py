@@ -0,0 +1,45 @@
+from fastapi import APIRouter, status
+from db.config import POOL_SETTINGS, STATEMENT_TIMEOUT_MS
+from db.pool_metrics import async_pool_metrics, sync_pool_metrics
+from routers.book_routers import change_broadcaster
+from services.cache import book_cache
+from services.compaction import tombstone_compactor
+from services.snapshot import book_snapshot, snapshot_refresher
+
+# Roteador com endpoints internos de operação, fora da documentação pública da API
+internal_router = APIRouter(prefix="/internal", include_in_schema=False)
+
+# Endpoint com os contadores de acertos e falhas do cache de leitura dos livros
+@internal_router.get("/cache", status_code=status.HTTP_200_OK)
+async def cache_stats():
+    if book_cache is None:
+        return {"backend": "none"}
+    return book_cache.stats()
+
+# Endpoint com o estado da réplica do catálogo em memória (livros carregados e última alteração aplicada)
+@internal_router.get("/snapshot", status_code=status.HTTP_200_OK)
+async def snapshot_stats():
+    if book_snapshot is None:
+        return {"enabled": False}
+    return {"enabled": True, **book_snapshot.stats(), "refresh_errors": snapshot_refresher.errors}
+
+# Endpoint com os assinantes dos streams de alterações e a última sequência difundida
+@internal_router.get("/changes", status_code=status.HTTP_200_OK)
+async def change_feed_stats():
+    return change_broadcaster.stats()
+
+# Endpoint com as marcas de remoção expurgadas pela compactação
+@internal_router.get("/compaction", status_code=status.HTTP_200_OK)
+async def compaction_stats():
+    if tombstone_compactor is None:
+        return {"enabled": False}
+    return {"enabled": True, **tombstone_compactor.stats()}
+
+# Endpoint com a configuração e as métricas dos pools de conexões (espera no checkout, uso, overflow e timeouts)
+@internal_router.get("/pool", status_code=status.HTTP_200_OK)
+async def pool_stats():
+    return {
+        "settings": {**POOL_SETTINGS, "statement_timeout_ms": STATEMENT_TIMEOUT_MS},
+        "async": async_pool_metrics.snapshot(),
+        "sync": sync_pool_metrics.snapshot()
+    }
@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Response, status, HTTPException
+from starlette.concurrency import run_in_threadpool
+from db.book_schemas import ErrorResponse, JobRequest, JobResponse
+from db.facets import FACETS_SUMMARY_ENABLED
+from services.book_service import BookService
+from services.cache import book_cache
+from services.snapshot import book_snapshot
+from services.jobs import JOB_OPERATIONS, JobQueue
+from utils.openapi import DocumentedRoute
+
+# Fila de tarefas em segundo plano, com o mesmo cache de leitura e a mesma réplica dos endpoints de livros
+job_queue = JobQueue(BookService(cache=book_cache, facet_summary=FACETS_SUMMARY_ENABLED, snapshot=book_snapshot))
+
+# Roteador dos endpoints de tarefas em segundo plano
+job_router = APIRouter(route_class=DocumentedRoute)
+
+# Endpoint para enviar uma operação longa do catálogo para execução em segundo plano
+@job_router.post(
+    "/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    description=(
+        "Grava a operação como uma tarefa e responde imediatamente com o id; o andamento e o resultado ficam em "
+        f"`GET /jobs/{{job_id}}`. Operações: {', '.join(sorted(JOB_OPERATIONS))} (dados: lista de livros, ou o corpo do `PATCH /books/prices` em `adjust_prices`)."
+    ),
+    summary="Envia uma tarefa em segundo plano",
+    response_description="Tarefa criada",
+    response_model=JobResponse,
+    responses={
+        400: {
+            "description": "Reajuste de valores inválido em `adjust_prices`, como no `PATCH /books/prices`.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "`valor_min` não pode ser maior que `valor_max`"}
+                }
+            }
+        },
+        422: {
+            "description": "Operação desconhecida ou dados inválidos.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Operação desconhecida: 'drop_books'. Operações aceitas: create_books, update_books"}
+                }
+            }
+        },
+        503: {
+            "description": "Fila de tarefas cheia; tente novamente após o `Retry-After`.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Fila de tarefas cheia (100 pendentes); tente novamente mais tarde"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao criar tarefa: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def submit_job(job: JobRequest, response: Response):
+    try:
+        created_job = await run_in_threadpool(job_queue.submit, job.operacao, job.dados)
+        response.headers["Location"] = f"/jobs/{created_job['id']}"
+        return {"success": "Tarefa criada", "data": created_job}
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao criar tarefa: {error}"
+        )
+
+# Endpoint com o estado, o progresso e o resultado de uma tarefa
+@job_router.get(
+    "/jobs/{job_id}",
+    status_code=status.HTTP_200_OK,
+    description="Retorna o estado (pendente, executando, concluido ou falhou), o progresso e o resultado da tarefa.",
+    summary="Consulta uma tarefa",
+    response_description="Tarefa encontrada",
+    response_model=JobResponse,
+    responses={
+        404: {
+            "description": "Tarefa não encontrada.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Nenhuma tarefa encontrada com o id fornecido"}
+                }
+            }
+        },
+        500: {
+            "description": "Erro interno do servidor.",
+            "model": ErrorResponse,
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Erro ao consultar tarefa: erro inesperado"}
+                }
+            }
+        },
+    }
+)
+async def get_job(job_id: str):
+    try:
+        job = await run_in_threadpool(job_queue.get, job_id)
+        return {"success": "Tarefa encontrada", "data": job}
+    except HTTPException as error:
+        raise error
+    except Exception as error:
+        # Captura erros gerais e retorna uma resposta 500 (erro interno)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erro ao consultar tarefa: {error}"
+        )
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+from utils.metrics import render_metrics
+
+# Roteador do endpoint de métricas, fora da documentação pública da API
+metrics_router = APIRouter(include_in_schema=False)
+
+# Endpoint com as métricas da aplicação no formato texto do Prometheus
+@metrics_router.get("/metrics")
+async def metrics():
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
@@ -0,0 +1,50 @@
+import glob
+import os
+import uvicorn
+from db.config import engine, ensure_shared_database
+from db.migrations import migrate
+
+# Ponto de entrada de produção: migra o esquema uma única vez e inicia `WEB_CONCURRENCY` workers do
+# Uvicorn, supervisionados pelo processo principal (um worker que morre é substituído), sem recarga automática.
+
+# Endereço e porta do servidor
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+
+# Quantidade de processos workers; padrão: um por CPU
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+
+# Tempo para os workers terminarem as requisições em andamento ao encerrar, em segundos
+GRACEFUL_SHUTDOWN_SECONDS = float(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30"))
+
+# IPs dos proxies confiáveis para os cabeçalhos `X-Forwarded-*`
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+# Remove os arquivos de métricas de execuções anteriores no modo multiprocesso do Prometheus
+def clear_metrics_dir():
+    directory = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for path in glob.glob(os.path.join(directory, "*.db")):
+            os.remove(path)
+
+def main():
+    # A migração roda antes dos workers existirem; cada worker só aquece seus pools e caches
+    ensure_shared_database()
+    migrate(engine)
+    engine.dispose()
+    os.environ["BOOK_MIGRATE_ON_STARTUP"] = "false"
+    clear_metrics_dir()
+
+    uvicorn.run(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        proxy_headers=True,
+        forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException, status
+from services.book_service import BookService, DEFAULT_FACET_LIMIT, DEFAULT_PAGE_SIZE, EXPORT_BATCH_SIZE, INSERT_CHUNK_SIZE, STREAM_BATCH_SIZE, tuple_json
+from utils.importing import ImportFormatError, validate_import_record
+from utils.metrics import observe_listing, track_operation
+from utils.profiling import profile_stage
+
+# Quantidade máxima de erros por linha devolvidos no resultado de uma importação
+MAX_REPORTED_IMPORT_ERRORS = 1000
+
+# Variante assíncrona do `BookService` usada pelas rotas da API.
+# As regras de negócio continuam no `BookService`: cada operação roda via `AsyncSession.run_sync`,
+# que executa o código síncrono do ORM sobre a conexão assíncrona (asyncpg/aiosqlite), liberando o
+# event loop enquanto o banco responde. O caminho síncrono permanece disponível para scripts.
+class AsyncBookService:
+    def __init__(self, book_service: BookService = None):
+        self.book_service = book_service or BookService()
+
+    # Executa um método do `BookService` na conexão da sessão, medido como a etapa `service` do perfil
+    # e com os comandos SQL contabilizados nas métricas do método
+    async def _run(self, db: AsyncSession, method, *args, **kwargs):
+        with profile_stage("service"), track_operation(method.__name__):
+            return await db.run_sync(method, *args, **kwargs)
+
+    async def list_books(self, db: AsyncSession, titulo: str = None, autor: str = None, categoria: str = None):
+        books = await self._run(db, self.book_service.list_books, titulo=titulo, autor=autor, categoria=categoria)
+        observe_listing("list_books", len(books))
+        return books
+
+    async def list_books_page(
+        self,
+        db: AsyncSession,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        sort: str = None,
+        order: str = "asc",
+        catalog_version: int = None
+    ):
+        books, next_cursor = await self._run(
+            db, self.book_service.list_books_page,
+            titulo=titulo, autor=autor, categoria=categoria, limit=limit, cursor=cursor,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, sort=sort, order=order,
+            catalog_version=catalog_version
+        )
+        observe_listing("list_books_page", len(books))
+        return books, next_cursor
+
+    async def list_books_since(self, db: AsyncSession, updated_since, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, catalog_version: int = None):
+        books, next_cursor = await self._run(
+            db, self.book_service.list_books_since, updated_since, limit=limit, cursor=cursor, catalog_version=catalog_version
+        )
+        observe_listing("list_books_since", len(books))
+        return books, next_cursor
+
+    async def stream_books(
+        self,
+        db: AsyncSession,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        cursor: str = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        sort: str = None,
+        order: str = "asc"
+    ):
+        # A consulta é montada (e o cursor validado) antes do primeiro livro ser enviado
+        query = self.book_service.stream_select(
+            titulo=titulo, autor=autor, categoria=categoria, cursor=cursor,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, sort=sort, order=order
+        )
+        books = await db.stream(query, execution_options={"yield_per": batch_size})
+
+        # Livros enviados no streaming, contabilizados nas métricas ao final da iteração
+        async def stream_rows():
+            rows = 0
+            async for book in books:
+                rows += 1
+                yield tuple_json(book)
+            observe_listing("stream_books", rows)
+
+        return stream_rows()
+
+    # Exportação do catálogo: lotes de `batch_size` livros (tuplas na ordem de `EXPORT_COLUMNS`) lidos
+    # de um cursor do lado do servidor, em ordem de `book_id`, sem montar o catálogo em memória
+    async def export_books(
+        self,
+        db: AsyncSession,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ):
+        query = self.book_service.stream_select(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        )
+        books = await db.stream(query, execution_options={"yield_per": batch_size})
+
+        async def batches():
+            rows = 0
+            async for batch in books.partitions():
+                rows += len(batch)
+                yield batch
+            observe_listing("export_books", rows)
+
+        return batches()
+
+    async def search_books(
+        self,
+        db: AsyncSession,
+        q: str,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        catalog_version: int = None
+    ):
+        books = await self._run(
+            db, self.book_service.search_books,
+            q, titulo=titulo, autor=autor, categoria=categoria, limit=limit,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, catalog_version=catalog_version
+        )
+        observe_listing("search_books", len(books))
+        return books
+
+    async def get_facets(
+        self,
+        db: AsyncSession,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_FACET_LIMIT,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        catalog_version: int = None
+    ):
+        return await self._run(
+            db, self.book_service.get_facets,
+            titulo=titulo, autor=autor, categoria=categoria, limit=limit,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, catalog_version=catalog_version
+        )
+
+    async def get_book(self, db: AsyncSession, book_id: str):
+        return await self._run(db, self.book_service.get_book, book_id)
+
+    async def get_book_entry(self, db: AsyncSession, book_id: str):
+        return await self._run(db, self.book_service.get_book_entry, book_id)
+
+    async def get_book_entries(self, db: AsyncSession, book_ids: list):
+        return await self._run(db, self.book_service.get_book_entries, book_ids)
+
+    async def get_books(self, db: AsyncSession, book_ids: list):
+        books, missing = await self._run(db, self.book_service.get_books, book_ids)
+        observe_listing("get_books", len(books))
+        return books, missing
+
+    async def get_catalog_version(self, db: AsyncSession):
+        return await self._run(db, self.book_service.get_catalog_version)
+
+    async def get_change_seq(self, db: AsyncSession):
+        return await self._run(db, self.book_service.get_change_seq)
+
+    async def get_changes(self, db: AsyncSession, since: int = 0, limit: int = None):
+        return await self._run(db, self.book_service.get_changes, since=since, limit=limit)
+
+    async def create_book(self, db: AsyncSession, books: list, chunk_size: int = None):
+        return await self._run(db, self.book_service.create_book, books, chunk_size=chunk_size)
+
+    # Importa os livros lidos incrementalmente de `records` (pares (linha, dados, erro) de
+    # `utils/importing.py`), validando e gravando em lotes de `batch_size`. Fora do modo estrito,
+    # cada lote é confirmado e os erros são relatados por linha; no modo estrito, o primeiro erro
+    # desfaz toda a importação, que roda em uma única transação.
+    async def import_books(self, db: AsyncSession, records, strict: bool = False, batch_size: int = None):
+        batch_size = batch_size or INSERT_CHUNK_SIZE
+        result = {"linhas": 0, "importados": 0, "erros": [], "erros_omitidos": 0}
+
+        def report(errors):
+            room = MAX_REPORTED_IMPORT_ERRORS - len(result["erros"])
+            result["erros"] += errors[:room]
+            result["erros_omitidos"] += max(len(errors) - room, 0)
+            if errors and strict:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=f"Importação desfeita (modo estrito): linha {errors[0]['linha']}: {errors[0]['erro']}"
+                )
+
+        async def flush(batch):
+            imported, errors = await self._run(db, self.book_service.import_books, batch, commit=not strict)
+            result["importados"] += imported
+            report(errors)
+
+        batch = []
+        try:
+            async for line, record, error in records:
+                result["linhas"] += 1
+                book = None
+                if error is None:
+                    book, error = validate_import_record(record)
+                if error is not None:
+                    report([{"linha": line, "erro": error}])
+                    continue
+
+                batch.append((line, book))
+                if len(batch) >= batch_size:
+                    await flush(batch)
+                    batch = []
+
+            if batch:
+                await flush(batch)
+            if strict:
+                await self._run(db, self.book_service.commit_import)
+        except ImportFormatError as error:
+            await db.rollback()
+            imported = 0 if strict else result["importados"]
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{error} ({imported} livros importados antes do erro)"
+            )
+        except HTTPException:
+            await db.rollback()
+            raise
+
+        return result
+
+    async def update_book(self, db: AsyncSession, book_data: dict, if_match: list = None):
+        return await self._run(db, self.book_service.update_book, book_data, if_match=if_match)
+
+    async def upsert_book(self, db: AsyncSession, book_data: dict, if_match: list = None):
+        return await self._run(db, self.book_service.upsert_book, book_data, if_match=if_match)
+
+    async def update_books(self, db: AsyncSession, books: list, chunk_size: int = None):
+        return await self._run(db, self.book_service.update_books, books, chunk_size=chunk_size)
+
+    async def adjust_prices(self, db: AsyncSession, operation: str, value: float, dry_run: bool = False, **filters):
+        return await self._run(db, self.book_service.adjust_prices, operation, value, dry_run=dry_run, **filters)
+
+    async def delete_book(self, db: AsyncSession, book_id: str, if_match: list = None):
+        return await self._run(db, self.book_service.delete_book, book_id, if_match=if_match)
@@ -0,0 +1,94 @@
+import asyncio
+import os
+from fastapi import HTTPException, status
+from db.config import AsyncSessionLocal
+from utils.metrics import observe_listing
+
+# Agrupamento das buscas de livro por id (no estilo DataLoader): as chamadas de `load` feitas por
+# requisições concorrentes até a próxima volta do event loop (ou dentro de `BOOK_LOADER_WINDOW_MS`)
+# viram uma única consulta `IN`, executada em uma sessão própria do lote: as sessões das requisições
+# podem ser fechadas (requisição cancelada ou terminada) antes do lote, e uma `AsyncSession` não pode ser
+# usada por dois lotes ao mesmo tempo.
+
+# Liga o agrupamento em `GET /books/{book_id}`
+BOOK_LOADER_ENABLED = os.getenv("BOOK_LOADER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Espera máxima para juntar requisições em um lote, em milissegundos; 0 agrupa apenas as chamadas
+# feitas na mesma volta do event loop, sem acrescentar latência
+BOOK_LOADER_WINDOW_MS = float(os.getenv("BOOK_LOADER_WINDOW_MS", "0"))
+
+# Quantidade máxima de ids por lote; um lote cheio é executado imediatamente
+BOOK_LOADER_MAX_BATCH = int(os.getenv("BOOK_LOADER_MAX_BATCH", "500"))
+
+# Lote em formação: um future por id, todos resolvidos pela mesma consulta
+class _Batch:
+    __slots__ = ("futures", "handle")
+
+    def __init__(self):
+        self.futures = {}
+        self.handle = None
+
+class BookLoader:
+    def __init__(
+        self,
+        book_service,
+        window_ms: float = BOOK_LOADER_WINDOW_MS,
+        max_batch: int = BOOK_LOADER_MAX_BATCH,
+        session_factory=AsyncSessionLocal
+    ):
+        self.book_service = book_service
+        self.session_factory = session_factory
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        # Lote em formação por event loop
+        self._batches = {}
+
+    # Entrada do livro (livro, versão e data da última alteração), como em `get_book_entry`; 404 se não existir
+    async def load(self, book_id: str):
+        loop = asyncio.get_running_loop()
+        batch = self._batches.get(loop)
+        if batch is None:
+            batch = self._batches[loop] = _Batch()
+            if self.window:
+                batch.handle = loop.call_later(self.window, self._dispatch, loop)
+            else:
+                batch.handle = loop.call_soon(self._dispatch, loop)
+
+        future = batch.futures.get(book_id)
+        if future is None:
+            future = batch.futures[book_id] = loop.create_future()
+            if len(batch.futures) >= self.max_batch:
+                batch.handle.cancel()
+                self._dispatch(loop)
+
+        # O future é compartilhado pelas requisições do mesmo id: o cancelamento de uma não afeta as outras
+        return await asyncio.shield(future)
+
+    # Fecha o lote em formação e executa a consulta em uma tarefa própria
+    def _dispatch(self, loop):
+        batch = self._batches.pop(loop, None)
+        if batch is not None:
+            loop.create_task(self._execute(batch))
+
+    async def _execute(self, batch: _Batch):
+        try:
+            async with self.session_factory() as db:
+                entries = await self.book_service.get_book_entries(db, list(batch.futures))
+        except Exception as error:
+            # A falha da consulta é repassada a todas as requisições do lote
+            for future in batch.futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        observe_listing("book_loader", len(batch.futures))
+        for book_id, future in batch.futures.items():
+            if future.done():
+                continue
+            if book_id in entries:
+                future.set_result(entries[book_id])
+            else:
+                future.set_exception(HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Nenhum livro encontrado com o id fornecido"
+                ))
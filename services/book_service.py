@@ -1,71 +1,855 @@
+import csv
+import io
+import os
 import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import Float, Numeric, case, cast, delete, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from db.book_models import Book_Model
+from sqlalchemy.util import await_only
+from db.book_models import Book_Model, Catalog_Model, Change_Model, Facet_Model, utc_now
+from db.facets import price_bucket_bounds, price_bucket_expression
+from db.search import apply_search, search_terms
+from utils.conditional import as_utc
+from utils.pagination import encode_cursor, decode_cursor
 from fastapi import HTTPException, status
 
+# Tamanho padrão da página e do lote de leitura usados na listagem de livros
+DEFAULT_PAGE_SIZE = 100
+STREAM_BATCH_SIZE = 1000
+
+# Quantidade de livros lidos do cursor do banco por bloco na exportação do catálogo
+EXPORT_BATCH_SIZE = int(os.getenv("BOOK_EXPORT_BATCH_SIZE", "5000"))
+
+# Quantidade de ids por consulta `IN` na busca de vários livros, abaixo do limite de parâmetros do SQLite
+BATCH_GET_CHUNK_SIZE = 900
+
+# Operações do reajuste de valores em massa (`adjust_prices`)
+PRICE_OPERATIONS = ("set", "percent", "add", "round")
+
+# Quantidade padrão de alterações por página do registro de alterações (`GET /books/changes`)
+DEFAULT_CHANGES_LIMIT = 1000
+
+# Tempo em que um livro removido continua como marca de remoção (lida pela sincronização com
+# `updated_since`) antes de ser expurgado pela compactação
+TOMBSTONE_RETENTION_DAYS = float(os.getenv("BOOK_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Quantidade padrão de valores retornados em cada faceta (categorias e autores mais frequentes)
+DEFAULT_FACET_LIMIT = 100
+
+# Quantidade de livros por consulta de conflito e por INSERT na criação em lote
+INSERT_CHUNK_SIZE = int(os.getenv("BOOK_INSERT_CHUNK_SIZE", "500"))
+
+# Divide uma lista em blocos de até `size` itens
+def _chunks(items: list, size: int):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+# Converte os dados do livro recebidos pela API para as colunas do upsert, gerando um id se necessário
+def _upsert_row(book_data: dict, version: int, updated_at):
+    return {
+        "book_id": book_data.get('id') or str(uuid.uuid4()),
+        "book_title": book_data.get('titulo'),
+        "book_author": book_data.get('autor'),
+        "book_category": book_data.get('categoria'),
+        "book_price": book_data.get('valor'),
+        "book_version": version,
+        "updated_at": updated_at,
+        "deleted_at": None
+    }
+
+# Monta o INSERT ... ON CONFLICT (book_id) DO UPDATE ... RETURNING do dialeto em uso
+def _upsert_statement(db: Session, rows: list):
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name == "postgresql":
+        statement = postgresql_insert(Book_Model.__table__).values(rows)
+    elif dialect_name == "sqlite":
+        statement = sqlite_insert(Book_Model.__table__).values(rows)
+    else:
+        raise NotImplementedError(f"Upsert não suportado para o banco '{dialect_name}'")
+
+    return statement.on_conflict_do_update(
+        index_elements=[Book_Model.book_id],
+        set_={
+            "book_title": statement.excluded.book_title,
+            "book_author": statement.excluded.book_author,
+            "book_category": statement.excluded.book_category,
+            "book_price": statement.excluded.book_price,
+            "book_version": statement.excluded.book_version,
+            "updated_at": statement.excluded.updated_at,
+            # Gravar um livro removido o restaura
+            "deleted_at": statement.excluded.deleted_at
+        }
+    ).returning(*Book_Model.__table__.c)
+
+# Tabela temporária usada pelo COPY na importação de livros no PostgreSQL
+IMPORT_STAGING_TABLE = "StandLivros_import"
+IMPORT_COLUMNS = ("book_id", "book_title", "book_author", "book_category", "book_price", "book_version", "updated_at")
+
+# Insere os livros ignorando os que conflitam com outro livro (id, ou título e categoria) e retorna
+# os ids inseridos. O INSERT de múltiplas linhas com RETURNING é enviado em lotes pelo SQLAlchemy.
+def _insert_ignoring_conflicts(db: Session, rows: list):
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver in ("asyncpg", "psycopg2"):
+        return _copy_ignoring_conflicts(db, rows)
+
+    if dialect.name == "postgresql":
+        statement = postgresql_insert(Book_Model.__table__)
+    elif dialect.name == "sqlite":
+        statement = sqlite_insert(Book_Model.__table__)
+    else:
+        raise NotImplementedError(f"Importação não suportada para o banco '{dialect.name}'")
+    return db.scalars(statement.on_conflict_do_nothing().returning(Book_Model.book_id), rows).all()
+
+# PostgreSQL: copia os livros com COPY para a tabela temporária e os insere dela na tabela de livros
+# com um único INSERT ... SELECT ... ON CONFLICT DO NOTHING
+def _copy_ignoring_conflicts(db: Session, rows: list):
+    connection = db.connection()
+    connection.exec_driver_sql(
+        f'CREATE TEMP TABLE IF NOT EXISTS "{IMPORT_STAGING_TABLE}" '
+        f'(LIKE "{Book_Model.__tablename__}" INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+    )
+    records = [tuple(row[column] for column in IMPORT_COLUMNS) for row in rows]
+    driver_connection = connection.connection.driver_connection
+
+    if connection.dialect.driver == "asyncpg":
+        await_only(driver_connection.copy_records_to_table(IMPORT_STAGING_TABLE, records=records, columns=IMPORT_COLUMNS))
+    else:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(records)
+        buffer.seek(0)
+        with driver_connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY "{IMPORT_STAGING_TABLE}" ({", ".join(IMPORT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+    columns = ", ".join(IMPORT_COLUMNS)
+    inserted_ids = connection.exec_driver_sql(
+        f'INSERT INTO "{Book_Model.__tablename__}" ({columns}) SELECT {columns} FROM "{IMPORT_STAGING_TABLE}" '
+        "ON CONFLICT DO NOTHING RETURNING book_id"
+    ).scalars().all()
+    # No modo estrito vários lotes usam a mesma transação: a tabela temporária é esvaziada a cada lote
+    connection.exec_driver_sql(f'TRUNCATE "{IMPORT_STAGING_TABLE}"')
+    return inserted_ids
+
+# Condição do If-Match: "*" aceita qualquer versão do livro existente, senão a versão precisa corresponder
+def _version_condition(statement, if_match: list):
+    if "*" in if_match:
+        return statement
+    return statement.where(Book_Model.__table__.c.book_version.in_([version for version in if_match if version != "*"]))
+
+# Monta o UPDATE ... RETURNING condicionado ao If-Match; não cria o livro se ele não existir
+def _conditional_update_statement(row: dict, if_match: list):
+    table = Book_Model.__table__
+    statement = update(table).where(table.c.book_id == row["book_id"], BOOK_IS_LIVE)
+    values = {name: value for name, value in row.items() if name != "book_id"}
+    return _version_condition(statement, if_match).values(**values).returning(*table.c)
+
+# Incrementa o contador de alterações do catálogo na transação atual e retorna o novo valor,
+# usado também como versão dos livros gravados nessa transação
+def _bump_catalog_version(db: Session, updated_at):
+    return db.execute(
+        update(Catalog_Model)
+        .where(Catalog_Model.catalog_id == Catalog_Model.CATALOG_ID)
+        .values(change_counter=Catalog_Model.change_counter + 1, updated_at=updated_at)
+        .returning(Catalog_Model.change_counter)
+    ).scalar_one()
+
+# Registra no registro de alterações os livros gravados ou removidos na transação atual
+def _log_changes(db: Session, book_ids: list, change_type: str, version: int, changed_at):
+    if book_ids:
+        db.execute(insert(Change_Model), [
+            {"book_id": book_id, "change_type": change_type, "catalog_version": version, "changed_at": changed_at}
+            for book_id in book_ids
+        ])
+
+def _precondition_failed():
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="Pré-condição falhou: o livro foi alterado por outra requisição (If-Match)"
+    )
+
+# Converte uma linha da tabela em uma entrada com o livro, sua versão e a data da última alteração
+# (em ISO 8601 UTC, para que a entrada possa ser guardada em qualquer backend de cache)
+def _row_entry(row):
+    return {"book": _row_json(row), "version": row["book_version"], "updated_at": as_utc(row["updated_at"]).isoformat()}
+
+# Condição dos livros ativos (não removidos), a mesma dos índices parciais das listagens
+BOOK_IS_LIVE = Book_Model.deleted_at.is_(None)
+
+# Colunas do livro selecionadas diretamente nas listagens, sem instanciar objetos do ORM
+BOOK_COLUMNS = (
+    Book_Model.book_id,
+    Book_Model.book_title,
+    Book_Model.book_author,
+    Book_Model.book_category,
+    Book_Model.book_price
+)
+
+# Colunas aceitas no parâmetro `sort` das listagens
+SORT_COLUMNS = {
+    "titulo": Book_Model.book_title,
+    "autor": Book_Model.book_author,
+    "valor": Book_Model.book_price,
+}
+
+# Converte uma tupla de `BOOK_COLUMNS` para o formato JSON do livro
+def tuple_json(row):
+    book_id, titulo, autor, categoria, valor = row
+    return {"id": book_id, "titulo": titulo, "autor": autor, "categoria": categoria, "valor": valor}
+
+# Converte uma linha da tabela `StandLivros` para o formato JSON do livro, sem instanciar o ORM.
+# O valor é convertido para float: o RETURNING do SQLite devolve valores inteiros como `int`.
+def _row_json(row: dict):
+    return {
+        "id": row["book_id"],
+        "titulo": row["book_title"],
+        "autor": row["book_author"],
+        "categoria": row["book_category"],
+        "valor": float(row["book_price"]) if row["book_price"] is not None else None
+    }
+
+# Converte uma alteração do registro (com as colunas do livro, se ele ainda existir) para o formato JSON
+def _change_json(row) -> dict:
+    return {
+        "seq": row.change_seq,
+        "tipo": row.change_type,
+        "id": row.book_id,
+        "versao": row.catalog_version,
+        "alterado_em": as_utc(row.changed_at).isoformat(),
+        # As colunas do livro vêm do LEFT JOIN: o id é nulo quando o livro não existe mais
+        "livro": tuple_json(row[5:]) if row[5] is not None else None
+    }
+
+# Converte uma linha da tabela para o formato da sincronização incremental: o livro, sua versão, a data
+# da alteração e a data da remoção (nula nos livros ativos)
+def _sync_json(row) -> dict:
+    return {
+        **_row_json(row),
+        "versao": row["book_version"],
+        "atualizado_em": as_utc(row["updated_at"]).isoformat(),
+        "removido_em": as_utc(row["deleted_at"]).isoformat() if row["deleted_at"] is not None else None
+    }
+
+# Monta o JSON das facetas: contagens por valor, estatísticas e todas as faixas de valor (inclusive vazias)
+def _facets_json(total: int, price_min, price_max, price_avg, categories, authors, bucket_counts: dict):
+    return {
+        "total": total,
+        "categorias": [{"valor": value, "total": count} for value, count in categories],
+        "autores": [{"valor": value, "total": count} for value, count in authors],
+        "valor": {
+            "min": price_min,
+            "max": price_max,
+            "avg": round(price_avg, 2) if price_avg is not None else None,
+            "faixas": [
+                {"min": lower, "max": upper, "total": bucket_counts.get(str(index), 0)}
+                for index, (lower, upper) in enumerate(price_bucket_bounds())
+            ]
+        }
+    }
+
+# Condições dos filtros das listagens, usadas tanto nas consultas quanto nas alterações em massa
+def _filter_conditions(
+    titulo: str = None,
+    autor: str = None,
+    categoria: str = None,
+    categoria_exata: str = None,
+    valor_min: float = None,
+    valor_max: float = None,
+    ids: list = None
+):
+    conditions = []
+    if titulo:
+        conditions.append(Book_Model.book_title.ilike(f"%{titulo}%"))
+    if autor:
+        conditions.append(Book_Model.book_author.ilike(f"%{autor}%"))
+    if categoria:
+        conditions.append(Book_Model.book_category.ilike(f"%{categoria}%"))
+    if categoria_exata is not None:
+        conditions.append(Book_Model.book_category == categoria_exata)
+    if valor_min is not None:
+        conditions.append(Book_Model.book_price >= valor_min)
+    if valor_max is not None:
+        conditions.append(Book_Model.book_price <= valor_max)
+    if ids is not None:
+        conditions.append(Book_Model.book_id.in_(ids))
+    return conditions
+
+# Novo valor dos livros em SQL para cada operação do reajuste em massa, arredondado para centavos e
+# nunca negativo. `round` leva ao valor mais próximo terminado nos centavos de `value` (ex.: 0.90).
+def _price_expression(operation: str, value: float):
+    price = Book_Model.__table__.c.book_price
+    if operation == "set":
+        new_price = literal(value, Float)
+    elif operation == "percent":
+        new_price = price * (1 + value / 100)
+    elif operation == "add":
+        new_price = price + value
+    else:
+        new_price = func.round(price - value) + value
+    new_price = func.round(cast(new_price, Numeric), 2)
+    return cast(case((new_price < 0, 0), else_=new_price), Float)
+
+# Rejeita valores sem sentido para a operação do reajuste
+def _validate_price_operation(operation: str, value: float):
+    if operation not in PRICE_OPERATIONS:
+        message = f"Operação de reajuste desconhecida: '{operation}'"
+    elif operation == "set" and value < 0:
+        message = "O valor definido não pode ser negativo"
+    elif operation == "percent" and value <= -100:
+        message = "O percentual deve ser maior que -100"
+    elif operation == "round" and not 0 <= value < 1:
+        message = "O arredondamento recebe os centavos finais do valor, entre 0 e 1 (ex.: 0.90)"
+    else:
+        return
+    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
+
+# Rejeita faixas de valor vazias (`valor_min` maior que `valor_max`)
+def validate_price_range(valor_min: float = None, valor_max: float = None):
+    if valor_min is not None and valor_max is not None and valor_min > valor_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="`valor_min` não pode ser maior que `valor_max`"
+        )
+
 class BookService:
+    # `cache` é um `BookCache` opcional consultado antes do banco nas leituras; as chaves levam a versão do
+    # catálogo no banco, então as escritas (de qualquer processo) o invalidam.
+    # `facet_summary` indica que a tabela de resumo das facetas está sendo mantida (`db/facets.py`).
+    # `snapshot` é um `CatalogSnapshot` opcional (`services/snapshot.py`) que responde `list_books`, as
+    # páginas de `list_books_page`, a versão do catálogo e as buscas por id na memória, atualizado pelo
+    # registro de alterações depois de cada escrita.
+    def __init__(self, cache=None, facet_summary: bool = False, snapshot=None):
+        self.cache = cache
+        self.facet_summary = facet_summary
+        self.snapshot = snapshot
+
+    # Leitura através do cache: retorna o valor em cache ou carrega do banco e grava no cache.
+    # A chave é calculada antes da consulta para que uma escrita concorrente a invalide.
+    def _read_through(self, kind: str, cache_key, load):
+        if self.cache is None:
+            return load()
+
+        key = cache_key()
+        value = self.cache.get(kind, key)
+        if value is None:
+            value = load()
+            self.cache.set(key, value)
+        return value
+
+    # Chave de uma listagem no cache pela versão do catálogo no banco: a rota passa a versão que já leu
+    # para o ETag, e as demais chamadas a leem na mesma sessão, antes da consulta dos livros
+    def _listing_key(self, db: Session, catalog_version: int, kind: str, **params) -> str:
+        if catalog_version is None:
+            catalog_version = self.get_catalog_version(db)[0]
+        return self.cache.listing_key(kind, catalog_version, **params)
+
+    # Depois do commit de uma escrita: aplica as alterações na réplica em memória (o cache muda de chave
+    # com o contador do catálogo). Uma falha na réplica não desfaz a escrita; o atualizador tenta de novo.
+    def _after_commit(self, db: Session):
+        if self.snapshot is not None:
+            try:
+                self.snapshot.refresh(db)
+            except Exception:
+                db.rollback()
+
+    # Réplica em memória carregada (na primeira leitura), ou None se ela não estiver ligada
+    def _loaded_snapshot(self, db: Session):
+        if self.snapshot is None:
+            return None
+        if not self.snapshot.loaded:
+            self.snapshot.load(db)
+        return self.snapshot
+
+    # Monta a consulta base de livros aplicando os filtros opcionais: título, autor e categoria por
+    # trecho do texto, categoria exata e faixa de valor (as duas últimas atendidas pelos índices compostos).
+    # A consulta é um `select()` para poder ser executada tanto pela sessão síncrona quanto pela assíncrona.
+    def filtered_select(
+        self,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None
+    ):
+        return select(*BOOK_COLUMNS).where(BOOK_IS_LIVE, *_filter_conditions(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        ))
+
+    # Paginação por chave (keyset): continua a partir do último livro da página anterior, na mesma
+    # ordenação e direção. Sem `sort`, a chave é o `book_id`; com `sort`, é o par (coluna ordenada, `book_id`).
+    def apply_cursor(self, query, cursor: str = None, sort: str = None, order: str = "asc"):
+        if not cursor:
+            return query
+
+        last_book = self.decode_page_cursor(cursor, sort=sort, order=order)
+        if sort is None:
+            sort_key, last_key = Book_Model.book_id, last_book["id"]
+        else:
+            sort_key = tuple_(SORT_COLUMNS[sort], Book_Model.book_id)
+            last_key = (last_book["key"], last_book["id"])
+        return query.filter(sort_key < last_key if order == "desc" else sort_key > last_key)
+
+    # Decodifica o cursor de uma página e confere se ele pertence à mesma ordenação (400 caso contrário)
+    def decode_page_cursor(self, cursor: str, sort: str = None, order: str = "asc"):
+        try:
+            last_book = decode_cursor(cursor)
+        except ValueError as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(error)
+            )
+
+        if (last_book["sort"], last_book["order"]) != (sort, order):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="O cursor de paginação pertence a outra ordenação"
+            )
+        return last_book
+
+    # Ordena pela coluna escolhida e desempata pelo `book_id`, na mesma direção, para que a ordem
+    # seja estável e venha direto dos índices compostos (coluna, book_id)
+    def apply_sort(self, query, sort: str = None, order: str = "asc"):
+        columns = [SORT_COLUMNS[sort], Book_Model.book_id] if sort else [Book_Model.book_id]
+        return query.order_by(*(column.desc() if order == "desc" else column for column in columns))
+
     def list_books(self, db: Session, titulo: str = None, autor: str = None, categoria: str = None):
-        query = db.query(Book_Model)
-        
-        if titulo:
-            query = query.filter(Book_Model.book_title.ilike(f"%{titulo}%"))
-        if autor:
-            query = query.filter(Book_Model.book_author.ilike(f"%{autor}%"))
-        if categoria:
-            query = query.filter(Book_Model.book_category.ilike(f"%{categoria}%"))
-        
-        books = query.all()
+        snapshot = self._loaded_snapshot(db)
+        if snapshot is not None:
+            return snapshot.list_books(titulo=titulo, autor=autor, categoria=categoria)
+
+        books = db.execute(self.filtered_select(titulo=titulo, autor=autor, categoria=categoria)).all()
         
         # Retorna uma lista vazia caso nenhum livro seja encontrado
-        return [book.json() for book in books] if books else []
+        return [tuple_json(book) for book in books] if books else []
+
+    def list_books_page(
+        self,
+        db: Session,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        sort: str = None,
+        order: str = "asc",
+        catalog_version: int = None
+    ):
+        filters = dict(titulo=titulo, autor=autor, categoria=categoria, categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max)
+        snapshot = self._loaded_snapshot(db)
+        if snapshot is not None:
+            return self._snapshot_page(snapshot, filters, limit, cursor, sort, order)
+
+        query = self.apply_cursor(self.filtered_select(**filters), cursor, sort=sort, order=order)
+        query = self.apply_sort(query, sort=sort, order=order)
+
+        def load_page():
+            # Busca um registro a mais para saber se existe uma próxima página
+            books = db.execute(query.limit(limit + 1)).all()
+            has_next_page = len(books) > limit
+            books = books[:limit]
+
+            next_cursor = None
+            if has_next_page:
+                last_book = books[-1]
+                sort_key = getattr(last_book, SORT_COLUMNS[sort].key) if sort else None
+                next_cursor = encode_cursor(last_book.book_id, sort=sort, order=order, key=sort_key)
+            return [tuple_json(book) for book in books], next_cursor
+
+        book_list, next_cursor = self._read_through(
+            "listing",
+            lambda: self._listing_key(db, catalog_version, "page", **filters, limit=limit, cursor=cursor, sort=sort, order=order),
+            load_page
+        )
+        return book_list, next_cursor
+
+    # Página da listagem lida da réplica em memória, com o mesmo cursor das páginas lidas do banco
+    def _snapshot_page(self, snapshot, filters: dict, limit: int, cursor: str, sort: str, order: str):
+        after = None
+        if cursor:
+            last_book = self.decode_page_cursor(cursor, sort=sort, order=order)
+            after = (last_book["key"], last_book["id"]) if sort else (last_book["id"],)
+
+        # Busca um livro a mais para saber se existe uma próxima página
+        books = snapshot.list_books_page(limit + 1, sort=sort, order=order, after=after, **filters)
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last_book, sort_key = books[-1]
+            next_cursor = encode_cursor(last_book["id"], sort=sort, order=order, key=sort_key)
+        return [book for book, _ in books], next_cursor
+
+    def stream_books(
+        self,
+        db: Session,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        cursor: str = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        sort: str = None,
+        order: str = "asc"
+    ):
+        query = self.stream_select(
+            titulo=titulo, autor=autor, categoria=categoria, cursor=cursor,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, sort=sort, order=order
+        )
+
+        # `yield_per` carrega os livros em lotes (cursor do lado do servidor no PostgreSQL),
+        # mantendo a memória limitada independentemente do tamanho do catálogo.
+        # A consulta é validada agora e os livros só são lidos durante a iteração.
+        books = db.execute(query, execution_options={"yield_per": batch_size})
+        return (tuple_json(book) for book in books)
+
+    # Consulta usada no streaming: todos os livros filtrados a partir do cursor, na ordenação pedida
+    # (por padrão, em ordem de `book_id`)
+    def stream_select(
+        self,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        cursor: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        sort: str = None,
+        order: str = "asc"
+    ):
+        query = self.filtered_select(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max
+        )
+        query = self.apply_cursor(query, cursor, sort=sort, order=order)
+        return self.apply_sort(query, sort=sort, order=order)
+
+    def search_books(
+        self,
+        db: Session,
+        q: str,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        catalog_version: int = None
+    ):
+        terms = search_terms(q)
+        if not terms:
+            return []
+
+        # Busca textual indexada (FTS5 no SQLite, pg_trgm no PostgreSQL), ignorando acentos e
+        # retornando os livros mais relevantes primeiro
+        filters = dict(titulo=titulo, autor=autor, categoria=categoria, categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max)
+        query = apply_search(self.filtered_select(**filters), db.get_bind().dialect.name, terms)
+        return self._read_through(
+            "listing",
+            lambda: self._listing_key(db, catalog_version, "search", q=" ".join(terms), **filters, limit=limit),
+            lambda: [tuple_json(book) for book in db.execute(query.limit(limit)).all()]
+        )
 
     def get_book(self, db: Session, book_id: str):
-        book = db.query(Book_Model).filter(Book_Model.book_id == book_id).first()
-        
-        if not book:
+        return self.get_book_entry(db, book_id)["book"]
+
+    # Retorna o livro junto com sua versão e a data da última alteração (usadas no ETag e no Last-Modified)
+    def get_book_entry(self, db: Session, book_id: str):
+        snapshot = self._loaded_snapshot(db)
+        if snapshot is not None:
+            return snapshot.get_book_entry(book_id)
+
+        def load_book():
+            book = db.execute(select(Book_Model.__table__).where(Book_Model.book_id == book_id, BOOK_IS_LIVE)).mappings().first()
+
+            if not book:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Nenhum livro encontrado com o id fornecido"
+                )
+
+            return _row_entry(book)
+
+        return self._read_through("book", lambda: self.cache.book_key(book_id, self.get_catalog_version(db)[0]), load_book)
+
+    # Retorna as entradas (livro, versão e data da última alteração) dos livros encontrados, por id.
+    # Os livros fora do cache são lidos com uma consulta `IN` por bloco de `chunk_size` ids.
+    def get_book_entries(self, db: Session, book_ids: list, chunk_size: int = None):
+        chunk_size = chunk_size or BATCH_GET_CHUNK_SIZE
+        book_ids = list(dict.fromkeys(book_ids))
+        entries, cache_keys = {}, {}
+
+        snapshot = self._loaded_snapshot(db)
+        if snapshot is not None:
+            for book_id in book_ids:
+                entry = snapshot.get_entry(book_id)
+                if entry is not None:
+                    entries[book_id] = entry
+            return entries
+
+        if self.cache is not None and book_ids:
+            # As chaves são calculadas antes da consulta para que uma escrita concorrente as invalide
+            catalog_version = self.get_catalog_version(db)[0]
+            for book_id in book_ids:
+                cache_keys[book_id] = self.cache.book_key(book_id, catalog_version)
+                entry = self.cache.get("book", cache_keys[book_id])
+                if entry is not None:
+                    entries[book_id] = entry
+
+        table = Book_Model.__table__
+        for ids_chunk in _chunks([book_id for book_id in book_ids if book_id not in entries], chunk_size):
+            for book in db.execute(select(table).where(table.c.book_id.in_(ids_chunk), BOOK_IS_LIVE)).mappings():
+                entries[book["book_id"]] = _row_entry(book)
+                if self.cache is not None:
+                    self.cache.set(cache_keys[book["book_id"]], entries[book["book_id"]])
+
+        return entries
+
+    # Busca vários livros de uma vez: retorna os livros na ordem dos ids pedidos (sem repetições)
+    # e os ids que não foram encontrados
+    def get_books(self, db: Session, book_ids: list, chunk_size: int = None):
+        entries = self.get_book_entries(db, book_ids, chunk_size=chunk_size)
+        book_ids = list(dict.fromkeys(book_ids))
+        books = [entries[book_id]["book"] for book_id in book_ids if book_id in entries]
+        missing = [book_id for book_id in book_ids if book_id not in entries]
+        return books, missing
+
+    # Facetas dos livros com os mesmos filtros de `list_books`: contagens por categoria e autor,
+    # mínimo, máximo, média e faixas de valor. Sem filtros e com o resumo ligado, o custo depende
+    # apenas da quantidade de categorias e autores, e não da quantidade de livros.
+    def get_facets(
+        self,
+        db: Session,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        limit: int = DEFAULT_FACET_LIMIT,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None,
+        catalog_version: int = None
+    ):
+        filters = dict(titulo=titulo, autor=autor, categoria=categoria, categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max)
+
+        def load_facets():
+            if self.facet_summary and all(value is None or value == "" for value in filters.values()):
+                return self._summary_facets(db, limit)
+            return self._grouped_facets(db, filters, limit)
+
+        return self._read_through(
+            "listing",
+            lambda: self._listing_key(db, catalog_version, "facets", **filters, limit=limit),
+            load_facets
+        )
+
+    # Facetas calculadas sobre os livros filtrados, com GROUP BY no banco
+    def _grouped_facets(self, db: Session, filters: dict, limit: int):
+        query = self.filtered_select(**filters)
+        count = func.count()
+
+        def top_values(column):
+            return db.execute(
+                query.with_only_columns(column, count).group_by(column).order_by(count.desc(), column).limit(limit)
+            ).all()
+
+        price = Book_Model.book_price
+        stats = db.execute(query.with_only_columns(count, func.min(price), func.max(price), func.avg(price))).one()
+        bucket = price_bucket_expression(price)
+        bucket_counts = dict(db.execute(query.with_only_columns(bucket, count).group_by(bucket)).all())
+
+        return _facets_json(
+            stats[0], stats[1], stats[2], stats[3],
+            top_values(Book_Model.book_category), top_values(Book_Model.book_author), bucket_counts
+        )
+
+    # Facetas de todo o catálogo lidas da tabela de resumo mantida pelos triggers
+    def _summary_facets(self, db: Session, limit: int):
+        def facet_rows(facet: str, row_limit: int = None):
+            query = (
+                select(Facet_Model.facet_value, Facet_Model.book_count, Facet_Model.price_sum)
+                .where(Facet_Model.facet == facet, Facet_Model.book_count > 0)
+                .order_by(Facet_Model.book_count.desc(), Facet_Model.facet_value)
+            )
+            return db.execute(query.limit(row_limit) if row_limit else query).all()
+
+        totals = facet_rows("total")
+        total, price_sum = (totals[0].book_count, totals[0].price_sum) if totals else (0, 0.0)
+        price_min, price_max = db.execute(
+            select(func.min(Book_Model.book_price), func.max(Book_Model.book_price)).where(BOOK_IS_LIVE)
+        ).one()
+
+        return _facets_json(
+            total, price_min, price_max, price_sum / total if total else None,
+            [(row.facet_value, row.book_count) for row in facet_rows("categoria", limit)],
+            [(row.facet_value, row.book_count) for row in facet_rows("autor", limit)],
+            {row.facet_value: row.book_count for row in facet_rows("faixa_valor")}
+        )
+
+    # Retorna o contador de alterações do catálogo e a data da última alteração, sem consultar os livros.
+    # Com a réplica em memória, é a versão aplicada nela, que identifica as listagens respondidas por ela.
+    def get_catalog_version(self, db: Session):
+        snapshot = self._loaded_snapshot(db)
+        if snapshot is not None:
+            return snapshot.version()
+
+        catalog = db.execute(
+            select(Catalog_Model.change_counter, Catalog_Model.updated_at)
+            .where(Catalog_Model.catalog_id == Catalog_Model.CATALOG_ID)
+        ).one()
+        return catalog.change_counter, catalog.updated_at
+
+    # Sincronização incremental: livros alterados ou removidos a partir de `updated_since` (inclusive), em
+    # ordem de alteração. Os removidos vêm com `removido_em`. Uma data anterior à retenção das marcas de
+    # remoção retorna 410: remoções podem ter sido expurgadas e o cliente precisa baixar o catálogo de novo.
+    def list_books_since(self, db: Session, updated_since, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None, catalog_version: int = None):
+        updated_since = as_utc(updated_since)
+        if updated_since < utc_now() - timedelta(days=TOMBSTONE_RETENTION_DAYS):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Nenhum livro encontrado com o id fornecido"
+                status_code=status.HTTP_410_GONE,
+                detail=f"`updated_since` é anterior à retenção das remoções ({TOMBSTONE_RETENTION_DAYS:g} dias); sincronize o catálogo completo"
             )
-        
-        return book.json()
+        query = self.since_select(updated_since, cursor)
+
+        def load_page():
+            books = db.execute(query.limit(limit + 1)).mappings().all()
+            next_cursor = None
+            if len(books) > limit:
+                books = books[:limit]
+                next_cursor = encode_cursor(
+                    books[-1]["book_id"], sort="updated_at", order="asc", key=as_utc(books[-1]["updated_at"]).isoformat()
+                )
+            return [_sync_json(book) for book in books], next_cursor
+
+        return self._read_through(
+            "listing",
+            lambda: self._listing_key(db, catalog_version, "sync", updated_since=updated_since.isoformat(), limit=limit, cursor=cursor),
+            load_page
+        )
+
+    # Consulta da sincronização incremental, atendida pelo índice (`updated_at`, `book_id`), que também
+    # é a chave do cursor. Inclui as marcas de remoção.
+    def since_select(self, updated_since, cursor: str = None):
+        table = Book_Model.__table__
+        query = select(table).where(table.c.updated_at >= updated_since)
+        if cursor:
+            try:
+                last_book = decode_cursor(cursor)
+                last_updated_at = datetime.fromisoformat(last_book["key"])
+            except (ValueError, TypeError) as error:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor de paginação inválido") from error
+            if last_book["sort"] != "updated_at":
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="O cursor de paginação pertence a outra ordenação"
+                )
+            query = query.where(tuple_(table.c.updated_at, table.c.book_id) > (last_updated_at, last_book["id"]))
+        return query.order_by(table.c.updated_at, table.c.book_id)
+
+    # Expurga até `batch_size` marcas de remoção mais antigas que `older_than` e retorna a quantidade.
+    # Cada lote é uma transação curta pela chave primária, sem o lock do contador do catálogo: as listagens
+    # não mudam. A condição é repetida no DELETE para não expurgar um livro restaurado nesse meio tempo.
+    def purge_tombstones(self, db: Session, older_than, batch_size: int = INSERT_CHUNK_SIZE) -> int:
+        table = Book_Model.__table__
+        expired = (table.c.deleted_at.is_not(None), table.c.deleted_at < older_than)
+        book_ids = db.scalars(select(table.c.book_id).where(*expired).order_by(table.c.deleted_at).limit(batch_size)).all()
+        if not book_ids:
+            return 0
+        purged = db.execute(delete(table).where(table.c.book_id.in_(book_ids), *expired)).rowcount
+        db.commit()
+        return purged
+
+    # Última sequência do registro de alterações (0 se o registro estiver vazio)
+    def get_change_seq(self, db: Session) -> int:
+        return db.execute(select(func.coalesce(func.max(Change_Model.change_seq), 0))).scalar_one()
+
+    # Alterações do catálogo com sequência maior que `since`, em ordem, com o estado atual de cada livro
+    # (nulo se ele foi removido depois). Retorna as alterações, a sequência para a próxima chamada e se
+    # ainda há alterações além de `limit`.
+    def get_changes(self, db: Session, since: int = 0, limit: int = None):
+        limit = limit or DEFAULT_CHANGES_LIMIT
+        rows = db.execute(
+            select(
+                Change_Model.change_seq, Change_Model.change_type, Change_Model.book_id,
+                Change_Model.catalog_version, Change_Model.changed_at, *BOOK_COLUMNS
+            )
+            .outerjoin(Book_Model, (Book_Model.book_id == Change_Model.book_id) & BOOK_IS_LIVE)
+            .where(Change_Model.change_seq > since)
+            .order_by(Change_Model.change_seq)
+            .limit(limit + 1)
+        ).all()
 
-    def create_book(self, db: Session, books: list):
+        has_more = len(rows) > limit
+        changes = [_change_json(row) for row in rows[:limit]]
+        return changes, changes[-1]["seq"] if changes else since, has_more
+
+    # Cria os livros em uma única transação (tudo-ou-nada). `on_chunk`, opcional, recebe a quantidade
+    # de livros inseridos (ainda sem commit) após cada bloco, como sinal de vida das operações longas.
+    def create_book(self, db: Session, books: list, chunk_size: int = None, on_chunk=None):
+        chunk_size = chunk_size or INSERT_CHUNK_SIZE
         try:
-            new_books = []
+            # Verifica em memória se o mesmo título e categoria aparecem mais de uma vez no lote
+            book_keys = set()
             for book_data in books:
-                # Verifica se já existe um livro com o mesmo título e categoria
-                existing_book = db.query(Book_Model).filter(
-                    Book_Model.book_title == book_data.get('titulo'),  # Usando .get() para evitar erros
-                    Book_Model.book_category == book_data.get('categoria')
+                book_key = (book_data.get('titulo'), book_data.get('categoria'))  # Usando .get() para evitar erros
+                if book_key in book_keys:
+                    raise ValueError(f"Conflito: o livro '{book_key[0]}' aparece mais de uma vez na categoria '{book_key[1]}'")
+                book_keys.add(book_key)
+
+            # Verifica se já existe algum livro com o mesmo título e categoria com uma única
+            # consulta `(título, categoria) IN (...)` por bloco, em vez de uma consulta por livro
+            for keys_chunk in _chunks(list(book_keys), chunk_size):
+                existing_book = db.execute(
+                    select(Book_Model.book_title, Book_Model.book_category)
+                    .where(tuple_(Book_Model.book_title, Book_Model.book_category).in_(keys_chunk), BOOK_IS_LIVE)
+                    .limit(1)
                 ).first()
-                
+
                 if existing_book:
-                    raise ValueError(f"Conflito: o livro '{book_data.get('titulo')}' já existe na categoria '{book_data.get('categoria')}'")
-                
-                # Gera um novo ID UUID para o livro
-                new_book_id = str(uuid.uuid4())
-                
-                new_book = Book_Model(
-                    book_id=new_book_id,
-                    book_title=book_data.get('titulo'),
-                    book_author=book_data.get('autor'),
-                    book_category=book_data.get('categoria'),
-                    book_price=book_data.get('valor')
-                )
-                
-                db.add(new_book)
-                new_books.append(new_book)
+                    raise ValueError(f"Conflito: o livro '{existing_book.book_title}' já existe na categoria '{existing_book.book_category}'")
+
+            # Gera um novo ID UUID para cada livro, todos com a versão da alteração atual do catálogo
+            updated_at = utc_now()
+            version = _bump_catalog_version(db, updated_at)
+            new_books = [
+                {
+                    "book_id": str(uuid.uuid4()),
+                    "book_title": book_data.get('titulo'),
+                    "book_author": book_data.get('autor'),
+                    "book_category": book_data.get('categoria'),
+                    "book_price": book_data.get('valor'),
+                    "book_version": version,
+                    "updated_at": updated_at
+                }
+                for book_data in books
+            ]
+
+            # Insere os livros em blocos com INSERT de múltiplas linhas; o commit único mantém o tudo-ou-nada
+            inserted = 0
+            for rows_chunk in _chunks(new_books, chunk_size):
+                db.execute(insert(Book_Model), rows_chunk)
+                inserted += len(rows_chunk)
+                if on_chunk is not None:
+                    on_chunk(inserted)
+            _log_changes(db, [book["book_id"] for book in new_books], Change_Model.CHANGE_UPSERT, version, updated_at)
             db.commit()
-            return [book.json() for book in new_books]
+            self._after_commit(db)
+            return [_row_json(book) for book in new_books]
         except IntegrityError:
+            # A restrição única de (título, categoria) barrou um livro gravado por outra requisição concorrente
             db.rollback()
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Erro ao tentar adicionar livros ao banco de dados"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Conflito: um ou mais livros já existem na StandLivros"
             )
         except ValueError as error:
+            db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail=str(error)
@@ -78,7 +862,58 @@ class BookService:
                 detail=f"Erro ao criar livros: {str(error)}"
             )
 
-    def update_book(self, db: Session, book_data: dict):
+    # Grava um lote de livros importados (já validados, como pares (linha, livro)) e retorna a quantidade
+    # gravada e os erros por linha. Livros que conflitam com outro são ignorados e relatados, sem
+    # abortar o lote. Com `commit=False` a transação continua aberta para o próximo lote (modo estrito).
+    def import_books(self, db: Session, books: list, commit: bool = True):
+        errors, rows, seen_ids = [], [], set()
+        try:
+            updated_at = utc_now()
+            version = _bump_catalog_version(db, updated_at)
+            for line, book_data in books:
+                row = _upsert_row(book_data, version, updated_at)
+                if row["book_id"] in seen_ids:
+                    errors.append({"linha": line, "erro": f"O id '{row['book_id']}' aparece mais de uma vez no lote"})
+                    continue
+                seen_ids.add(row["book_id"])
+                rows.append((line, row))
+
+            # Livros removidos com os mesmos ids são substituídos: a importação os restaura
+            table = Book_Model.__table__
+            for ids_chunk in _chunks([row["book_id"] for _, row in rows], BATCH_GET_CHUNK_SIZE):
+                db.execute(delete(table).where(table.c.book_id.in_(ids_chunk), table.c.deleted_at.is_not(None)))
+            inserted_ids = set(_insert_ignoring_conflicts(db, [row for _, row in rows])) if rows else set()
+            _log_changes(db, list(inserted_ids), Change_Model.CHANGE_UPSERT, version, updated_at)
+            if commit:
+                db.commit()
+                self._after_commit(db)
+        except Exception as error:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao importar livros: {str(error)}"
+            )
+
+        errors += [
+            {"linha": line, "erro": f"Conflito: o livro '{row['book_title']}' já existe na categoria '{row['book_category']}' ou o id '{row['book_id']}' já existe"}
+            for line, row in rows
+            if row["book_id"] not in inserted_ids
+        ]
+        errors.sort(key=lambda error: error["linha"])
+        return len(inserted_ids), errors
+
+    # Confirma a importação feita em uma única transação (modo estrito)
+    def commit_import(self, db: Session):
+        db.commit()
+        self._after_commit(db)
+
+    def update_book(self, db: Session, book_data: dict, if_match: list = None):
+        return self.upsert_book(db, book_data, if_match=if_match)["book"]
+
+    # Atualiza ou cria o livro e retorna a entrada com a nova versão.
+    # `if_match` (versões do cabeçalho If-Match) torna a escrita condicional: só atualiza um livro
+    # existente cuja versão corresponda, caso contrário retorna 412.
+    def upsert_book(self, db: Session, book_data: dict, if_match: list = None):
         try:
             # Certifique-se de que book_data seja um dicionário
             if not isinstance(book_data, dict):
@@ -87,29 +922,34 @@ class BookService:
                     detail="Os dados do livro devem ser passados como um dicionário"
                 )
 
-            book = db.query(Book_Model).filter(Book_Model.book_id == book_data.get('id')).first()
+            updated_at = utc_now()
+            version = _bump_catalog_version(db, updated_at)
+            row = _upsert_row(book_data, version, updated_at)
 
-            if book:
-                # Atualiza o livro existente
-                book.book_title = book_data.get('titulo')
-                book.book_author = book_data.get('autor')
-                book.book_category = book_data.get('categoria')
-                book.book_price = book_data.get('valor')
-                db.commit()
-                return book.json()
+            if if_match is not None:
+                if not book_data.get('id'):
+                    raise _precondition_failed()
+                book = db.execute(_conditional_update_statement(row, if_match)).mappings().first()
+                if book is None:
+                    raise _precondition_failed()
             else:
-                # Caso o livro não exista, cria um novo
-                new_book_id = str(uuid.uuid4())  # Gera um novo ID UUID para o livro
-                new_book = Book_Model(
-                    book_id=new_book_id,
-                    book_title=book_data.get('titulo'),
-                    book_author=book_data.get('autor'),
-                    book_category=book_data.get('categoria'),
-                    book_price=book_data.get('valor')
-                )
-                db.add(new_book)
-                db.commit()
-                return new_book.json()
+                # Atualiza o livro existente ou cria um novo em um único INSERT ... ON CONFLICT DO UPDATE,
+                # sem a leitura prévia e sem corrida entre requisições concorrentes para o mesmo id
+                book = db.execute(_upsert_statement(db, [row])).mappings().one()
+
+            _log_changes(db, [book["book_id"]], Change_Model.CHANGE_UPSERT, version, updated_at)
+            db.commit()
+            self._after_commit(db)
+            return _row_entry(book)
+        except HTTPException:
+            db.rollback()
+            raise
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Conflito: o livro '{book_data.get('titulo')}' já existe na categoria '{book_data.get('categoria')}'"
+            )
         except Exception as error:
             # Reverte qualquer mudança não confirmada no banco de dados
             db.rollback()
@@ -118,21 +958,140 @@ class BookService:
                 detail=f"Erro ao atualizar ou criar livro: {str(error)}"
             )
 
-    def delete_book(self, db: Session, book_id: str):
+    def update_books(self, db: Session, books: list, chunk_size: int = None):
+        chunk_size = chunk_size or INSERT_CHUNK_SIZE
         try:
-            book = db.query(Book_Model).filter(Book_Model.book_id == book_id).first()
-            
-            if not book:
+            # O mesmo id não pode ser atualizado duas vezes no mesmo comando
+            book_ids = [book_data.get('id') for book_data in books if book_data.get('id')]
+            if len(set(book_ids)) != len(book_ids):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="O mesmo id de livro aparece mais de uma vez no lote"
+                )
+
+            updated_at = utc_now()
+            version = _bump_catalog_version(db, updated_at)
+            rows = [_upsert_row(book_data, version, updated_at) for book_data in books]
+            book_ids = [row["book_id"] for row in rows]
+
+            # Um único INSERT ... ON CONFLICT DO UPDATE ... RETURNING por bloco, com commit único
+            upserted_books = {}
+            for rows_chunk in _chunks(rows, chunk_size):
+                for book in db.execute(_upsert_statement(db, rows_chunk)).mappings():
+                    upserted_books[book["book_id"]] = book
+            _log_changes(db, book_ids, Change_Model.CHANGE_UPSERT, version, updated_at)
+            db.commit()
+            self._after_commit(db)
+
+            # A ordem do RETURNING não é garantida, então a resposta segue a ordem do lote
+            return [_row_json(upserted_books[book_id]) for book_id in book_ids]
+        except HTTPException:
+            db.rollback()
+            raise
+        except IntegrityError:
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Conflito: um ou mais livros já existem na StandLivros com o mesmo título e categoria"
+            )
+        except Exception as error:
+            # Reverte qualquer mudança não confirmada no banco de dados
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao atualizar ou criar livros: {str(error)}"
+            )
+
+    # Reajusta o valor de todos os livros filtrados com um único UPDATE ... WHERE ... RETURNING, na mesma
+    # transação do contador de alterações do catálogo. Com `dry_run`, apenas conta os livros afetados
+    # (contagem atendida pelos índices compostos quando os filtros são categoria exata e faixa de valor).
+    def adjust_prices(
+        self,
+        db: Session,
+        operation: str,
+        value: float,
+        ids: list = None,
+        dry_run: bool = False,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None
+    ):
+        _validate_price_operation(operation, value)
+        validate_price_range(valor_min, valor_max)
+        conditions = _filter_conditions(
+            titulo=titulo, autor=autor, categoria=categoria,
+            categoria_exata=categoria_exata, valor_min=valor_min, valor_max=valor_max, ids=ids
+        )
+        if not conditions:
+            # Evita reajustar o catálogo inteiro por engano; `valor_min=0` seleciona todos os livros
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe ao menos um filtro para o reajuste de valores"
+            )
+
+        if dry_run:
+            total = db.execute(select(func.count()).select_from(Book_Model.__table__).where(BOOK_IS_LIVE, *conditions)).scalar_one()
+            return {"total": total, "livros": None}
+
+        try:
+            updated_at = utc_now()
+            version = _bump_catalog_version(db, updated_at)
+            table = Book_Model.__table__
+            books = db.execute(
+                update(table)
+                .where(BOOK_IS_LIVE, *conditions)
+                .values(book_price=_price_expression(operation, value), book_version=version, updated_at=updated_at)
+                .returning(*table.c)
+            ).mappings().all()
+            book_ids = [book["book_id"] for book in books]
+            _log_changes(db, book_ids, Change_Model.CHANGE_UPSERT, version, updated_at)
+            db.commit()
+            self._after_commit(db)
+            return {"total": len(books), "livros": [_row_json(book) for book in books]}
+        except Exception as error:
+            # Reverte qualquer mudança não confirmada no banco de dados
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao reajustar valores: {str(error)}"
+            )
+
+    # Remoção lógica: o livro vira uma marca de remoção (`deleted_at`), com a nova versão e data de
+    # alteração, para que a sincronização com `updated_since` informe a remoção aos clientes
+    def delete_book(self, db: Session, book_id: str, if_match: list = None):
+        try:
+            deleted_at = utc_now()
+            version = _bump_catalog_version(db, deleted_at)
+
+            table = Book_Model.__table__
+            statement = (
+                update(table)
+                .where(table.c.book_id == book_id, BOOK_IS_LIVE)
+                .values(deleted_at=deleted_at, book_version=version, updated_at=deleted_at)
+            )
+            if if_match is not None:
+                statement = _version_condition(statement, if_match)
+
+            if db.execute(statement).rowcount == 0:
+                # Nada foi removido: o livro não existe ou a versão do If-Match não corresponde
+                book_exists = db.execute(select(table.c.book_id).where(table.c.book_id == book_id, BOOK_IS_LIVE)).first()
+                if book_exists:
+                    raise _precondition_failed()
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="Nenhum livro encontrado com o id fornecido"
                 )
-            
-            db.delete(book)
+
+            _log_changes(db, [book_id], Change_Model.CHANGE_DELETE, version, deleted_at)
             db.commit() # Grava as mudanças, se tudo correr bem
+            self._after_commit(db)
             return {"success": "Livro deletado com sucesso", "data": []}
         except HTTPException:
-            # Repassa a exceção para manter o comportamento esperado
+            # Desfaz o incremento do contador e repassa a exceção para manter o comportamento esperado
+            db.rollback()
             raise
         except Exception as error:
             # Reverte qualquer mudança não confirmada no banco de dados
@@ -141,4 +1100,3 @@ class BookService:
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao deletar livro: {str(error)}"
             )
-
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from utils.metrics import cache_requests
+
+# Backends de cache usados pelo `BookService`. Todos expõem a mesma interface: `get(key)` e `set(key, value, ttl)`.
+
+# Cache em memória do processo com expiração por TTL e despejo LRU ao atingir `max_entries`
+class MemoryCache:
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000, default_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            # Marca a entrada como usada recentemente
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+
+            # Remove as entradas usadas há mais tempo quando o limite de tamanho é atingido
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self) -> int:
+        return len(self._entries)
+
+# Cache compartilhado entre processos em um servidor que fala o protocolo Redis.
+# `client` é qualquer objeto compatível com o `redis.Redis` (get e set com `ex`).
+class RedisCache:
+    name = "redis"
+
+    def __init__(self, client, default_ttl: float = 30.0, prefix: str = "standlivros:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def get(self, key: str):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value, ttl: float = None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl or self.default_ttl)))
+
+    def size(self):
+        return None
+
+# Cache de leitura dos livros com invalidação por versões.
+# As chaves dos livros e das listagens levam a versão do catálogo no banco (o contador de alterações, o
+# mesmo do ETag), então uma escrita feita em qualquer processo as invalida, mesmo com o cache `memory` de
+# cada worker. As entradas antigas deixam de ser lidas e expiram pelo TTL. A versão é lida antes da
+# consulta ao banco, então um resultado lido antes de uma escrita nunca é gravado sob a versão nova.
+class BookCache:
+    def __init__(self, backend, ttl: float = None):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats = {"book": {"hits": 0, "misses": 0}, "listing": {"hits": 0, "misses": 0}}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, kind: str, outcome: str):
+        with self._stats_lock:
+            self._stats[kind][outcome] += 1
+        if cache_requests is not None:
+            cache_requests.labels(kind, outcome).inc()
+
+    def book_key(self, book_id: str, catalog_version: int) -> str:
+        return f"book:{book_id}:v{catalog_version}"
+
+    # Chave pelos valores recebidos, sem normalizar: `categoria_exata` diferencia maiúsculas e o `ilike`
+    # do SQLite só as ignora em ASCII, então filtros diferentes podem ter resultados diferentes
+    def listing_key(self, kind: str, catalog_version: int, **params) -> str:
+        params = {name: value for name, value in params.items() if value is not None}
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+        return f"{kind}:v{catalog_version}:{digest}"
+
+    def get(self, kind: str, key: str):
+        value = self.backend.get(key)
+        self._count(kind, "misses" if value is None else "hits")
+        return value
+
+    def set(self, key: str, value):
+        self.backend.set(key, value, self.ttl)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = {kind: dict(counters) for kind, counters in self._stats.items()}
+
+        for counters in stats.values():
+            total = counters["hits"] + counters["misses"]
+            counters["hit_ratio"] = round(counters["hits"] / total, 4) if total else None
+
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl or self.backend.default_ttl,
+            "entries": self.backend.size(),
+            "evictions": getattr(self.backend, "evictions", None),
+            **stats
+        }
+
+# Monta o cache configurado pelas variáveis de ambiente:
+# BOOK_CACHE_BACKEND (none, memory ou redis), BOOK_CACHE_TTL, BOOK_CACHE_MAX_ENTRIES e BOOK_CACHE_REDIS_URL
+def build_book_cache():
+    backend_name = os.getenv("BOOK_CACHE_BACKEND", "memory").lower()
+    ttl = float(os.getenv("BOOK_CACHE_TTL", "30"))
+
+    if backend_name == "none":
+        return None
+    if backend_name == "memory":
+        return BookCache(MemoryCache(max_entries=int(os.getenv("BOOK_CACHE_MAX_ENTRIES", "10000")), default_ttl=ttl))
+    if backend_name == "redis":
+        # Dependência opcional, necessária apenas com o backend Redis
+        import redis
+
+        client = redis.Redis.from_url(os.getenv("BOOK_CACHE_REDIS_URL", "redis://localhost:6379/0"))
+        return BookCache(RedisCache(client, default_ttl=ttl))
+
+    raise ValueError(f"Backend de cache desconhecido: '{backend_name}'")
+
+# Cache compartilhado pelas rotas da API
+book_cache = build_book_cache()
@@ -0,0 +1,165 @@
+import asyncio
+import os
+from db.config import AsyncSessionLocal
+from services.book_service import DEFAULT_CHANGES_LIMIT
+from utils.serialization import dumps
+
+# Difusão das alterações do catálogo para os streams SSE (`GET /books/changes/stream`): uma única tarefa
+# por event loop lê o registro de alterações (`StandLivrosAlteracoes`) a cada intervalo e entrega as
+# alterações novas à fila de cada assinante, então o custo no banco não cresce com a quantidade de clientes.
+
+# Intervalo de leitura do registro de alterações pela tarefa de difusão, em milissegundos
+BOOK_CHANGES_POLL_MS = float(os.getenv("BOOK_CHANGES_POLL_MS", "500"))
+
+# Alterações guardadas na fila de cada assinante; um assinante lento que a enche volta a ler do banco
+BOOK_CHANGES_BUFFER = int(os.getenv("BOOK_CHANGES_BUFFER", "1000"))
+
+# Intervalo sem alterações após o qual o stream envia um comentário de keep-alive, em segundos
+BOOK_CHANGES_HEARTBEAT_SECONDS = float(os.getenv("BOOK_CHANGES_HEARTBEAT_SECONDS", "15"))
+
+KEEP_ALIVE = b": keep-alive\n\n"
+
+# Evento SSE de uma alteração; o `id` é a sequência, reenviada pelo navegador em `Last-Event-ID` ao reconectar
+def sse_event(change: dict) -> bytes:
+    return b"id: %d\nevent: change\ndata: %s\n\n" % (change["seq"], dumps(change))
+
+class _Subscriber:
+    __slots__ = ("queue", "lagged", "seq")
+
+    def __init__(self, buffer: int):
+        self.queue = asyncio.Queue(buffer)
+        # Marcado quando a fila enche: o assinante deixa de receber e se ressincroniza pelo banco
+        self.lagged = False
+        # Sequência a partir da qual as alterações chegam pela fila
+        self.seq = 0
+
+# Assinantes e tarefa de difusão de um event loop
+class _Channel:
+    __slots__ = ("subscribers", "ready", "seq")
+
+    def __init__(self, loop):
+        self.subscribers = set()
+        # Resolvido quando a tarefa de difusão leu a sequência inicial
+        self.ready = loop.create_future()
+        self.seq = 0
+
+class ChangeBroadcaster:
+    def __init__(
+        self,
+        book_service,
+        session_factory=AsyncSessionLocal,
+        interval_ms: float = BOOK_CHANGES_POLL_MS,
+        buffer: int = BOOK_CHANGES_BUFFER,
+        page_size: int = DEFAULT_CHANGES_LIMIT
+    ):
+        self.book_service = book_service
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.buffer = buffer
+        self.page_size = page_size
+        self.errors = 0
+        self._channels = {}
+
+    # Registra um assinante no event loop atual, iniciando a tarefa de difusão se for o primeiro
+    async def subscribe(self) -> _Subscriber:
+        loop = asyncio.get_running_loop()
+        channel = self._channels.get(loop)
+        if channel is None:
+            channel = self._channels[loop] = _Channel(loop)
+            loop.create_task(self._broadcast(loop, channel))
+
+        subscriber = _Subscriber(self.buffer)
+        channel.subscribers.add(subscriber)
+        try:
+            await asyncio.shield(channel.ready)
+        except BaseException:
+            channel.subscribers.discard(subscriber)
+            raise
+        subscriber.seq = channel.seq
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber):
+        channel = self._channels.get(asyncio.get_running_loop())
+        if channel is not None:
+            channel.subscribers.discard(subscriber)
+
+    # Tarefa de difusão: termina sozinha quando o último assinante sai
+    async def _broadcast(self, loop, channel: _Channel):
+        try:
+            async with self.session_factory() as db:
+                channel.seq = await self.book_service.get_change_seq(db)
+        except Exception as error:
+            del self._channels[loop]
+            channel.ready.set_exception(error)
+            # O erro é entregue aos assinantes que aguardam; sem nenhum, evita o aviso de exceção não lida
+            channel.ready.exception()
+            return
+        channel.ready.set_result(None)
+
+        while True:
+            await asyncio.sleep(self.interval)
+            if not channel.subscribers:
+                del self._channels[loop]
+                return
+            try:
+                await self._publish(channel)
+            except Exception:
+                # Mantém a posição atual e tenta de novo no próximo intervalo
+                self.errors += 1
+
+    async def _publish(self, channel: _Channel):
+        async with self.session_factory() as db:
+            has_more = True
+            while has_more:
+                changes, channel.seq, has_more = await self.book_service.get_changes(db, since=channel.seq, limit=self.page_size)
+                for subscriber in list(channel.subscribers):
+                    for change in changes:
+                        try:
+                            subscriber.queue.put_nowait(change)
+                        except asyncio.QueueFull:
+                            subscriber.lagged = True
+                            channel.subscribers.discard(subscriber)
+                            break
+
+    # Alterações com sequência maior que `since` lidas do banco, em páginas
+    async def _read_changes(self, since: int):
+        async with self.session_factory() as db:
+            has_more = True
+            while has_more:
+                changes, since, has_more = await self.book_service.get_changes(db, since=since, limit=self.page_size)
+                for change in changes:
+                    yield change
+
+    # Eventos SSE das alterações com sequência maior que `since` (sem `since`, apenas as novas). As
+    # alterações anteriores à assinatura vêm do banco; as seguintes, da fila. Repetições entre as duas
+    # fontes são descartadas pela sequência.
+    async def events(self, since: int = None, heartbeat: float = BOOK_CHANGES_HEARTBEAT_SECONDS):
+        subscriber = await self.subscribe()
+        last = subscriber.seq if since is None else since
+        try:
+            while True:
+                async for change in self._read_changes(last):
+                    yield sse_event(change)
+                    last = change["seq"]
+
+                while not (subscriber.lagged and subscriber.queue.empty()):
+                    try:
+                        change = await asyncio.wait_for(subscriber.queue.get(), heartbeat)
+                    except TimeoutError:
+                        yield KEEP_ALIVE
+                        continue
+                    if change["seq"] > last:
+                        yield sse_event(change)
+                        last = change["seq"]
+
+                # A fila encheu: assina de novo e lê do banco o que foi perdido
+                subscriber = await self.subscribe()
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(channel.subscribers) for channel in self._channels.values()),
+            "seq": max((channel.seq for channel in self._channels.values()), default=None),
+            "errors": self.errors,
+        }
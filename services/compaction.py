@@ -0,0 +1,88 @@
+import os
+import threading
+from datetime import timedelta
+from db.book_models import utc_now
+from db.config import SessionLocal
+from services.book_service import BookService, TOMBSTONE_RETENTION_DAYS
+
+# Compactação das marcas de remoção: livros removidos há mais de `BOOK_TOMBSTONE_RETENTION_DAYS` são
+# expurgados da tabela em lotes pequenos, cada um em uma transação curta, por uma thread do processo.
+
+# Liga a compactação periódica no ciclo de vida da aplicação
+BOOK_COMPACTION_ENABLED = os.getenv("BOOK_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Intervalo entre as compactações, em segundos
+BOOK_COMPACTION_INTERVAL_SECONDS = float(os.getenv("BOOK_COMPACTION_INTERVAL_SECONDS", "3600"))
+
+# Marcas de remoção expurgadas por transação
+BOOK_COMPACTION_BATCH_SIZE = int(os.getenv("BOOK_COMPACTION_BATCH_SIZE", "500"))
+
+# Pausa entre os lotes, em segundos, para não disputar o banco com as requisições
+BOOK_COMPACTION_PAUSE_SECONDS = float(os.getenv("BOOK_COMPACTION_PAUSE_SECONDS", "0.05"))
+
+class TombstoneCompactor:
+    def __init__(
+        self,
+        book_service: BookService = None,
+        session_factory=SessionLocal,
+        retention_days: float = TOMBSTONE_RETENTION_DAYS,
+        interval_seconds: float = BOOK_COMPACTION_INTERVAL_SECONDS,
+        batch_size: int = BOOK_COMPACTION_BATCH_SIZE,
+        pause_seconds: float = BOOK_COMPACTION_PAUSE_SECONDS
+    ):
+        self.book_service = book_service or BookService()
+        self.session_factory = session_factory
+        self.retention = timedelta(days=retention_days)
+        self.interval = interval_seconds
+        self.batch_size = batch_size
+        self.pause = pause_seconds
+        self.purged = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # Expurga todas as marcas de remoção vencidas, lote a lote, e retorna a quantidade expurgada
+    def compact(self) -> int:
+        older_than = utc_now() - self.retention
+        purged = 0
+        while not self._stop.is_set():
+            with self.session_factory() as db:
+                batch = self.book_service.purge_tombstones(db, older_than, batch_size=self.batch_size)
+            purged += batch
+            self.purged += batch
+            if batch < self.batch_size:
+                break
+            self._stop.wait(self.pause)
+        return purged
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="tombstone-compaction", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                self.compact()
+            except Exception:
+                # Tenta de novo na próxima compactação
+                self.errors += 1
+            if self._stop.wait(self.interval):
+                return
+
+    def stats(self) -> dict:
+        return {"purged": self.purged, "errors": self.errors, "retention_days": self.retention.total_seconds() / 86400}
+
+# Compactação do processo da API, iniciada no ciclo de vida da aplicação
+tombstone_compactor = TombstoneCompactor() if BOOK_COMPACTION_ENABLED else None
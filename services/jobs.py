@@ -0,0 +1,264 @@
+import os
+import queue
+import threading
+import uuid
+from datetime import timedelta
+from typing import List
+from fastapi import HTTPException, status
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import func, insert, select, update
+from db.book_models import Job_Model, utc_now
+from db.book_schemas import BookModel, PriceAdjustment
+from db.config import SessionLocal
+from services.book_service import BookService, INSERT_CHUNK_SIZE, _chunks, _validate_price_operation, validate_price_range
+
+# Tarefas em segundo plano para operações longas do catálogo. A requisição só grava a tarefa na tabela
+# `StandLivrosJobs` e responde com o id; um pool de threads do próprio processo executa as operações
+# do `BookService` com sessões síncronas, sem ocupar o event loop nem as conexões do pool assíncrono.
+
+# Quantidade de tarefas executadas ao mesmo tempo em cada processo
+JOB_WORKERS = int(os.getenv("BOOK_JOB_WORKERS", "2"))
+
+# Quantidade máxima de tarefas pendentes; acima dela novas tarefas são recusadas com 503
+JOB_MAX_PENDING = int(os.getenv("BOOK_JOB_MAX_PENDING", "100"))
+
+# Tempo sem progresso após o qual uma tarefa em execução é considerada interrompida e volta para a fila
+JOB_STALE_SECONDS = float(os.getenv("BOOK_JOB_STALE_SECONDS", "300"))
+
+# Sugestão de espera (cabeçalho `Retry-After`) quando a fila está cheia, em segundos
+JOB_RETRY_AFTER_SECONDS = 5
+
+# Estados de uma tarefa
+JOB_PENDING = "pendente"
+JOB_RUNNING = "executando"
+JOB_SUCCEEDED = "concluido"
+JOB_FAILED = "falhou"
+
+BOOK_LIST = TypeAdapter(List[BookModel])
+PRICE_ADJUSTMENT = TypeAdapter(PriceAdjustment)
+
+# Cria os livros de uma só vez, como no `POST /books` (tudo-ou-nada). Cada bloco inserido renova o
+# `updated_at` da tarefa, para que `recover()` não a devolva para a fila no meio de uma carga longa. No
+# SQLite, que aceita uma escrita por vez, a transação própria do sinal de vida esperaria pela inserção, e
+# nenhum outro processo consegue reivindicar a tarefa enquanto ela grava.
+def _create_books(book_service: BookService, db, books: list, report):
+    heartbeat = None if db.get_bind().dialect.name == "sqlite" else lambda inserted: report()
+    created_books = book_service.create_book(db, books, on_chunk=heartbeat)
+    report(len(created_books))
+    return {"criados": len(created_books), "ids": [book["id"] for book in created_books]}
+
+# Atualiza ou cria os livros em blocos, como no `PUT /books/bulk`; cada bloco é confirmado e
+# informado no progresso, então uma falha preserva os blocos anteriores
+def _update_books(book_service: BookService, db, books: list, report):
+    updated = 0
+    for books_chunk in _chunks(books, INSERT_CHUNK_SIZE):
+        updated += len(book_service.update_books(db, books_chunk))
+        report(updated)
+    return {"atualizados": updated}
+
+# Reajusta os valores dos livros filtrados, como no `PATCH /books/prices`
+def _adjust_prices(book_service: BookService, db, adjustment: dict, report):
+    result = book_service.adjust_prices(db, adjustment["operacao"], adjustment["valor"], **adjustment["filtro"])
+    report(1)
+    return {"reajustados": result["total"]}
+
+# Operações aceitas em `POST /jobs`: validação dos dados e função executada pelo worker
+JOB_OPERATIONS = {
+    "create_books": (BOOK_LIST, _create_books),
+    "update_books": (BOOK_LIST, _update_books),
+    "adjust_prices": (PRICE_ADJUSTMENT, _adjust_prices),
+}
+
+# Formato JSON da tarefa
+def job_json(job) -> dict:
+    return {
+        "id": job.job_id,
+        "operacao": job.job_operation,
+        "status": job.job_status,
+        "progresso": job.job_progress,
+        "total": job.job_total,
+        "resultado": job.job_result,
+        "erro": job.job_error,
+        "criado_em": job.created_at,
+        "iniciado_em": job.started_at,
+        "concluido_em": job.finished_at,
+    }
+
+# Validações do `PATCH /books/prices` que não dependem do banco, feitas já no envio da tarefa (400)
+def _validate_adjustment(adjustment: PriceAdjustment):
+    _validate_price_operation(adjustment.operacao, adjustment.valor)
+    validate_price_range(adjustment.filtro.valor_min, adjustment.filtro.valor_max)
+
+# Valida os dados da operação e os converte para o formato gravado na tarefa
+def _validated_payload(operation: str, payload):
+    if operation not in JOB_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Operação desconhecida: '{operation}'. Operações aceitas: {', '.join(sorted(JOB_OPERATIONS))}"
+        )
+    adapter, _ = JOB_OPERATIONS[operation]
+    try:
+        validated = adapter.validate_python(payload)
+    except ValidationError as error:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Dados inválidos para '{operation}': {error.errors()[0]['msg']} em {list(error.errors()[0]['loc'])}"
+        )
+    if operation == "adjust_prices":
+        _validate_adjustment(validated)
+    return adapter.dump_python(validated, mode="json")
+
+# Fila de tarefas com concorrência limitada a `workers` threads. As tarefas pendentes vêm do banco;
+# a fila em memória só guarda os ids, e cada worker reivindica a tarefa com um UPDATE condicional,
+# então a mesma tarefa nunca roda duas vezes, mesmo com vários processos.
+class JobQueue:
+    def __init__(
+        self,
+        book_service: BookService = None,
+        session_factory=SessionLocal,
+        workers: int = JOB_WORKERS,
+        max_pending: int = JOB_MAX_PENDING,
+        stale_seconds: float = JOB_STALE_SECONDS
+    ):
+        self.book_service = book_service or BookService()
+        self.session_factory = session_factory
+        self.workers = workers
+        self.max_pending = max_pending
+        self.stale_seconds = stale_seconds
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    # Inicia os workers (uma única vez) e coloca na fila as tarefas pendentes ou interrompidas
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            for job_id in self.recover():
+                self._queue.put(job_id)
+            self._threads = [
+                threading.Thread(target=self._work, name=f"book-job-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    # Encerra os workers depois das tarefas em execução; as pendentes continuam no banco
+    def stop(self, timeout: float = None):
+        with self._lock:
+            threads, self._threads = self._threads, []
+            # Descarta os ids em memória: a tarefa continua pendente no banco e é retomada no próximo início
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            for _ in threads:
+                self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
+
+    # Devolve para a fila as tarefas em execução sem progresso recente e retorna os ids pendentes
+    def recover(self):
+        with self.session_factory() as db:
+            table = Job_Model.__table__
+            db.execute(
+                update(table)
+                .where(table.c.job_status == JOB_RUNNING, table.c.updated_at < utc_now() - timedelta(seconds=self.stale_seconds))
+                .values(job_status=JOB_PENDING, updated_at=utc_now())
+            )
+            db.commit()
+            return list(db.scalars(
+                select(table.c.job_id).where(table.c.job_status == JOB_PENDING).order_by(table.c.created_at)
+            ))
+
+    # Grava a tarefa e a coloca na fila. Com `max_pending` tarefas pendentes, recusa com 503 (backpressure).
+    def submit(self, operation: str, payload) -> dict:
+        payload = _validated_payload(operation, payload)
+        table = Job_Model.__table__
+        with self.session_factory() as db:
+            pending = db.scalar(select(func.count()).select_from(table).where(table.c.job_status == JOB_PENDING))
+            if pending >= self.max_pending:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=f"Fila de tarefas cheia ({pending} pendentes); tente novamente mais tarde",
+                    headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)}
+                )
+
+            now = utc_now()
+            job = db.execute(
+                insert(table)
+                .values(
+                    job_id=str(uuid.uuid4()),
+                    job_operation=operation,
+                    job_status=JOB_PENDING,
+                    job_payload=payload,
+                    job_progress=0,
+                    job_total=len(payload) if isinstance(payload, list) else 1,
+                    created_at=now,
+                    updated_at=now
+                )
+                .returning(*table.c)
+            ).one()
+            db.commit()
+
+        self.start()
+        self._queue.put(job.job_id)
+        return job_json(job)
+
+    def get(self, job_id: str) -> dict:
+        with self.session_factory() as db:
+            job = db.get(Job_Model, job_id)
+            if job is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Nenhuma tarefa encontrada com o id fornecido"
+                )
+            return job_json(job)
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                return
+            self.run(job_id)
+
+    # Atualiza a tarefa em uma transação própria, separada da transação da operação
+    def _update(self, job_id: str, **values):
+        table = Job_Model.__table__
+        with self.session_factory() as db:
+            result = db.execute(update(table).where(table.c.job_id == job_id).values(**values, updated_at=utc_now()))
+            db.commit()
+            return result.rowcount
+
+    # Grava o progresso da tarefa; sem `progress`, só renova o `updated_at` (sinal de vida para `recover`)
+    def _report(self, job_id: str, progress: int = None):
+        if progress is None:
+            self._update(job_id)
+        else:
+            self._update(job_id, job_progress=progress)
+
+    # Reivindica e executa uma tarefa pendente; retorna falso se outro worker já a reivindicou
+    def run(self, job_id: str) -> bool:
+        table = Job_Model.__table__
+        with self.session_factory() as db:
+            claimed = db.execute(
+                update(table)
+                .where(table.c.job_id == job_id, table.c.job_status == JOB_PENDING)
+                .values(job_status=JOB_RUNNING, started_at=utc_now(), updated_at=utc_now())
+                .returning(table.c.job_operation, table.c.job_payload)
+            ).first()
+            db.commit()
+            if claimed is None:
+                return False
+
+            _, operation = JOB_OPERATIONS[claimed.job_operation]
+            try:
+                result = operation(self.book_service, db, claimed.job_payload, lambda progress=None: self._report(job_id, progress))
+            except HTTPException as error:
+                self._update(job_id, job_status=JOB_FAILED, job_error=str(error.detail), finished_at=utc_now())
+                return True
+            except Exception as error:
+                db.rollback()
+                self._update(job_id, job_status=JOB_FAILED, job_error=f"Erro inesperado: {error}", finished_at=utc_now())
+                return True
+
+        self._update(job_id, job_status=JOB_SUCCEEDED, job_result=result, finished_at=utc_now())
+        return True
@@ -0,0 +1,384 @@
+import math
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from datetime import datetime, timezone
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from db.book_models import Book_Model, Catalog_Model, Change_Model
+from db.config import SessionLocal
+from utils.conditional import as_utc
+
+# Réplica de leitura do catálogo na memória do processo, em formato colunar: `list_books`, as páginas de
+# `list_books_page` e `get_book` são respondidos sem consultar o banco. A réplica é carregada uma vez e atualizada de forma incremental
+# pelo registro de alterações (`StandLivrosAlteracoes`). Cada ordenação das páginas tem um índice ordenado
+# próprio, e uma página começa por busca binária na chave do cursor, como o keyset das consultas.
+
+# Liga a réplica em memória no `BookService` das rotas
+BOOK_SNAPSHOT_ENABLED = os.getenv("BOOK_SNAPSHOT_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Intervalo da atualização em segundo plano, que traz as alterações feitas por outros processos
+BOOK_SNAPSHOT_REFRESH_MS = float(os.getenv("BOOK_SNAPSHOT_REFRESH_MS", "1000"))
+
+# Quantidade de livros alterados lidos por consulta `IN` na atualização
+SNAPSHOT_CHUNK_SIZE = 900
+
+# Atributos com o conteúdo da réplica, trocados juntos quando o catálogo é recarregado
+SNAPSHOT_COLUMNS = (
+    "_ids", "_titles", "_authors", "_categories", "_prices", "_versions", "_updated_at",
+    "_free", "_rows", "_postings", "_indexes", "_author_vocabulary", "_category_vocabulary",
+)
+
+# Ordenações das páginas (`sort`), cada uma com seu índice ordenado
+SNAPSHOT_SORTS = (None, "titulo", "autor", "valor")
+
+# Com filtro de categoria, as posições das categorias são ordenadas a cada página quando somam menos que
+# essa fração dos livros; acima dela, a página percorre o índice da ordenação descartando as demais
+SNAPSHOT_SPARSE_FRACTION = 0.1
+
+# Chave de ordenação de um valor, que pode ser nulo: os nulos vêm antes, como no SQLite
+def _price_key(price):
+    return (False, 0.0) if price is None else (True, price)
+
+# Índice de cada valor distinto (autores, categorias): a réplica guarda só o número de cada livro
+class _Vocabulary:
+    __slots__ = ("values", "index")
+
+    def __init__(self):
+        self.values = []
+        self.index = {}
+
+    def intern(self, value: str) -> int:
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.values)
+            self.values.append(value)
+        return position
+
+    # Posições dos valores que contêm `needle`, sem diferenciar maiúsculas (como o `ilike` das consultas)
+    def matching(self, needle: str) -> set:
+        needle = needle.lower()
+        return {position for position, value in enumerate(self.values) if needle in value.lower()}
+
+class CatalogSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.loaded = False
+        # Última alteração do registro aplicada na réplica e a versão do catálogo correspondente
+        self.seq = 0
+        self.catalog_version = 0
+        self.catalog_updated_at = None
+        self._reset()
+
+    def _reset(self):
+        # Uma posição por livro em cada coluna; posições de livros removidos ficam livres para reuso
+        self._ids = []
+        self._titles = []
+        self._authors = array("I")
+        self._categories = array("I")
+        # Valores nulos ficam como NaN, que não passa nos filtros de faixa (como NULL nas consultas)
+        self._prices = array("d")
+        self._versions = array("q")
+        self._updated_at = array("d")
+        self._free = []
+        # Índice hash pelo `book_id`, listas de posições por categoria e, por ordenação, as chaves
+        # (coluna ordenada, `book_id`) em ordem
+        self._rows = {}
+        self._postings = {}
+        self._indexes = {sort: [] for sort in SNAPSHOT_SORTS}
+        self._author_vocabulary = _Vocabulary()
+        self._category_vocabulary = _Vocabulary()
+
+    # Carrega o catálogo inteiro. A sequência é lida antes dos livros: alterações feitas durante a
+    # leitura são aplicadas de novo na próxima atualização, sem efeito nos livros já atualizados.
+    # As colunas novas são montadas fora do lock e trocadas de uma vez, sem bloquear as leituras.
+    def load(self, db: Session):
+        seq = db.execute(select(func.coalesce(func.max(Change_Model.change_seq), 0))).scalar_one()
+        catalog = db.execute(
+            select(Catalog_Model.change_counter, Catalog_Model.updated_at)
+            .where(Catalog_Model.catalog_id == Catalog_Model.CATALOG_ID)
+        ).one()
+        fresh = CatalogSnapshot()
+        for book in db.execute(select(Book_Model.__table__).where(Book_Model.deleted_at.is_(None))).mappings():
+            fresh._apply(book, index=False)
+        # Os índices ordenados são montados de uma vez no fim, e não livro a livro
+        for sort, keys in fresh._indexes.items():
+            keys.extend(fresh._index_key(sort, row) for row in fresh._rows.values())
+            keys.sort()
+
+        with self._lock:
+            for name in SNAPSHOT_COLUMNS:
+                setattr(self, name, getattr(fresh, name))
+            self.seq = seq
+            self.catalog_version, self.catalog_updated_at = catalog.change_counter, as_utc(catalog.updated_at)
+            self.loaded = True
+
+    # Aplica as alterações registradas depois da última aplicada; retorna a quantidade aplicada
+    def refresh(self, db: Session) -> int:
+        if not self.loaded:
+            self.load(db)
+            return 0
+
+        seq = self.seq
+        changes = db.execute(
+            select(Change_Model.change_seq, Change_Model.book_id, Change_Model.catalog_version, Change_Model.changed_at)
+            .where(Change_Model.change_seq > seq)
+            .order_by(Change_Model.change_seq)
+        ).all()
+        if not changes:
+            return 0
+
+        # O estado atual de cada livro alterado: os que não existem mais (ou são marcas de remoção) foram removidos
+        book_ids = list(dict.fromkeys(change.book_id for change in changes))
+        table = Book_Model.__table__
+        books = {}
+        for index in range(0, len(book_ids), SNAPSHOT_CHUNK_SIZE):
+            chunk = book_ids[index:index + SNAPSHOT_CHUNK_SIZE]
+            for book in db.execute(select(table).where(table.c.book_id.in_(chunk))).mappings():
+                books[book["book_id"]] = book
+
+        with self._lock:
+            # Outra atualização concorrente já aplicou essas alterações
+            if self.seq != seq:
+                return 0
+            for book_id in book_ids:
+                if book_id in books and books[book_id]["deleted_at"] is None:
+                    self._apply(books[book_id])
+                else:
+                    self._remove(book_id)
+            self.seq = changes[-1].change_seq
+            self.catalog_version, self.catalog_updated_at = changes[-1].catalog_version, as_utc(changes[-1].changed_at)
+        return len(changes)
+
+    def _apply(self, book, index: bool = True):
+        row = self._rows.get(book["book_id"])
+        if row is not None and self._versions[row] > book["book_version"]:
+            return
+
+        author = self._author_vocabulary.intern(book["book_author"])
+        category = self._category_vocabulary.intern(book["book_category"])
+        price = book["book_price"]
+        values = (
+            book["book_title"], author, category, math.nan if price is None else price,
+            book["book_version"], as_utc(book["updated_at"]).timestamp()
+        )
+
+        if row is None:
+            row = self._free.pop() if self._free else None
+            if row is None:
+                row = len(self._ids)
+                self._ids.append(book["book_id"])
+                self._titles.append(None)
+                for column in (self._authors, self._categories, self._prices, self._versions, self._updated_at):
+                    column.append(0)
+            self._ids[row] = book["book_id"]
+            self._rows[book["book_id"]] = row
+        else:
+            self._postings[self._categories[row]].remove(row)
+            self._unindex(row)
+
+        (self._titles[row], self._authors[row], self._categories[row],
+         self._prices[row], self._versions[row], self._updated_at[row]) = values
+        self._postings.setdefault(category, array("I")).append(row)
+        if index:
+            for sort, keys in self._indexes.items():
+                insort(keys, self._index_key(sort, row))
+
+    def _remove(self, book_id: str):
+        row = self._rows.pop(book_id, None)
+        if row is None:
+            return
+        self._postings[self._categories[row]].remove(row)
+        self._unindex(row)
+        self._ids[row] = None
+        self._titles[row] = None
+        self._free.append(row)
+
+    # Remove as chaves de uma posição dos índices ordenados, antes de alterar ou liberar a posição
+    def _unindex(self, row: int):
+        for sort, keys in self._indexes.items():
+            del keys[bisect_left(keys, self._index_key(sort, row))]
+
+    def _price(self, row: int):
+        price = self._prices[row]
+        return None if math.isnan(price) else price
+
+    # Valor da coluna ordenada por `sort` em uma posição, guardado no cursor da página
+    def _sort_value(self, sort: str, row: int):
+        if sort == "titulo":
+            return self._titles[row]
+        if sort == "autor":
+            return self._author_vocabulary.values[self._authors[row]]
+        if sort == "valor":
+            return self._price(row)
+        return None
+
+    # Chave de uma posição no índice da ordenação `sort`: (coluna ordenada, `book_id`), ou só o `book_id`
+    def _index_key(self, sort: str, row: int) -> tuple:
+        if sort is None:
+            return (self._ids[row],)
+        if sort == "valor":
+            return (*_price_key(self._price(row)), self._ids[row])
+        return (self._sort_value(sort, row), self._ids[row])
+
+    def _book_json(self, row: int) -> dict:
+        return {
+            "id": self._ids[row],
+            "titulo": self._titles[row],
+            "autor": self._author_vocabulary.values[self._authors[row]],
+            "categoria": self._category_vocabulary.values[self._categories[row]],
+            "valor": self._price(row),
+        }
+
+    # Entrada do livro no mesmo formato de `BookService.get_book_entry`, ou None se ele não existir
+    def get_entry(self, book_id: str):
+        with self._lock:
+            row = self._rows.get(book_id)
+            if row is None:
+                return None
+            return {
+                "book": self._book_json(row),
+                "version": self._versions[row],
+                "updated_at": datetime.fromtimestamp(self._updated_at[row], timezone.utc).isoformat(),
+            }
+
+    def get_book_entry(self, book_id: str):
+        entry = self.get_entry(book_id)
+        if entry is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Nenhum livro encontrado com o id fornecido"
+            )
+        return entry
+
+    # Versão do catálogo aplicada na réplica e a data dessa alteração, como em `BookService.get_catalog_version`
+    def version(self):
+        with self._lock:
+            return self.catalog_version, self.catalog_updated_at
+
+    # Filtros das listagens: trecho do título, do autor e da categoria, categoria exata e faixa de valor.
+    # Retorna as posições das categorias filtradas (None sem filtro de categoria), vindas das listas de
+    # posições, e as condições dos demais filtros; o autor compara apenas os números internados. Chamado com o lock.
+    def _filters(
+        self,
+        titulo: str = None,
+        autor: str = None,
+        categoria: str = None,
+        categoria_exata: str = None,
+        valor_min: float = None,
+        valor_max: float = None
+    ):
+        candidates = None
+        if categoria or categoria_exata is not None:
+            positions = self._category_vocabulary.matching(categoria) if categoria else None
+            if categoria_exata is not None:
+                exact = self._category_vocabulary.index.get(categoria_exata)
+                positions = {exact} if exact is not None and (positions is None or exact in positions) else set()
+            candidates = set()
+            for position in positions:
+                candidates.update(self._postings.get(position, ()))
+
+        checks = []
+        if autor:
+            authors = self._author_vocabulary.matching(autor)
+            checks.append(lambda row: self._authors[row] in authors)
+        if titulo:
+            needle = titulo.lower()
+            checks.append(lambda row: needle in self._titles[row].lower())
+        if valor_min is not None:
+            checks.append(lambda row: self._prices[row] >= valor_min)
+        if valor_max is not None:
+            checks.append(lambda row: self._prices[row] <= valor_max)
+        return candidates, checks
+
+    # Mesmos filtros de `BookService.list_books`: trecho do título, do autor e da categoria
+    def list_books(self, titulo: str = None, autor: str = None, categoria: str = None):
+        with self._lock:
+            candidates, checks = self._filters(titulo=titulo, autor=autor, categoria=categoria)
+            rows = sorted(candidates) if candidates is not None else (row for row in range(len(self._ids)) if self._ids[row] is not None)
+            return [self._book_json(row) for row in rows if all(check(row) for check in checks)]
+
+    # Página de `BookService.list_books_page`: até `limit` livros filtrados na ordenação pedida, depois da
+    # chave `after` do cursor, como o keyset das consultas. Retorna pares (livro, valor da coluna ordenada).
+    # A página começa por busca binária no índice da ordenação e percorre só os livros até completá-la.
+    def list_books_page(self, limit: int, sort: str = None, order: str = "asc", after: tuple = None, **filters):
+        if after is not None and sort == "valor":
+            after = (*_price_key(after[0]), after[1])
+        with self._lock:
+            candidates, checks = self._filters(**filters)
+            if candidates is not None and len(candidates) < len(self._rows) * SNAPSHOT_SPARSE_FRACTION:
+                keys = sorted(self._index_key(sort, row) for row in candidates)
+            else:
+                keys = self._indexes[sort]
+                if candidates is not None:
+                    checks.insert(0, candidates.__contains__)
+
+            if order == "desc":
+                end = bisect_left(keys, after) if after is not None else len(keys)
+                walk = (keys[position] for position in range(end - 1, -1, -1))
+            else:
+                walk = islice(keys, bisect_right(keys, after) if after is not None else 0, None)
+
+            page = []
+            for key in walk:
+                row = self._rows[key[-1]]
+                if all(check(row) for check in checks):
+                    page.append((self._book_json(row), self._sort_value(sort, row)))
+                    if len(page) == limit:
+                        break
+            return page
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": self.loaded,
+                "seq": self.seq,
+                "catalog_version": self.catalog_version,
+                "books": len(self._rows),
+                "authors": len(self._author_vocabulary.values),
+                "categories": len(self._category_vocabulary.values),
+            }
+
+# Atualiza a réplica periodicamente em uma thread, com sessões síncronas próprias
+class SnapshotRefresher:
+    def __init__(self, snapshot: CatalogSnapshot, session_factory=SessionLocal, interval_ms: float = BOOK_SNAPSHOT_REFRESH_MS):
+        self.snapshot = snapshot
+        self.session_factory = session_factory
+        self.interval = interval_ms / 1000
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="catalog-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self):
+        while True:
+            try:
+                with self.session_factory() as db:
+                    self.snapshot.refresh(db)
+            except Exception:
+                # Mantém a réplica atual e tenta de novo no próximo intervalo
+                self.errors += 1
+            if self._stop.wait(self.interval):
+                return
+
+# Réplica compartilhada pelas rotas da API e seu atualizador, quando `BOOK_SNAPSHOT_ENABLED` está ligado
+book_snapshot = CatalogSnapshot() if BOOK_SNAPSHOT_ENABLED else None
+snapshot_refresher = SnapshotRefresher(book_snapshot) if book_snapshot is not None else None
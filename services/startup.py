@@ -0,0 +1,95 @@
+import asyncio
+import contextlib
+import os
+import time
+from sqlalchemy import text
+from db.config import DATABASE_URL, POOL_SETTINGS, AsyncSessionLocal, SessionLocal, async_engine, engine, ensure_shared_database
+from db.migrations import migrate
+
+# Inicialização de cada worker da API antes de aceitar tráfego: migração (opcional, quando não foi feita
+# antes dos workers), conexões abertas nos pools e caches aquecidos. A prontidão (`GET /health/ready`)
+# só é informada depois dessas etapas.
+
+# Executa a migração no ciclo de vida; o `server.py` migra uma vez antes dos workers e desliga aqui
+BOOK_MIGRATE_ON_STARTUP = os.getenv("BOOK_MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# Conexões abertas em cada pool na inicialização (limitadas ao `DB_POOL_SIZE`)
+DB_POOL_PREWARM = int(os.getenv("DB_POOL_PREWARM", str(POOL_SETTINGS["pool_size"])))
+
+class StartupState:
+    def __init__(self):
+        self.ready = False
+        self.error = None
+        self.steps = {}
+
+    # Executa uma etapa da inicialização e registra sua duração em milissegundos
+    async def step(self, name: str, function, *args):
+        start = time.perf_counter()
+        try:
+            return await function(*args)
+        finally:
+            self.steps[name] = round((time.perf_counter() - start) * 1000, 3)
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "error": self.error, "steps_ms": dict(self.steps)}
+
+# Conexões a abrir em um pool: pools sem tamanho (SQLite em memória) mantêm uma só
+def _prewarm_size(pool, connections: int) -> int:
+    size = getattr(pool, "size", None)
+    return max(1, min(connections, size())) if size is not None else 1
+
+# Abre as conexões do pool assíncrono ao mesmo tempo e as devolve ao pool, já estabelecidas
+async def prewarm_async_pool(async_engine=async_engine, connections: int = DB_POOL_PREWARM):
+    total = _prewarm_size(async_engine.sync_engine.pool, connections)
+    async with contextlib.AsyncExitStack() as stack:
+        opened = await asyncio.gather(*(stack.enter_async_context(async_engine.connect()) for _ in range(total)))
+        await asyncio.gather(*(connection.execute(text("SELECT 1")) for connection in opened))
+    return total
+
+# Mesmo aquecimento no pool síncrono, usado pelas tarefas em segundo plano e pela réplica em memória
+def prewarm_sync_pool(engine=engine, connections: int = DB_POOL_PREWARM):
+    total = _prewarm_size(engine.pool, connections)
+    with contextlib.ExitStack() as stack:
+        for _ in range(total):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+    return total
+
+# Aquece a versão do catálogo e a primeira página da listagem no cache, e carrega a réplica em memória
+async def warm_caches(book_service, snapshot=None):
+    async with AsyncSessionLocal() as db:
+        change_counter, _ = await book_service.get_catalog_version(db)
+        await book_service.list_books_page(db, catalog_version=change_counter)
+    if snapshot is not None:
+        def load_snapshot():
+            with SessionLocal() as db:
+                snapshot.refresh(db)
+        await asyncio.to_thread(load_snapshot)
+
+# Inicialização completa do worker. Um banco em memória e falhas da migração interrompem o worker; falhas
+# do aquecimento ficam registradas e a prontidão passa a depender do teste de conexão do `GET /health/ready`.
+async def start_up(
+    state: StartupState,
+    book_service,
+    snapshot=None,
+    migrate_schema: bool = BOOK_MIGRATE_ON_STARTUP,
+    database_url: str = DATABASE_URL
+):
+    state.ready, state.error = False, None
+    ensure_shared_database(database_url)
+    if migrate_schema:
+        await state.step("migrate", asyncio.to_thread, migrate, engine)
+    try:
+        await state.step("async_pool", prewarm_async_pool)
+        await state.step("sync_pool", asyncio.to_thread, prewarm_sync_pool)
+        await state.step("caches", warm_caches, book_service, snapshot)
+    except Exception as error:
+        state.error = f"{type(error).__name__}: {error}"
+    state.ready = True
+
+# Teste de conexão da prontidão, com uma conexão do pool assíncrono
+async def ping_database(async_engine=async_engine):
+    async with async_engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+# Estado da inicialização do processo, consultado pelos endpoints de saúde
+startup_state = StartupState()
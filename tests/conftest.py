@@ -0,0 +1,9 @@
+import pytest
+from db.config import engine
+from db.migrations import migrate
+
+# A aplicação não cria mais o esquema ao ser importada: os testes que usam o banco configurado
+# (`DATABASE_URL`) o migram uma vez por sessão, como o `server.py` faz antes de iniciar os workers
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    migrate(engine)
@@ -0,0 +1,124 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from db.config import Base, to_async_url
+from services.async_book_service import AsyncBookService
+from fastapi import HTTPException
+
+# Executa o cenário de teste com uma sessão assíncrona sobre SQLite em memória (aiosqlite)
+def run_with_session(scenario):
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+
+        TestingAsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        try:
+            async with TestingAsyncSessionLocal() as db:
+                return await scenario(db)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+# Instancia o serviço 'AsyncBookService' que será testado
+@pytest.fixture
+def book_service():
+    return AsyncBookService()
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert to_async_url("postgresql+psycopg2://user:secret@db:5432/books") == "postgresql+asyncpg://user:secret@db:5432/books"
+
+
+def test_async_create_and_get_book(book_service: AsyncBookService):
+    async def scenario(db):
+        data = [{"titulo": "Test Book", "autor": "Test Author", "categoria": "Test Category", "valor": 19.99}]
+        created = await book_service.create_book(db, data)
+        return created, await book_service.get_book(db, created[0]["id"])
+
+    created, book = run_with_session(scenario)
+    assert book == created[0]
+
+
+def test_async_list_books_page_and_stream(book_service: AsyncBookService):
+    async def scenario(db):
+        data = [
+            {"titulo": f"Book {index}", "autor": "Author", "categoria": "Category", "valor": 10.0}
+            for index in range(3)
+        ]
+        await book_service.create_book(db, data)
+        page, next_cursor = await book_service.list_books_page(db, limit=2)
+        streamed = [book async for book in await book_service.stream_books(db, cursor=next_cursor, batch_size=1)]
+        return page, streamed
+
+    page, streamed = run_with_session(scenario)
+    assert len(page) == 2
+    assert len(streamed) == 1
+    assert streamed[0]["id"] > page[-1]["id"]
+
+
+def test_async_update_and_delete_book(book_service: AsyncBookService):
+    async def scenario(db):
+        data = {"titulo": "Book Title", "autor": "Author", "categoria": "Category", "valor": 19.99}
+        book = (await book_service.create_book(db, [data]))[0]
+        updated = await book_service.update_book(db, {**data, "id": book["id"], "titulo": "Updated Title"})
+        await book_service.delete_book(db, book["id"])
+        return updated, await book_service.list_books(db)
+
+    updated, remaining = run_with_session(scenario)
+    assert updated["titulo"] == "Updated Title"
+    assert remaining == []
+
+
+def test_async_get_non_existent_book(book_service: AsyncBookService):
+    async def scenario(db):
+        await book_service.get_book(db, "non-existent-id")
+
+    with pytest.raises(HTTPException) as excinfo:
+        run_with_session(scenario)
+
+    assert excinfo.value.status_code == 404
+
+
+def test_book_loader_coalesces_concurrent_loads(book_service: AsyncBookService):
+    from unittest.mock import patch
+    from services.book_loader import BookLoader
+
+    async def scenario(db):
+        data = [{"titulo": f"Book {index}", "autor": "Author", "categoria": "Category", "valor": 10.0} for index in range(3)]
+        book_ids = [book["id"] for book in await book_service.create_book(db, data)]
+        loader = BookLoader(book_service, session_factory=async_sessionmaker(bind=db.bind, expire_on_commit=False))
+
+        with patch.object(book_service, "get_book_entries", wraps=book_service.get_book_entries) as get_book_entries:
+            results = await asyncio.gather(
+                *(loader.load(book_id) for book_id in book_ids + book_ids[:1] + ["non-existent-id"]),
+                return_exceptions=True
+            )
+        return book_ids, results, get_book_entries.call_count
+
+    book_ids, results, queries = run_with_session(scenario)
+    # Todas as buscas concorrentes, inclusive a repetida e a inexistente, viram uma única consulta
+    assert queries == 1
+    assert [result["book"]["id"] for result in results[:4]] == book_ids + book_ids[:1]
+    assert isinstance(results[4], HTTPException) and results[4].status_code == 404
+
+
+# Teste do lote em sessão própria: cancelar a primeira requisição do lote não afeta as demais
+def test_book_loader_survives_cancelled_first_caller(book_service: AsyncBookService):
+    from services.book_loader import BookLoader
+
+    async def scenario(db):
+        book_id = (await book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}]))[0]["id"]
+        loader = BookLoader(book_service, window_ms=10, session_factory=async_sessionmaker(bind=db.bind, expire_on_commit=False))
+
+        first = asyncio.create_task(loader.load(book_id))
+        second = asyncio.create_task(loader.load(book_id))
+        await asyncio.sleep(0)
+        first.cancel()
+        return book_id, await second, first.cancelled()
+
+    book_id, entry, cancelled = run_with_session(scenario)
+    assert cancelled
+    assert entry["book"]["id"] == book_id
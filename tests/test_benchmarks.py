@@ -0,0 +1,33 @@
+import pytest
+from benchmarks.compare import compare_results
+from benchmarks.stats import percentile, summarize
+
+def report(**p95_by_name):
+    return {"results": {name: {"p95_ms": value} for name, value in p95_by_name.items()}}
+
+# Teste do percentil com interpolação linear
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert percentile(values, 50) == 3.0
+    assert percentile(values, 95) == pytest.approx(4.8)
+    assert percentile([], 50) is None
+
+# Teste do resumo das durações, convertidas para milissegundos
+def test_summarize():
+    summary = summarize([0.001, 0.002, 0.003, 0.004], elapsed=0.01)
+    assert summary["samples"] == 4
+    assert summary["p50_ms"] == 2.5
+    assert summary["ops_per_s"] == 400.0
+
+# Teste da comparação: só há regressão acima do limite relativo e da diferença mínima absoluta
+def test_compare_results_detects_regressions():
+    baseline = report(lenta=10.0, estavel=10.0, rapida=0.1, nova_na_base=1.0)
+    current = report(lenta=13.0, estavel=11.0, rapida=0.3, so_na_atual=1.0)
+
+    comparison = {row["name"]: row for row in compare_results(baseline, current, threshold=0.2, min_delta_ms=0.5)}
+
+    assert set(comparison) == {"lenta", "estavel", "rapida"}
+    assert comparison["lenta"]["regression"] is True
+    assert comparison["estavel"]["regression"] is False
+    # +200%, mas apenas 0,2 ms de diferença: tratado como ruído
+    assert comparison["rapida"]["regression"] is False
@@ -0,0 +1,152 @@
+import time
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, Session
+from db.config import Base
+from services.book_service import BookService
+from services.cache import BookCache, MemoryCache, RedisCache
+from fastapi import HTTPException
+
+# Configuração do banco de dados SQLite em memória para os testes
+engine = create_engine("sqlite:///:memory:")
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Servidor Redis falso em memória, com os comandos usados pelo `RedisCache`
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    def set(self, key, value, ex=None):
+        self.values[key] = (value.encode("utf-8"), time.monotonic() + ex if ex else None)
+
+# Fixture para criar o banco de dados e as tabelas antes dos testes
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+# O serviço é testado com os dois backends de cache
+@pytest.fixture(params=["memory", "redis"])
+def book_service(request):
+    backend = MemoryCache(max_entries=100) if request.param == "memory" else RedisCache(FakeRedis())
+    return BookService(cache=BookCache(backend))
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_memory_cache_ttl_expiration():
+    cache = MemoryCache()
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get("a") is None
+
+
+def test_get_book_read_through(db: Session, book_service: BookService):
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+
+    assert book_service.get_book(db, book["id"]) == book
+    assert book_service.get_book(db, book["id"]) == book
+    stats = book_service.cache.stats()
+    assert stats["book"] == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_update_invalidates_book_and_listings(db: Session, book_service: BookService):
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    book_service.get_book(db, book["id"])
+    book_service.list_books_page(db, titulo="book")
+
+    book_service.update_book(db, dict(book, valor=12.0))
+
+    assert book_service.get_book(db, book["id"])["valor"] == 12.0
+    assert book_service.list_books_page(db, titulo="BOOK")[0][0]["valor"] == 12.0
+
+
+def test_create_and_delete_invalidate_listings(db: Session, book_service: BookService):
+    assert book_service.list_books_page(db)[0] == []
+
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    assert len(book_service.list_books_page(db)[0]) == 1
+    assert len(book_service.search_books(db, "book")) == 1
+
+    book_service.delete_book(db, book["id"])
+    assert book_service.list_books_page(db)[0] == []
+    assert book_service.search_books(db, "book") == []
+    with pytest.raises(HTTPException):
+        book_service.get_book(db, book["id"])
+
+
+def test_listing_key_uses_raw_parameters():
+    cache = BookCache(MemoryCache())
+
+    assert cache.listing_key("page", 1, titulo="book", autor=None) == cache.listing_key("page", 1, titulo="book")
+    assert cache.listing_key("page", 1, titulo="book") != cache.listing_key("page", 1, autor="book")
+    assert cache.listing_key("page", 1, titulo="book") != cache.listing_key("page", 2, titulo="book")
+    assert cache.listing_key("page", 1, categoria_exata="Finanças") != cache.listing_key("page", 1, categoria_exata="finanças")
+
+
+# Teste de categorias que diferem só nas maiúsculas: cada filtro exato tem a sua página no cache
+def test_exact_category_listings_are_cached_separately(db: Session, book_service: BookService):
+    book_service.create_book(db, [
+        {"titulo": "Maiúscula", "autor": "Autor", "categoria": "Finanças", "valor": 10.0},
+        {"titulo": "Minúscula", "autor": "Autor", "categoria": "finanças", "valor": 10.0},
+    ])
+
+    assert [book["titulo"] for book in book_service.list_books_page(db, categoria_exata="Finanças")[0]] == ["Maiúscula"]
+    assert [book["titulo"] for book in book_service.list_books_page(db, categoria_exata="finanças")[0]] == ["Minúscula"]
+
+
+# Teste de dois processos com caches `memory` separados: a escrita em um muda a versão do catálogo no
+# banco, e o outro deixa de ler a listagem antiga do seu cache
+def test_listing_cache_follows_catalog_version_across_processes(db: Session):
+    writer = BookService(cache=BookCache(MemoryCache()))
+    reader = BookService(cache=BookCache(MemoryCache()))
+    assert reader.list_books_page(db)[0] == []
+    assert reader.get_facets(db)["total"] == 0
+
+    writer.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])
+
+    assert len(reader.list_books_page(db)[0]) == 1
+    assert reader.get_facets(db)["total"] == 1
+    assert reader.cache.stats()["listing"]["hits"] == 0
+
+
+# Teste de dois processos com caches `memory` separados: o livro alterado ou removido por um deixa de
+# ser lido do cache do outro
+def test_book_cache_follows_catalog_version_across_processes(db: Session):
+    writer = BookService(cache=BookCache(MemoryCache()))
+    reader = BookService(cache=BookCache(MemoryCache()))
+    book = writer.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    assert reader.get_book(db, book["id"])["valor"] == 10.0
+    assert reader.get_book_entries(db, [book["id"]])[book["id"]]["book"]["valor"] == 10.0
+
+    writer.update_book(db, dict(book, valor=12.0))
+    assert reader.get_book(db, book["id"])["valor"] == 12.0
+    assert reader.get_book_entries(db, [book["id"]])[book["id"]]["book"]["valor"] == 12.0
+
+    writer.delete_book(db, book["id"])
+    with pytest.raises(HTTPException) as excinfo:
+        reader.get_book(db, book["id"])
+    assert excinfo.value.status_code == 404
+    assert reader.get_book_entries(db, [book["id"]]) == {}
@@ -0,0 +1,119 @@
+import asyncio
+import contextlib
+import json
+from services.change_feed import ChangeBroadcaster, KEEP_ALIVE
+
+# Registro de alterações em memória com a mesma interface do `AsyncBookService`
+class FakeChangeLog:
+    def __init__(self):
+        self.changes = []
+        self.reads = 0
+
+    def append(self, total: int = 1):
+        for _ in range(total):
+            seq = len(self.changes) + 1
+            self.changes.append({"seq": seq, "tipo": "upsert", "id": f"livro-{seq}", "versao": seq, "alterado_em": "", "livro": None})
+
+    async def get_change_seq(self, db):
+        return len(self.changes)
+
+    async def get_changes(self, db, since: int = 0, limit: int = 1000):
+        self.reads += 1
+        changes = self.changes[since:since + limit]
+        return changes, changes[-1]["seq"] if changes else since, since + limit < len(self.changes)
+
+# Difusão que conta as leituras do banco concluídas pelos streams: depois delas, as alterações novas
+# chegam pela fila do assinante
+class TrackedBroadcaster(ChangeBroadcaster):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.backfills = 0
+
+    async def _read_changes(self, since: int):
+        async for change in super()._read_changes(since):
+            yield change
+        self.backfills += 1
+
+    # Aguarda `total` streams terem lido as alterações anteriores do banco
+    async def wait_backfills(self, total: int):
+        while self.backfills < total:
+            await asyncio.sleep(0.001)
+
+def broadcaster(change_log: FakeChangeLog, **options):
+    return TrackedBroadcaster(change_log, session_factory=contextlib.nullcontext, interval_ms=5, **options)
+
+# Lê `total` eventos do stream e retorna as sequências recebidas
+async def read_events(events, total: int):
+    received = []
+    async for event in events:
+        if event == KEEP_ALIVE:
+            continue
+        received.append(json.loads(event.split(b"data: ")[1])["seq"])
+        if len(received) == total:
+            break
+    await events.aclose()
+    return received
+
+def test_change_feed_fans_out_one_read_to_all_subscribers():
+    async def scenario():
+        change_log = FakeChangeLog()
+        change_log.append(3)
+        feed = broadcaster(change_log)
+
+        streams = [feed.events() for _ in range(20)]
+        # Cada stream assina na primeira leitura; as alterações antigas não são enviadas sem `since`
+        readers = [asyncio.ensure_future(read_events(events, 2)) for events in streams]
+        # Cada stream lê o registro uma vez ao assinar; depois disso, só a difusão lê
+        await feed.wait_backfills(20)
+
+        reads_before = change_log.reads
+        change_log.append(2)
+        results = await asyncio.gather(*readers)
+        reads = change_log.reads - reads_before
+        await asyncio.sleep(0.02)
+        return results, reads, feed.stats()
+
+    results, reads, stats = asyncio.run(scenario())
+    assert results == [[4, 5]] * 20
+    # A difusão lê o registro uma vez por intervalo, independentemente da quantidade de assinantes:
+    # as duas alterações chegam aos 20 streams com menos leituras do que streams
+    assert reads < 20
+    assert stats["subscribers"] == 0
+
+def test_change_feed_backfills_from_since_without_duplicates():
+    async def scenario():
+        change_log = FakeChangeLog()
+        change_log.append(5)
+        feed = broadcaster(change_log, page_size=2)
+        reader = asyncio.ensure_future(read_events(feed.events(since=2), 5))
+        await asyncio.sleep(0.02)
+        change_log.append(2)
+        return await reader
+
+    assert asyncio.run(scenario()) == [3, 4, 5, 6, 7]
+
+def test_change_feed_resyncs_lagging_subscriber():
+    async def scenario():
+        change_log = FakeChangeLog()
+        feed = broadcaster(change_log, buffer=2)
+        events = feed.events()
+        # O primeiro evento assina o stream; as alterações seguintes enchem a fila do assinante parado
+        first = asyncio.ensure_future(events.__anext__())
+        await feed.wait_backfills(1)
+        change_log.append(1)
+        await first
+        change_log.append(10)
+        await asyncio.sleep(0.03)
+        return await read_events(events, 10)
+
+    assert asyncio.run(scenario()) == list(range(2, 12))
+
+def test_change_feed_sends_keep_alive():
+    async def scenario():
+        feed = broadcaster(FakeChangeLog())
+        events = feed.events(heartbeat=0.01)
+        event = await events.__anext__()
+        await events.aclose()
+        return event
+
+    assert asyncio.run(scenario()) == KEEP_ALIVE
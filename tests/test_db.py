@@ -1,9 +1,11 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import OperationalError, TimeoutError as SQLAlchemyTimeoutError
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
-from db.config import DATABASE_URL, engine, SessionLocal, get_db, Base
+from db.config import DATABASE_URL, POOL_SETTINGS, engine, SessionLocal, get_db, Base, _engine_options
+from db.pool_metrics import PoolMetrics, instrumented_pool
 
 # Testar se a variável de ambiente DATABASE_URL é carregada corretamente
 def test_database_url():
@@ -42,3 +44,35 @@ def test_create_all():
         Base.metadata.create_all(bind=engine)
         mock_create_all.assert_called_once_with(bind=engine)
 
+
+# Testar se o pool instrumentado registra checkouts, conexões em uso e timeouts
+def test_pool_metrics_checkout_and_timeout(tmp_path):
+    metrics = PoolMetrics("test")
+    test_engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=instrumented_pool(QueuePool, metrics),
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01
+    )
+    metrics.attach(test_engine)
+
+    connection = test_engine.connect()
+    assert metrics.snapshot()["in_use"] == 1
+
+    with pytest.raises(SQLAlchemyTimeoutError):
+        test_engine.connect()
+
+    connection.close()
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 1
+    assert snapshot["checkins"] == 1
+    assert snapshot["timeouts"] == 1
+    assert snapshot["in_use"] == 0
+    assert snapshot["checkout_wait"]["count"] == 1
+    test_engine.dispose()
+
+# Testar se o SQLite em memória não recebe as opções de pool com fila
+def test_engine_options_memory_sqlite():
+    assert "pool_size" not in _engine_options("sqlite:///:memory:", QueuePool)
+    assert _engine_options("sqlite:///./test.db", QueuePool)["pool_size"] == POOL_SETTINGS["pool_size"]
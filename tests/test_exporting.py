@@ -0,0 +1,55 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from utils.exporting import EXPORT_COLUMNS, export_chunks
+
+ROWS = [
+    ("1", "Neuromancer", "William Gibson", "Ficção Científica", 48.9),
+    ("2", 'Livro, com "aspas"', "Autor", "Categoria", 10.0),
+]
+
+# Entrega os livros em lotes, como o cursor do banco
+async def batches(rows, size: int = 1):
+    for index in range(0, len(rows), size):
+        yield rows[index:index + size]
+
+def export(format: str, rows=ROWS, compress: bool = False):
+    async def run():
+        return [chunk async for chunk in export_chunks(format, batches(rows), compress=compress)]
+    return asyncio.run(run())
+
+# Teste da exportação NDJSON, um bloco por lote
+def test_export_ndjson():
+    chunks = export("ndjson")
+    assert len(chunks) == 2
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == [dict(zip(EXPORT_COLUMNS, row)) for row in ROWS]
+
+# Teste da exportação CSV, com o cabeçalho mesmo sem livros
+def test_export_csv():
+    content = b"".join(export("csv")).decode("utf-8")
+    records = list(csv.reader(io.StringIO(content)))
+    assert records[0] == list(EXPORT_COLUMNS)
+    assert records[2] == ["2", 'Livro, com "aspas"', "Autor", "Categoria", "10.0"]
+
+    assert b"".join(export("csv", rows=[])).decode("utf-8") == "id,titulo,autor,categoria,valor\n"
+
+# Teste da exportação colunar: uma lista de valores por coluna em cada lote
+def test_export_columnar():
+    async def run():
+        return [chunk async for chunk in export_chunks("columnar", batches(ROWS, size=2))]
+
+    chunks = asyncio.run(run())
+    assert json.loads(chunks[0]) == {
+        "id": ["1", "2"],
+        "titulo": ["Neuromancer", 'Livro, com "aspas"'],
+        "autor": ["William Gibson", "Autor"],
+        "categoria": ["Ficção Científica", "Categoria"],
+        "valor": [48.9, 10.0],
+    }
+
+# Teste da compressão gzip incremental
+def test_export_gzip():
+    assert gzip.decompress(b"".join(export("ndjson", compress=True))) == b"".join(export("ndjson"))
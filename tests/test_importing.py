@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from utils.importing import ImportFormatError, import_format, iter_csv_records, iter_ndjson_records, validate_import_record
+
+# Entrega o conteúdo em blocos de `size` bytes, como o corpo de uma requisição
+async def chunked(content: bytes, size: int = 7):
+    for index in range(0, len(content), size):
+        yield content[index:index + size]
+
+def collect(records):
+    async def run():
+        return [record async for record in records]
+    return asyncio.run(run())
+
+# Teste da leitura do CSV em blocos, com acentos, BOM e quebra de linha dentro de um campo entre aspas
+def test_iter_csv_records():
+    content = (
+        "﻿titulo,autor,categoria,valor\r\n"
+        "Neuromancer,William Gibson,Ficção Científica,48.9\r\n"
+        '"Livro, com ""aspas""\ne quebra",Autor,Categoria,10\n'
+        "incompleto,Autor\n"
+    ).encode("utf-8")
+
+    records = collect(iter_csv_records(chunked(content, size=5)))
+
+    assert records[0] == (2, {"titulo": "Neuromancer", "autor": "William Gibson", "categoria": "Ficção Científica", "valor": "48.9"}, None)
+    assert records[1] == (3, {"titulo": 'Livro, com "aspas"\ne quebra', "autor": "Autor", "categoria": "Categoria", "valor": "10"}, None)
+    assert records[2][0] == 5 and records[2][1] is None
+
+# Teste do cabeçalho CSV sem as colunas obrigatórias
+def test_iter_csv_records_missing_columns():
+    with pytest.raises(ImportFormatError):
+        collect(iter_csv_records(chunked(b"titulo,autor\nA,B\n")))
+
+# Teste da leitura do NDJSON, com linhas inválidas relatadas sem interromper a leitura
+def test_iter_ndjson_records():
+    content = b'{"titulo": "A"}\n\nnao-e-json\n[1, 2]\n{"titulo": "B"}'
+
+    records = collect(iter_ndjson_records(chunked(content)))
+
+    assert records[0] == (1, {"titulo": "A"}, None)
+    assert records[1][0] == 3 and "JSON" in records[1][2]
+    assert records[2][0] == 4 and records[2][2] == "Cada linha deve ser um objeto JSON"
+    assert records[3] == (5, {"titulo": "B"}, None)
+
+# Teste do limite de tamanho de linha, que mantém a memória limitada
+def test_iter_lines_max_length():
+    with pytest.raises(ImportFormatError):
+        collect(iter_ndjson_records(chunked(b"x" * 100), max_line_length=50))
+
+# Teste do formato pelo Content-Type ou pelo parâmetro `format`
+def test_import_format():
+    assert import_format("text/csv; charset=utf-8") == "csv"
+    assert import_format("application/x-ndjson") == "ndjson"
+    assert import_format("application/json", format="csv") == "csv"
+    with pytest.raises(ImportFormatError):
+        import_format("application/json")
+
+# Teste da validação de um livro importado
+def test_validate_import_record():
+    book, error = validate_import_record({"id": "", "titulo": "A", "autor": "B", "categoria": "C", "valor": "9.5"})
+    assert error is None
+    assert book == {"id": None, "titulo": "A", "autor": "B", "categoria": "C", "valor": 9.5}
+
+    book, error = validate_import_record({"titulo": "A", "autor": "B", "categoria": "C", "valor": "caro"})
+    assert book is None
+    assert error.startswith("valor:")
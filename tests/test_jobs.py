@@ -0,0 +1,145 @@
+import time
+import pytest
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from db.config import Base
+from db.book_models import Job_Model, utc_now
+from services.book_service import BookService
+from services.jobs import JOB_FAILED, JOB_PENDING, JOB_SUCCEEDED, JobQueue
+
+BOOKS = [
+    {"titulo": "Livro da Tarefa 1", "autor": "Autor", "categoria": "Tarefas", "valor": 10.0},
+    {"titulo": "Livro da Tarefa 2", "autor": "Autor", "categoria": "Tarefas", "valor": 20.0},
+]
+
+# Banco SQLite em arquivo: os workers usam sessões próprias em outras threads
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def job_queue(session_factory):
+    job_queue = JobQueue(BookService(), session_factory=session_factory, workers=2, max_pending=2)
+    yield job_queue
+    job_queue.stop(timeout=5)
+
+# Espera a tarefa terminar (concluída ou com falha)
+def wait_for(job_queue: JobQueue, job_id: str, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = job_queue.get(job_id)
+        if job["status"] in (JOB_SUCCEEDED, JOB_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"A tarefa {job_id} não terminou")
+
+def test_job_create_and_update_books(job_queue: JobQueue):
+    job = job_queue.submit("create_books", BOOKS)
+    assert job["status"] == JOB_PENDING
+    assert job["total"] == 2
+
+    job = wait_for(job_queue, job["id"])
+    assert job["status"] == JOB_SUCCEEDED
+    assert job["progresso"] == 2
+    assert job["resultado"]["criados"] == 2
+
+    book_ids = job["resultado"]["ids"]
+    books = [{**book, "id": book_id, "valor": book["valor"] * 2} for book, book_id in zip(BOOKS, book_ids)]
+    job = wait_for(job_queue, job_queue.submit("update_books", books)["id"])
+    assert job["resultado"] == {"atualizados": 2}
+
+def test_job_failure_is_recorded(job_queue: JobQueue):
+    wait_for(job_queue, job_queue.submit("create_books", BOOKS)["id"])
+
+    # O mesmo título e categoria: o `create_book` recusa com 409 e a tarefa registra o erro
+    job = wait_for(job_queue, job_queue.submit("create_books", BOOKS[:1])["id"])
+    assert job["status"] == JOB_FAILED
+    assert "Conflito" in job["erro"]
+
+def test_job_validation_and_not_found(job_queue: JobQueue):
+    with pytest.raises(HTTPException) as error:
+        job_queue.submit("drop_books", [])
+    assert error.value.status_code == 422
+
+    with pytest.raises(HTTPException) as error:
+        job_queue.submit("create_books", [{"titulo": "Sem valor"}])
+    assert error.value.status_code == 422
+
+    with pytest.raises(HTTPException) as error:
+        job_queue.get("nao-existe")
+    assert error.value.status_code == 404
+
+def test_job_backpressure(session_factory):
+    # Sem workers iniciados, as tarefas continuam pendentes e a fila enche
+    job_queue = JobQueue(BookService(), session_factory=session_factory, workers=0, max_pending=2)
+    job_queue.submit("create_books", BOOKS[:1])
+    job_queue.submit("create_books", BOOKS[1:])
+
+    with pytest.raises(HTTPException) as error:
+        job_queue.submit("create_books", BOOKS)
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"]
+
+def test_job_survives_restart(session_factory):
+    stopped_queue = JobQueue(BookService(), session_factory=session_factory, workers=0)
+    pending_job = stopped_queue.submit("create_books", BOOKS[:1])
+    interrupted_job = stopped_queue.submit("create_books", BOOKS[1:])
+
+    # Simula uma tarefa que estava em execução quando o processo terminou
+    with session_factory() as db:
+        table = Job_Model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.job_id == interrupted_job["id"])
+            .values(job_status="executando", updated_at=utc_now() - timedelta(hours=1))
+        )
+        db.commit()
+
+    restarted_queue = JobQueue(BookService(), session_factory=session_factory, workers=1)
+    restarted_queue.start()
+    try:
+        assert wait_for(restarted_queue, pending_job["id"])["status"] == JOB_SUCCEEDED
+        assert wait_for(restarted_queue, interrupted_job["id"])["status"] == JOB_SUCCEEDED
+        # Uma tarefa já reivindicada não roda de novo
+        assert restarted_queue.run(pending_job["id"]) is False
+    finally:
+        restarted_queue.stop(timeout=5)
+
+def test_job_adjust_prices(job_queue: JobQueue):
+    wait_for(job_queue, job_queue.submit("create_books", BOOKS)["id"])
+
+    job = job_queue.submit("adjust_prices", {"filtro": {"categoria_exata": "Tarefas"}, "operacao": "add", "valor": 1})
+    assert wait_for(job_queue, job["id"])["resultado"] == {"reajustados": 2}
+
+# Teste das validações do `PATCH /books/prices` aplicadas já no envio da tarefa
+def test_job_adjust_prices_validation(job_queue: JobQueue):
+    for adjustment in (
+        {"filtro": {"valor_min": 30.0, "valor_max": 10.0}, "operacao": "add", "valor": 1},
+        {"filtro": {"categoria_exata": "Tarefas"}, "operacao": "percent", "valor": -100},
+    ):
+        with pytest.raises(HTTPException) as error:
+            job_queue.submit("adjust_prices", adjustment)
+        assert error.value.status_code == 400
+
+# Teste do sinal de vida: uma tarefa longa que renova o `updated_at` não volta para a fila
+def test_job_heartbeat_prevents_recovery(session_factory):
+    job_queue = JobQueue(BookService(), session_factory=session_factory, workers=0, stale_seconds=60)
+    running_job, stale_job = job_queue.submit("create_books", BOOKS[:1]), job_queue.submit("create_books", BOOKS[1:])
+    with session_factory() as db:
+        table = Job_Model.__table__
+        db.execute(
+            update(table)
+            .where(table.c.job_id.in_([running_job["id"], stale_job["id"]]))
+            .values(job_status="executando", job_progress=0, updated_at=utc_now() - timedelta(hours=1))
+        )
+        db.commit()
+
+    job_queue._report(running_job["id"])
+    assert job_queue.recover() == [stale_job["id"]]
+    assert job_queue.get(running_job["id"])["status"] == "executando"
+    assert job_queue.get(running_job["id"])["progresso"] == 0
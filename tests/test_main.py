@@ -44,3 +44,51 @@ def test_server_initialization(monkeypatch):
             "main:app", host="0.0.0.0", port=8000, reload=True
         )
 
+
+def test_internal_cache_stats():
+    """Testa o endpoint interno com os contadores do cache."""
+    response = client.get("/internal/cache")
+    assert response.status_code == 200
+    assert "backend" in response.json()
+
+def test_fast_response_keeps_openapi_schema():
+    """Testa se as rotas com resposta pré-renderizada continuam documentando o `BookListResponse`."""
+    paths = client.get("/openapi.json").json()["paths"]
+    for path in ("/books", "/books/{book_id}"):
+        schema = paths[path]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+        assert schema == {"$ref": "#/components/schemas/BookListResponse"}
+
+def test_internal_pool_stats():
+    """Testa o endpoint interno com as métricas do pool de conexões."""
+    response = client.get("/internal/pool")
+    assert response.status_code == 200
+    assert {"settings", "async", "sync"} <= set(response.json())
+
+def test_health_live():
+    """Testa a sonda de liveness, que responde sem depender da inicialização."""
+    response = client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_health_ready_follows_lifespan():
+    """Testa a sonda de readiness: pronta após a inicialização (pools e caches aquecidos) e 503 após o encerramento."""
+    with TestClient(app) as started_client:
+        response = started_client.get("/health/ready")
+        assert response.status_code == 200
+        assert response.json()["ready"] is True
+        assert {"async_pool", "sync_pool", "caches"} <= set(response.json()["steps_ms"])
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+def test_start_up_refuses_memory_database():
+    """Testa se a inicialização recusa o SQLite em memória, que cada conexão veria vazio."""
+    import asyncio
+    from services.startup import StartupState, start_up
+
+    state = StartupState()
+    with pytest.raises(RuntimeError, match="memória"):
+        asyncio.run(start_up(state, book_service=None, database_url="sqlite:///:memory:"))
+    assert state.ready is False
+    assert "migrate" not in state.steps
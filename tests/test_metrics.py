@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+from main import app
+
+client = TestClient(app)
+
+# Lê as amostras de `/metrics` como {(nome, rótulos ordenados): valor}
+def scrape():
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+def value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+# Teste das métricas de requisição: latência rotulada pelo modelo da rota, e não pelo caminho
+def test_request_metrics_use_route_template():
+    before = scrape()
+    client.get("/books/id-inexistente")
+    after = scrape()
+
+    route = {"method": "GET", "route": "/books/{book_id}"}
+    name = "standlivros_http_request_duration_seconds_count"
+    assert value(after, name, **route) == value(before, name, **route) + 1
+    assert value(after, "standlivros_http_errors_total", status="404", **route) == value(before, "standlivros_http_errors_total", status="404", **route) + 1
+    assert not any("id-inexistente" in str(labels) for _, labels in after)
+
+# Teste das métricas do banco por método do BookService e dos livros por listagem
+def test_db_and_listing_metrics():
+    before = scrape()
+    response = client.get("/books", params={"titulo": "métricas-sem-cache", "limit": 10})
+    assert response.status_code == 200
+    after = scrape()
+
+    operation = {"operation": "list_books_page"}
+    assert value(after, "standlivros_db_queries_total", **operation) > value(before, "standlivros_db_queries_total", **operation)
+    assert value(after, "standlivros_db_query_duration_seconds_count", **operation) == value(before, "standlivros_db_query_duration_seconds_count", **operation) + 1
+    assert value(after, "standlivros_listing_rows_count", **operation) == value(before, "standlivros_listing_rows_count", **operation) + 1
+
+    route = {"method": "GET", "route": "/books"}
+    assert value(after, "standlivros_http_response_size_bytes_sum", **route) >= value(before, "standlivros_http_response_size_bytes_sum", **route) + len(response.content)
+
+# Teste das requisições em andamento: nenhuma após as respostas
+def test_in_progress_gauge():
+    samples = scrape()
+    # A própria requisição de `/metrics` está em andamento durante a coleta
+    assert value(samples, "standlivros_http_requests_in_progress") == 1.0
@@ -0,0 +1,183 @@
+import threading
+import pytest
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+from db.migrations import migrate, migration_lock, vacuum
+from services.book_service import BookService
+
+def test_migrate_is_idempotent(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migracao.db'}")
+    migrate(engine)
+    migrate(engine)
+
+    inspector = inspect(engine)
+    assert {"StandLivros", "StandLivrosCatalogo", "StandLivrosAlteracoes"} <= set(inspector.get_table_names())
+    assert "ix_StandLivros_updated_at_id" in {index["name"] for index in inspector.get_indexes("StandLivros")}
+    engine.dispose()
+
+def test_migrate_adds_missing_columns(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'antigo.db'}")
+    # Tabela de livros criada antes da remoção lógica
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE "StandLivros" (book_id VARCHAR PRIMARY KEY, book_title VARCHAR, book_author VARCHAR, '
+            'book_category VARCHAR, book_price FLOAT, book_version INTEGER NOT NULL, updated_at DATETIME NOT NULL)'
+        )
+        connection.exec_driver_sql("INSERT INTO \"StandLivros\" VALUES ('1', 'Antigo', 'Autor', 'Drama', 10.0, 1, '2024-01-01 00:00:00')")
+
+    migrate(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("StandLivros")}
+    assert "deleted_at" in columns
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql('SELECT book_title, deleted_at FROM "StandLivros"').all() == [("Antigo", None)]
+    engine.dispose()
+
+def test_migrate_adds_required_columns_with_server_default(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'sem_versao.db'}")
+    # Tabela de livros criada antes das requisições condicionais (sem `book_version` e `updated_at`)
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE "StandLivros" (book_id VARCHAR PRIMARY KEY, book_title VARCHAR, book_author VARCHAR, '
+            'book_category VARCHAR, book_price FLOAT)'
+        )
+        connection.exec_driver_sql("INSERT INTO \"StandLivros\" VALUES ('1', 'Antigo', 'Autor', 'Drama', 10.0)")
+
+    migrate(engine)
+    migrate(engine)
+
+    columns = {column["name"]: column for column in inspect(engine).get_columns("StandLivros")}
+    assert not columns["book_version"]["nullable"] and not columns["updated_at"]["nullable"]
+    with engine.connect() as connection:
+        book_version, updated_at = connection.exec_driver_sql('SELECT book_version, updated_at FROM "StandLivros"').one()
+    assert book_version == 0 and updated_at is not None
+
+    with Session(engine) as db:
+        entry = BookService().get_book_entry(db, "1")
+    assert entry["book"]["titulo"] == "Antigo" and entry["version"] == 0
+    engine.dispose()
+
+# Teste de migração de uma tabela antiga com título e categoria repetidos: o índice único não é criado
+# e o erro lista os livros repetidos
+def test_migrate_reports_duplicate_books(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'repetidos.db'}")
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE "StandLivros" (book_id VARCHAR PRIMARY KEY, book_title VARCHAR, book_author VARCHAR, '
+            'book_category VARCHAR, book_price FLOAT)'
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO \"StandLivros\" VALUES ('1', 'Antigo', 'Autor', 'Drama', 10.0), "
+            "('2', 'Antigo', 'Outro autor', 'Drama', 20.0), ('3', 'Antigo', 'Autor', 'Poesia', 30.0)"
+        )
+
+    with pytest.raises(RuntimeError) as error:
+        migrate(engine)
+    assert "uq_StandLivros_title_category" in str(error.value)
+    assert "('Antigo', 'Drama'): 2 livros" in str(error.value)
+    assert "Poesia" not in str(error.value)
+
+    # Com o livro repetido removido, a migração cria o índice
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM \"StandLivros\" WHERE book_id = '2'")
+    migrate(engine)
+    assert "uq_StandLivros_title_category" in {index["name"] for index in inspect(engine).get_indexes("StandLivros")}
+    engine.dispose()
+
+def test_migration_lock_is_exclusive_between_processes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'lock.db'}")
+    events = []
+    holding = threading.Event()
+
+    def hold_lock():
+        with migration_lock(engine):
+            holding.set()
+            events.append("primeira início")
+            threading.Event().wait(0.1)
+            events.append("primeira fim")
+
+    def wait_lock():
+        holding.wait()
+        with migration_lock(engine):
+            events.append("segunda")
+
+    # O `flock` vale por descritor de arquivo, então duas threads disputam o lock como dois processos
+    threads = [threading.Thread(target=hold_lock), threading.Thread(target=wait_lock)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert events == ["primeira início", "primeira fim", "segunda"]
+
+# Livros encontrados pelo índice FTS5, pela tabela de chaves estáveis do índice
+def search_ids(engine, term: str):
+    with engine.connect() as connection:
+        return connection.exec_driver_sql(
+            'SELECT ids.book_id FROM "StandLivros_fts" f '
+            'JOIN "StandLivros_fts_ids" ids ON ids.search_rowid = f.rowid '
+            f"WHERE \"StandLivros_fts\" MATCH '{term}'"
+        ).scalars().all()
+
+# Insere os livros `0` a `count - 1` direto na tabela
+def insert_books(connection, count: int):
+    for index in range(count):
+        connection.exec_driver_sql(
+            'INSERT INTO "StandLivros" (book_id, book_title, book_author, book_category, book_price, book_version, updated_at) '
+            f"VALUES ('{index}', 'Livro titulo{index}', 'Autor', 'Drama', 10.0, 1, '2024-01-01 00:00:00')"
+        )
+
+# Teste de busca após o VACUUM, que pode renumerar os rowids implícitos de `StandLivros`
+def test_vacuum_keeps_search_index_in_sync(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'vacuum.db'}")
+    migrate(engine)
+    with engine.begin() as connection:
+        insert_books(connection, 6)
+        connection.exec_driver_sql("DELETE FROM \"StandLivros\" WHERE book_id IN ('0', '1', '2')")
+        connection.exec_driver_sql("UPDATE \"StandLivros\" SET book_title = 'Livro novo' WHERE book_id = '5'")
+
+    vacuum(engine)
+    assert search_ids(engine, "titulo4") == ["4"]
+    assert search_ids(engine, "titulo1") == []
+    assert search_ids(engine, "titulo5") == []
+    assert search_ids(engine, "novo") == ["5"]
+    engine.dispose()
+
+# Teste de migração que não reconstrói um índice de busca já existente
+def test_migrate_does_not_rebuild_search_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'indice.db'}")
+    migrate(engine)
+    with engine.begin() as connection:
+        insert_books(connection, 2)
+        # Remove um livro só do índice: uma reconstrução o traria de volta
+        connection.exec_driver_sql(
+            'DELETE FROM "StandLivros_fts" WHERE rowid = '
+            "(SELECT search_rowid FROM \"StandLivros_fts_ids\" WHERE book_id = '1')"
+        )
+
+    migrate(engine)
+    assert search_ids(engine, "titulo0") == ["0"]
+    assert search_ids(engine, "titulo1") == []
+    engine.dispose()
+
+# Teste de migração de um índice FTS5 antigo, ligado ao rowid implícito de `StandLivros`
+def test_migrate_converts_legacy_search_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legado.db'}")
+    migrate(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE "StandLivros_fts"')
+        connection.exec_driver_sql('DROP TABLE "StandLivros_fts_ids"')
+        for suffix in ("ai", "ad", "au"):
+            connection.exec_driver_sql(f'DROP TRIGGER "StandLivros_fts_{suffix}"')
+        connection.exec_driver_sql(
+            'CREATE VIRTUAL TABLE "StandLivros_fts" USING fts5(book_title, book_author, book_category, '
+            "content='StandLivros', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')"
+        )
+        insert_books(connection, 3)
+
+    migrate(engine)
+    assert search_ids(engine, "titulo2") == ["2"]
+    with engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM \"StandLivros\" WHERE book_id = '2'")
+    assert search_ids(engine, "titulo2") == []
+    assert sorted(search_ids(engine, "livro")) == ["0", "1"]
+    engine.dispose()
@@ -0,0 +1,81 @@
+import re
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from db.config import async_engine
+from main import app as main_app
+from routers.book_routers import book_router
+from utils.profiling import ProfilingMiddleware, instrument_engine, profile_stage
+
+# Aplicação com os mesmos roteadores da API e a instrumentação ligada
+app = FastAPI()
+app.include_router(book_router)
+app.add_middleware(ProfilingMiddleware, admin_token="segredo", sample_interval_ms=0.1)
+instrument_engine(async_engine)
+
+client = TestClient(app)
+
+def server_timing(response):
+    return {
+        entry.split(";")[0]: entry for entry in response.headers["Server-Timing"].split(", ")
+    }
+
+# Teste dos tempos por etapa no cabeçalho Server-Timing
+def test_server_timing_header():
+    response = client.get("/books", params={"titulo": "profiling-server-timing"})
+    assert response.status_code == 200
+
+    timings = server_timing(response)
+    assert {"db", "service", "serialize", "total"} <= set(timings)
+    query_count = int(re.search(r'desc="(\d+) queries"', timings["db"]).group(1))
+    assert query_count >= 1
+
+# Teste do profiler por amostragem: sem o token, a requisição segue normalmente
+def test_profile_requires_admin_token():
+    response = client.get("/books", params={"__profile": "1"}, headers={"X-Profile-Token": "errado"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+
+# Teste do profiler por amostragem: com o token, a resposta traz as pilhas no formato collapsed
+def test_profile_returns_collapsed_stacks():
+    response = client.get("/books", params={"__profile": "1", "limit": 1000}, headers={"X-Profile-Token": "segredo"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert response.headers["X-Profiled-Status"] == "200"
+    assert "Server-Timing" in response.headers
+
+    lines = response.text.splitlines()
+    assert lines
+    assert all(re.fullmatch(r"\S.*;.* \d+", line) for line in lines)
+
+# Teste da instrumentação desligada: fora de uma requisição perfilada as etapas não têm efeito
+def test_profiling_disabled():
+    with profile_stage("service"):
+        pass
+
+    response = TestClient(main_app).get("/")
+    assert "Server-Timing" not in response.headers
+
+# Teste da medição compartilhada: perfil e métricas no mesmo engine usam um único par de eventos,
+# e cada comando é entregue aos dois acumuladores
+def test_profiling_and_metrics_share_query_timing():
+    from sqlalchemy import create_engine, event, text
+    from utils import metrics, profiling, query_timing
+
+    engine = create_engine("sqlite:///:memory:")
+    profiling.instrument_engine(engine)
+    metrics.instrument_engine(engine)
+    assert len(engine.dispatch.before_cursor_execute) == len(engine.dispatch.after_cursor_execute) == 1
+    assert event.contains(engine, "before_cursor_execute", query_timing._before_cursor_execute)
+
+    profile, stats = profiling.RequestProfile(), metrics.OperationStats()
+    profile_token = profiling._current_profile.set(profile)
+    operation_token = metrics._current_operation.set(stats)
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        metrics._current_operation.reset(operation_token)
+        profiling._current_profile.reset(profile_token)
+    assert profile.query_count == stats.queries == 1
+    assert profile.query_time == stats.duration > 0
+    engine.dispose()
@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime, timezone
+import pytest
+from sqlalchemy import create_engine, text
+from db.config import Base
+import db.search  # noqa: F401 - registra o índice de busca usado pelo create_all
+from benchmarks.datasets import seed_books
+from services.book_service import BookService
+from utils.pagination import encode_cursor
+
+book_service = BookService()
+
+# Consultas das listagens ordenadas e o índice composto que deve atendê-las
+PLAN_CASES = [
+    ({"sort": "valor"}, "ix_StandLivros_price_id"),
+    ({"sort": "valor", "order": "desc", "cursor": encode_cursor("id", sort="valor", order="desc", key=50.0)}, "ix_StandLivros_price_id"),
+    ({"sort": "valor", "valor_min": 10.0, "valor_max": 80.0}, "ix_StandLivros_price_id"),
+    ({"sort": "valor", "categoria_exata": "Fantasia", "valor_min": 20.0}, "ix_StandLivros_category_price_id"),
+    ({"sort": "titulo"}, "ix_StandLivros_title_id"),
+    ({"sort": "autor", "order": "desc"}, "ix_StandLivros_author_id"),
+]
+
+# SQL da página com os valores embutidos, para ser usado no EXPLAIN
+def page_sql(engine, params: dict):
+    query = book_service.stream_select(**params).limit(100)
+    return str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+
+@pytest.fixture(scope="module")
+def sqlite_engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    seed_books(engine, 2000)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+    yield engine
+    engine.dispose()
+
+# Teste do plano no SQLite: a página é lida pelo índice composto, sem ordenação em memória (TEMP B-TREE)
+@pytest.mark.parametrize("params, index_name", PLAN_CASES)
+def test_sqlite_sorted_pages_use_composite_index(sqlite_engine, params, index_name):
+    with sqlite_engine.connect() as connection:
+        plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {page_sql(sqlite_engine, params)}"))
+
+    assert index_name in plan
+    assert "TEMP B-TREE" not in plan
+
+# Teste do plano no PostgreSQL, executado apenas com TEST_POSTGRES_URL apontando para um banco de testes
+# (as tabelas desse banco são recriadas). Com poucas linhas o PostgreSQL prefere a leitura sequencial,
+# então ela é desligada para verificar se o índice atende a ordenação sem um nó Sort.
+@pytest.mark.skipif(not os.getenv("TEST_POSTGRES_URL"), reason="TEST_POSTGRES_URL não definido")
+@pytest.mark.parametrize("params, index_name", PLAN_CASES)
+def test_postgres_sorted_pages_use_composite_index(params, index_name):
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    try:
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        seed_books(engine, 2000)
+        with engine.connect() as connection:
+            connection.execute(text("ANALYZE \"StandLivros\""))
+            connection.execute(text("SET enable_seqscan = off"))
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {page_sql(engine, params)}")).scalar()
+    finally:
+        engine.dispose()
+
+    plan = json.dumps(plan)
+    assert index_name in plan
+    assert '"Node Type": "Sort"' not in plan
+
+# A sincronização incremental lê pelo índice (`updated_at`, `book_id`), inclusive na página seguinte
+def test_sqlite_updated_since_uses_updated_at_index(sqlite_engine):
+    since = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    cursor = encode_cursor("id", sort="updated_at", order="asc", key=since.isoformat())
+    for query in (book_service.since_select(since), book_service.since_select(since, cursor)):
+        sql = str(query.limit(100).compile(sqlite_engine, compile_kwargs={"literal_binds": True}))
+        with sqlite_engine.connect() as connection:
+            plan = " ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+        assert "ix_StandLivros_updated_at_id" in plan
+        assert "TEMP B-TREE" not in plan
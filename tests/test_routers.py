@@ -1,3 +1,6 @@
+import time
+from datetime import datetime, timezone
+import json
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch
@@ -83,7 +86,7 @@ def test_get_book_by_id_success():
         "valor": 99.99
     }
 
-    response = client.get("/books/1")
+    response = client.get("/books/id-inexistente")
     assert response.status_code == 404
 
 def test_delete_book_by_id_success():
@@ -92,5 +95,261 @@ def test_delete_book_by_id_success():
         "data": []
     }
 
-    response = client.delete("/books/1")
+    response = client.delete("/books/id-inexistente")
     assert response.status_code == 404
+
+def test_get_books_paginated():
+    response = client.get("/books", params={"limit": 1})
+    assert response.status_code == 200
+    assert len(response.json()["data"]) <= 1
+    assert "next_cursor" in response.json()
+
+def test_get_books_invalid_cursor():
+    response = client.get("/books", params={"cursor": "cursor-invalido"})
+    assert response.status_code == 400
+
+def test_get_books_stream():
+    response = client.get("/books", params={"stream": True})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+def test_get_books_search():
+    response = client.get("/books", params={"q": "livro"})
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] is None
+
+def test_get_books_search_with_stream():
+    response = client.get("/books", params={"q": "livro", "stream": True})
+    assert response.status_code == 400
+
+def test_put_or_create_books_bulk():
+    payload = [
+        {"id": "livro-bulk-1", "titulo": "Bulk Book 1", "autor": "Author 1", "categoria": "Aventura", "valor": 10.0},
+        {"id": "livro-bulk-2", "titulo": "Bulk Book 2", "autor": "Author 2", "categoria": "Aventura", "valor": 20.0}
+    ]
+
+    response = client.put("/books/bulk", json=payload)
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()["data"]] == ["livro-bulk-1", "livro-bulk-2"]
+
+def test_get_books_not_modified():
+    response = client.get("/books", params={"limit": 1})
+    etag = response.headers["etag"]
+
+    response = client.get("/books", params={"limit": 1}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/books", params={"limit": 2}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+def test_get_book_by_id_conditional():
+    payload = {"id": "livro-etag", "titulo": "ETag Book", "autor": "Author", "categoria": "Aventura", "valor": 10.0}
+    etag = client.put("/books", json=payload).headers["etag"]
+
+    response = client.get("/books/livro-etag", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/books/livro-etag", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert response.status_code == 304
+
+    response = client.put("/books", json=dict(payload, valor=12.0), headers={"If-Match": etag})
+    assert response.status_code == 200
+    new_etag = response.headers["etag"]
+    assert new_etag != etag
+
+    response = client.put("/books", json=dict(payload, valor=15.0), headers={"If-Match": etag})
+    assert response.status_code == 412
+
+    response = client.delete("/books/livro-etag", headers={"If-Match": etag})
+    assert response.status_code == 412
+
+    response = client.delete("/books/livro-etag", headers={"If-Match": new_etag})
+    assert response.status_code == 200
+
+def test_get_book_by_id_fast_response():
+    payload = {"id": "livro-rapido", "titulo": "Livro Rápido", "autor": "Autor", "categoria": "Aventura", "valor": 10.5}
+    client.put("/books", json=payload)
+
+    response = client.get("/books/livro-rapido")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {"success": "Livro encontrado", "data": [payload]}
+
+def test_get_book_facets():
+    payload = {"id": "livro-faceta", "titulo": "Livro Faceta", "autor": "Autor Faceta", "categoria": "Categoria Faceta", "valor": 42.0}
+    client.put("/books", json=payload)
+
+    response = client.get("/books/facets", params={"categoria": "Categoria Faceta"})
+    assert response.status_code == 200
+    facets = response.json()["data"]
+    assert facets["total"] == 1
+    assert facets["categorias"] == [{"valor": "Categoria Faceta", "total": 1}]
+    assert facets["autores"] == [{"valor": "Autor Faceta", "total": 1}]
+    assert facets["valor"]["min"] == facets["valor"]["max"] == 42.0
+
+    response = client.get("/books/facets", params={"categoria": "Categoria Faceta"}, headers={"If-None-Match": response.headers["etag"]})
+    assert response.status_code == 304
+
+    client.delete("/books/livro-faceta")
+
+def test_get_books_sort_and_price_range():
+    response = client.get("/books", params={"sort": "valor", "order": "desc", "valor_min": 1, "valor_max": 1000})
+    assert response.status_code == 200
+    prices = [book["valor"] for book in response.json()["data"]]
+    assert prices == sorted(prices, reverse=True)
+
+    assert client.get("/books", params={"sort": "preco"}).status_code == 422
+    assert client.get("/books", params={"valor_min": 50, "valor_max": 10}).status_code == 400
+    assert client.get("/books", params={"q": "livro", "sort": "titulo"}).status_code == 400
+
+def test_import_books_csv_and_ndjson():
+    content = (
+        "id,titulo,autor,categoria,valor\n"
+        'livro-importado-1,"Livro ""Importado""\nem duas linhas",Autor Importado,Importados,10.5\n'
+        "livro-importado-2,Sem Valor,Autor Importado,Importados,\n"
+    )
+    response = client.post("/books/import", content=content, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    result = response.json()["data"]
+    assert result["linhas"] == 2
+    assert result["importados"] == 1
+    assert [error["linha"] for error in result["erros"]] == [4]
+
+    content = (
+        '{"id": "livro-importado-1", "titulo": "Repetido", "autor": "A", "categoria": "Importados", "valor": 1}\n'
+        '{"id": "livro-importado-3", "titulo": "Outro", "autor": "A", "categoria": "Importados", "valor": 2}\n'
+    )
+    response = client.post("/books/import", params={"format": "ndjson"}, content=content)
+    assert response.status_code == 200
+    result = response.json()["data"]
+    assert result["importados"] == 1
+    assert result["erros"][0]["linha"] == 1
+
+    response = client.get("/books/livro-importado-1")
+    assert response.json()["data"][0]["titulo"] == 'Livro "Importado"\nem duas linhas'
+
+    client.delete("/books/livro-importado-1")
+    client.delete("/books/livro-importado-3")
+
+def test_import_books_strict_and_invalid_format():
+    content = (
+        '{"id": "livro-estrito", "titulo": "Estrito", "autor": "A", "categoria": "Importados", "valor": 1}\n'
+        '{"titulo": "Sem autor", "categoria": "Importados", "valor": 2}\n'
+    )
+    response = client.post("/books/import", params={"strict": True}, content=content, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 422
+    assert client.get("/books/livro-estrito").status_code == 404
+
+    response = client.post("/books/import", content="titulo,autor\nA,B\n", headers={"Content-Type": "text/csv"})
+    assert response.status_code == 400
+    assert client.post("/books/import", content="{}", headers={"Content-Type": "application/json"}).status_code == 400
+
+def test_export_books():
+    payload = {"id": "livro-exportado", "titulo": "Livro Exportado", "autor": "Autor Exportado", "categoria": "Categoria Exportada", "valor": 12.5}
+    client.put("/books", json=payload)
+
+    response = client.get("/books/export", params={"categoria_exata": "Categoria Exportada"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [payload]
+
+    response = client.get("/books/export", params={"categoria_exata": "Categoria Exportada", "format": "csv", "gzip": True})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == "id,titulo,autor,categoria,valor\nlivro-exportado,Livro Exportado,Autor Exportado,Categoria Exportada,12.5\n"
+
+    response = client.get("/books/export", params={"categoria_exata": "Categoria Exportada", "format": "columnar"})
+    assert json.loads(response.text)["titulo"] == ["Livro Exportado"]
+
+    assert client.get("/books/export", params={"format": "parquet"}).status_code == 422
+    assert client.get("/books/export", params={"valor_min": 50, "valor_max": 10}).status_code == 400
+
+    client.delete("/books/livro-exportado")
+
+def test_jobs_endpoints():
+    payload = {"operacao": "create_books", "dados": [{"titulo": "Livro Tarefa API", "autor": "Autor", "categoria": "Tarefas API", "valor": 5.0}]}
+    response = client.post("/jobs", json=payload)
+    assert response.status_code == 202
+    job = response.json()["data"]
+    assert response.headers["location"] == f"/jobs/{job['id']}"
+
+    for _ in range(500):
+        job = client.get(f"/jobs/{job['id']}").json()["data"]
+        if job["status"] in ("concluido", "falhou"):
+            break
+        time.sleep(0.01)
+    assert job["status"] == "concluido"
+    client.delete(f"/books/{job['resultado']['ids'][0]}")
+
+    assert client.post("/jobs", json={"operacao": "drop_books", "dados": []}).status_code == 422
+    assert client.get("/jobs/nao-existe").status_code == 404
+
+def test_adjust_prices_endpoint():
+    payload = {"id": "livro-reajuste", "titulo": "Livro Reajuste", "autor": "Autor", "categoria": "Categoria Reajuste", "valor": 20.0}
+    client.put("/books", json=payload)
+    etag = client.get("/books", params={"categoria_exata": "Categoria Reajuste"}).headers["etag"]
+
+    adjustment = {"filtro": {"categoria_exata": "Categoria Reajuste"}, "operacao": "percent", "valor": 10}
+    response = client.patch("/books/prices", params={"dry_run": True}, json=adjustment)
+    assert response.json()["data"] == {"total": 1, "livros": None}
+
+    response = client.patch("/books/prices", json=adjustment)
+    assert response.status_code == 200
+    assert response.json()["data"]["livros"][0]["valor"] == 22.0
+
+    # O reajuste muda a versão do catálogo, então a listagem em cache não é reaproveitada
+    response = client.get("/books", params={"categoria_exata": "Categoria Reajuste"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["data"][0]["valor"] == 22.0
+
+    assert client.patch("/books/prices", json={"filtro": {}, "operacao": "add", "valor": 1}).status_code == 400
+    assert client.patch("/books/prices", json={**adjustment, "operacao": "double"}).status_code == 422
+
+    client.delete("/books/livro-reajuste")
+
+def test_get_books_batch():
+    for index in range(3):
+        client.put("/books", json={"id": f"livro-lote-{index}", "titulo": f"Livro Lote {index}", "autor": "Autor", "categoria": "Lote", "valor": 1.0})
+
+    response = client.post("/books/batch-get", json={"ids": ["livro-lote-2", "livro-inexistente", "livro-lote-0"]})
+    assert response.status_code == 200
+    assert [book["id"] for book in response.json()["data"]] == ["livro-lote-2", "livro-lote-0"]
+    assert response.json()["missing"] == ["livro-inexistente"]
+
+    assert client.post("/books/batch-get", json={"ids": []}).status_code == 422
+
+    for index in range(3):
+        client.delete(f"/books/livro-lote-{index}")
+
+def test_get_book_changes():
+    client.put("/books", json={"id": "livro-alteracao", "titulo": "Livro Alteração", "autor": "Autor", "categoria": "Alterações", "valor": 1.0})
+    client.delete("/books/livro-alteracao")
+
+    response = client.get("/books/changes", params={"since": 0, "limit": 1})
+    assert response.status_code == 200
+    assert response.json()["has_more"] is True
+
+    response = client.get("/books/changes", params={"since": 0, "limit": 10000})
+    changes = [change for change in response.json()["data"] if change["id"] == "livro-alteracao"]
+    assert [change["tipo"] for change in changes][-2:] == ["upsert", "delete"]
+    # O livro foi removido depois: a alteração não traz mais o seu estado
+    assert changes[-1]["livro"] is None
+    assert response.json()["next"] == response.json()["data"][-1]["seq"]
+
+    assert client.get("/books/changes/stream", headers={"Last-Event-ID": "abc"}).status_code == 400
+
+def test_get_books_updated_since():
+    since = datetime.now(timezone.utc).isoformat()
+    client.put("/books", json={"id": "livro-sync", "titulo": "Livro Sync", "autor": "Autor", "categoria": "Sync", "valor": 3.0})
+    client.delete("/books/livro-sync")
+
+    response = client.get("/books", params={"updated_since": since})
+    assert response.status_code == 200
+    books = [book for book in response.json()["data"] if book["id"] == "livro-sync"]
+    assert len(books) == 1
+    assert books[0]["removido_em"] is not None
+    # O livro removido não aparece na listagem normal
+    assert client.get("/books/livro-sync").status_code == 404
+
+    assert client.get("/books", params={"updated_since": since, "categoria": "Sync"}).status_code == 400
+    assert client.get("/books", params={"updated_since": "2000-01-01T00:00:00Z"}).status_code == 410
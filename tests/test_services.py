@@ -1,8 +1,12 @@
 import pytest
+from datetime import datetime, timedelta, timezone
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.exc import IntegrityError
 from db.config import Base
+from db.book_models import Book_Model
 from services.book_service import BookService
+from services.compaction import TombstoneCompactor
 from fastapi import HTTPException
 
 # Configuração do banco de dados SQLite em memória para os testes
@@ -58,6 +62,56 @@ def test_create_book_conflict(db: Session, book_service: BookService):
 
 
 
+
+def test_create_book_duplicate_in_batch(db: Session, book_service: BookService):
+    data = {"titulo": "Test Book", "autor": "Test Author", "categoria": "Test Category", "valor": 19.99}
+
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.create_book(db, [data, dict(data, autor="Other Author")])
+
+    assert excinfo.value.status_code == 409
+    assert book_service.list_books(db) == []
+
+
+def test_create_book_conflict_is_all_or_nothing(db: Session, book_service: BookService):
+    existing = {"titulo": "Book C", "autor": "Author", "categoria": "Category", "valor": 19.99}
+    book_service.create_book(db, [existing])
+
+    data = [
+        {"titulo": f"Book {index}", "autor": "Author", "categoria": "Category", "valor": 19.99}
+        for index in range(5)
+    ] + [existing]
+
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.create_book(db, data, chunk_size=2)
+
+    assert excinfo.value.status_code == 409
+    assert "Book C" in excinfo.value.detail
+    assert len(book_service.list_books(db)) == 1
+
+
+def test_create_book_in_chunks(db: Session, book_service: BookService):
+    data = [
+        {"titulo": f"Book {index}", "autor": "Author", "categoria": "Category", "valor": 19.99}
+        for index in range(7)
+    ]
+    inserted = []
+    result = book_service.create_book(db, data, chunk_size=3, on_chunk=inserted.append)
+
+    assert len(result) == 7
+    assert len(book_service.list_books(db)) == 7
+    # Cada bloco inserido é informado, como sinal de vida das tarefas longas
+    assert inserted == [3, 6, 7]
+
+
+def test_unique_title_category_constraint(db: Session):
+    db.add(Book_Model("1", "Test Book", "Author", "Category", 19.99))
+    db.add(Book_Model("2", "Test Book", "Other Author", "Category", 29.99))
+
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
 def test_list_books_with_filters(db: Session, book_service: BookService):
     data1 = {"titulo": "Book A", "autor": "Author A", "categoria": "Fiction", "valor": 19.99}
     data2 = {"titulo": "Book B", "autor": "Author B", "categoria": "Non-fiction", "valor": 29.99}
@@ -92,6 +146,50 @@ def test_update_create_new_book(db: Session, book_service: BookService):
     assert result["valor"] == 15.99
 
 
+
+def test_update_book_keeps_provided_id(db: Session, book_service: BookService):
+    book_data = {"id": "livro-1", "titulo": "New Book", "autor": "Author", "categoria": "Category", "valor": 15.99}
+    created = book_service.update_book(db, book_data)
+    updated = book_service.update_book(db, dict(book_data, valor=17.99))
+
+    assert created["id"] == updated["id"] == "livro-1"
+    assert updated["valor"] == 17.99
+    assert len(book_service.list_books(db)) == 1
+
+
+def test_update_book_title_category_conflict(db: Session, book_service: BookService):
+    data = {"titulo": "Book Title", "autor": "Author", "categoria": "Category", "valor": 19.99}
+    book_service.create_book(db, [data])
+
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.update_book(db, dict(data, id="outro-id"))
+
+    assert excinfo.value.status_code == 409
+
+
+def test_update_books_bulk(db: Session, book_service: BookService):
+    existing = book_service.create_book(db, [{"titulo": "Book A", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    books = [
+        {"titulo": "Book B", "autor": "Author", "categoria": "Category", "valor": 20.0},
+        dict(existing, valor=12.5),
+        {"id": "livro-c", "titulo": "Book C", "autor": "Author", "categoria": "Category", "valor": 30.0},
+    ]
+    result = book_service.update_books(db, books, chunk_size=2)
+
+    assert [book["titulo"] for book in result] == ["Book B", "Book A", "Book C"]
+    assert result[1] == dict(existing, valor=12.5)
+    assert result[2]["id"] == "livro-c"
+    assert len(book_service.list_books(db)) == 3
+
+
+def test_update_books_bulk_repeated_id(db: Session, book_service: BookService):
+    book_data = {"id": "livro-1", "titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}
+
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.update_books(db, [book_data, dict(book_data, titulo="Other")])
+
+    assert excinfo.value.status_code == 400
+
 def test_delete_existing_book(db: Session, book_service: BookService):
     data = {"titulo": "Book Title", "autor": "Author", "categoria": "Category", "valor": 19.99}
     book = book_service.create_book(db, [data])[0]
@@ -106,3 +204,351 @@ def test_delete_non_existent_book(db: Session, book_service: BookService):
     
     assert excinfo.value.status_code == 404
     assert "Nenhum livro encontrado" in excinfo.value.detail
+
+
+def test_list_books_page_keyset_pagination(db: Session, book_service: BookService):
+    data = [
+        {"titulo": f"Book {index}", "autor": "Author", "categoria": "Category", "valor": 10.0 + index}
+        for index in range(5)
+    ]
+    book_service.create_book(db, data)
+
+    first_page, next_cursor = book_service.list_books_page(db, limit=2)
+    assert len(first_page) == 2
+    assert next_cursor is not None
+
+    second_page, next_cursor = book_service.list_books_page(db, limit=2, cursor=next_cursor)
+    third_page, last_cursor = book_service.list_books_page(db, limit=2, cursor=next_cursor)
+    assert len(second_page) == 2
+    assert len(third_page) == 1
+    assert last_cursor is None
+
+    ids = [book["id"] for book in first_page + second_page + third_page]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 5
+
+
+def test_list_books_page_invalid_cursor(db: Session, book_service: BookService):
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.list_books_page(db, cursor="cursor-invalido")
+
+    assert excinfo.value.status_code == 400
+
+
+def test_stream_books_with_filters(db: Session, book_service: BookService):
+    data1 = {"titulo": "Book A", "autor": "Author A", "categoria": "Fiction", "valor": 19.99}
+    data2 = {"titulo": "Book B", "autor": "Author B", "categoria": "Non-fiction", "valor": 29.99}
+    book_service.create_book(db, [data1, data2])
+
+    result = list(book_service.stream_books(db, categoria="Non-fiction", batch_size=1))
+    assert len(result) == 1
+    assert result[0]["titulo"] == "Book B"
+
+
+def test_search_books_accent_insensitive_and_ranked(db: Session, book_service: BookService):
+    data = [
+        {"titulo": "Os Segredos da Mente Milionária", "autor": "T. Harv Eker", "categoria": "Finanças", "valor": 29.90},
+        {"titulo": "Pai Rico, Pai Pobre", "autor": "Robert Kiyosaki", "categoria": "Finanças", "valor": 39.90},
+        {"titulo": "Finanças Pessoais", "autor": "Autor", "categoria": "Educação", "valor": 19.90},
+        {"titulo": "Neuromancer", "autor": "William Gibson", "categoria": "Ficção Científica", "valor": 48.90},
+    ]
+    book_service.create_book(db, data)
+
+    result = book_service.search_books(db, "financas")
+    assert len(result) == 3
+    # O termo no título pesa mais que o termo na categoria
+    assert result[0]["titulo"] == "Finanças Pessoais"
+
+    result = book_service.search_books(db, "milion eker")
+    assert [book["titulo"] for book in result] == ["Os Segredos da Mente Milionária"]
+
+    result = book_service.search_books(db, "ficcao", categoria="Científica")
+    assert [book["titulo"] for book in result] == ["Neuromancer"]
+
+
+def test_search_index_follows_updates_and_deletes(db: Session, book_service: BookService):
+    data = {"titulo": "Book Title", "autor": "Author", "categoria": "Category", "valor": 19.99}
+    book = book_service.create_book(db, [data])[0]
+
+    book_service.update_book(db, {"id": book["id"], "titulo": "Título Novo", "autor": "Author", "categoria": "Category", "valor": 19.99})
+    assert book_service.search_books(db, "title") == []
+    assert len(book_service.search_books(db, "titulo novo")) == 1
+
+    book_service.delete_book(db, book["id"])
+    assert book_service.search_books(db, "titulo") == []
+
+
+def test_search_books_without_terms(db: Session, book_service: BookService):
+    assert book_service.search_books(db, "!!!") == []
+
+
+def test_writes_increment_catalog_version(db: Session, book_service: BookService):
+    counter, _ = book_service.get_catalog_version(db)
+
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    book_service.update_book(db, dict(book, valor=12.0))
+    book_service.delete_book(db, book["id"])
+
+    assert book_service.get_catalog_version(db)[0] == counter + 3
+
+
+def test_upsert_book_if_match(db: Session, book_service: BookService):
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    version = book_service.get_book_entry(db, book["id"])["version"]
+
+    entry = book_service.upsert_book(db, dict(book, valor=12.0), if_match=[version])
+    assert entry["version"] > version
+
+    # A versão antiga não corresponde mais: a segunda escrita concorrente é rejeitada
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.upsert_book(db, dict(book, valor=15.0), if_match=[version])
+    assert excinfo.value.status_code == 412
+    assert book_service.get_book(db, book["id"])["valor"] == 12.0
+
+    # If-Match não cria livros inexistentes
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.upsert_book(db, dict(book, id="outro-id"), if_match=["*"])
+    assert excinfo.value.status_code == 412
+
+
+def test_delete_book_if_match(db: Session, book_service: BookService):
+    book = book_service.create_book(db, [{"titulo": "Book", "autor": "Author", "categoria": "Category", "valor": 10.0}])[0]
+    version = book_service.get_book_entry(db, book["id"])["version"]
+
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.delete_book(db, book["id"], if_match=[version + 100])
+    assert excinfo.value.status_code == 412
+
+    result = book_service.delete_book(db, book["id"], if_match=[version])
+    assert result["success"] == "Livro deletado com sucesso"
+
+
+def facet_books():
+    return [
+        {"titulo": "Livro A", "autor": "Autor 1", "categoria": "Fantasia", "valor": 5.0},
+        {"titulo": "Livro B", "autor": "Autor 1", "categoria": "Fantasia", "valor": 30.0},
+        {"titulo": "Livro C", "autor": "Autor 2", "categoria": "Romance", "valor": 250.0},
+    ]
+
+
+def test_get_facets(db: Session, book_service: BookService):
+    book_service.create_book(db, facet_books())
+
+    facets = book_service.get_facets(db)
+    assert facets["total"] == 3
+    assert facets["categorias"] == [{"valor": "Fantasia", "total": 2}, {"valor": "Romance", "total": 1}]
+    assert facets["autores"] == [{"valor": "Autor 1", "total": 2}, {"valor": "Autor 2", "total": 1}]
+    assert facets["valor"]["min"] == 5.0
+    assert facets["valor"]["max"] == 250.0
+    assert facets["valor"]["avg"] == 95.0
+    assert [bucket["total"] for bucket in facets["valor"]["faixas"]] == [1, 0, 1, 0, 0, 1]
+    assert facets["valor"]["faixas"][-1] == {"min": 200.0, "max": None, "total": 1}
+
+    # Os mesmos filtros da listagem
+    filtered = book_service.get_facets(db, categoria="fantasia", limit=1)
+    assert filtered["total"] == 2
+    assert filtered["categorias"] == [{"valor": "Fantasia", "total": 2}]
+    assert filtered["valor"]["max"] == 30.0
+
+
+def test_facet_summary_follows_writes(db: Session):
+    from db.facets import ensure_facet_summary
+
+    book_service = BookService()
+    summary_service = BookService(facet_summary=True)
+    created = book_service.create_book(db, facet_books())
+    # O resumo é reconstruído a partir dos livros já existentes ao ser ligado
+    ensure_facet_summary(engine, enabled=True)
+    assert summary_service.get_facets(db) == book_service.get_facets(db)
+
+    book_service.create_book(db, [{"titulo": "Livro D", "autor": "Autor 3", "categoria": "Romance", "valor": 12.0}])
+    book_service.update_book(db, {**created[0], "categoria": "Romance", "valor": 60.0})
+    book_service.update_books(db, [{**created[1], "titulo": "Livro B2"}])
+    book_service.delete_book(db, created[2]["id"])
+
+    facets = summary_service.get_facets(db)
+    assert facets == book_service.get_facets(db)
+    assert facets["categorias"] == [{"valor": "Romance", "total": 2}, {"valor": "Fantasia", "total": 1}]
+    assert facets["valor"]["avg"] == 34.0
+
+    # Desligado, os triggers são removidos e o resumo é esvaziado
+    ensure_facet_summary(engine, enabled=False)
+    assert summary_service.get_facets(db)["total"] == 0
+
+
+def test_list_books_page_sorted_with_cursor(db: Session, book_service: BookService):
+    prices = [30.0, 10.0, 20.0, 10.0, 50.0]
+    book_service.create_book(db, [
+        {"titulo": f"Livro {index}", "autor": "Autor", "categoria": "Ordenação", "valor": price}
+        for index, price in enumerate(prices)
+    ])
+
+    # Percorre todas as páginas em ordem decrescente de valor, com empate no valor 10.0
+    books, cursor = [], None
+    while True:
+        page, cursor = book_service.list_books_page(db, limit=2, cursor=cursor, sort="valor", order="desc")
+        books += page
+        if cursor is None:
+            break
+
+    assert [book["valor"] for book in books] == sorted(prices, reverse=True)
+    assert len({book["id"] for book in books}) == len(prices)
+
+    # O cursor de uma ordenação não pode ser usado em outra
+    _, cursor = book_service.list_books_page(db, limit=2, sort="valor")
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.list_books_page(db, limit=2, cursor=cursor, sort="titulo")
+    assert excinfo.value.status_code == 400
+
+
+# Teste da ordem decrescente sem `sort`: o cursor guarda a direção e as páginas seguem o `book_id`
+# decrescente, sem repetir nem pular livros
+def test_list_books_page_desc_without_sort(db: Session, book_service: BookService):
+    created = book_service.create_book(db, [
+        {"titulo": f"Livro {index}", "autor": "Autor", "categoria": "Decrescente", "valor": 10.0}
+        for index in range(5)
+    ])
+
+    books, cursor = [], None
+    while True:
+        page, cursor = book_service.list_books_page(db, limit=2, cursor=cursor, order="desc")
+        books += page
+        if cursor is None:
+            break
+
+    assert [book["id"] for book in books] == sorted((book["id"] for book in created), reverse=True)
+
+    # O cursor decrescente não continua uma listagem crescente
+    _, cursor = book_service.list_books_page(db, limit=2, order="desc")
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.list_books_page(db, limit=2, cursor=cursor)
+    assert excinfo.value.status_code == 400
+
+
+def test_list_books_page_price_range_and_exact_category(db: Session, book_service: BookService):
+    book_service.create_book(db, [
+        {"titulo": "Barato", "autor": "Autor", "categoria": "Fantasia", "valor": 5.0},
+        {"titulo": "Médio", "autor": "Autor", "categoria": "Fantasia", "valor": 25.0},
+        {"titulo": "Caro", "autor": "Autor", "categoria": "Fantasia", "valor": 90.0},
+        {"titulo": "Outro", "autor": "Autor", "categoria": "Fantasia Urbana", "valor": 25.0},
+    ])
+
+    page, _ = book_service.list_books_page(db, valor_min=10.0, valor_max=90.0, sort="titulo")
+    assert [book["titulo"] for book in page] == ["Caro", "Médio", "Outro"]
+
+    page, _ = book_service.list_books_page(db, categoria_exata="Fantasia", valor_min=10.0, sort="valor")
+    assert [book["titulo"] for book in page] == ["Médio", "Caro"]
+
+
+def test_import_books_reports_conflicts(db: Session, book_service: BookService):
+    book_service.create_book(db, [{"titulo": "Existente", "autor": "Autor", "categoria": "Importação", "valor": 10.0}])
+
+    imported, errors = book_service.import_books(db, [
+        (2, {"titulo": "Novo", "autor": "Autor", "categoria": "Importação", "valor": 11.0}),
+        (3, {"titulo": "Existente", "autor": "Autor", "categoria": "Importação", "valor": 12.0}),
+        (4, {"titulo": "Novo", "autor": "Autor", "categoria": "Importação", "valor": 13.0}),
+        (5, {"id": "repetido", "titulo": "Outro", "autor": "Autor", "categoria": "Importação", "valor": 14.0}),
+        (6, {"id": "repetido", "titulo": "Mais um", "autor": "Autor", "categoria": "Importação", "valor": 15.0}),
+    ])
+
+    assert imported == 2
+    assert [error["linha"] for error in errors] == [3, 4, 6]
+    assert {book["titulo"] for book in book_service.list_books(db, categoria="Importação")} == {"Existente", "Novo", "Outro"}
+
+
+def test_adjust_prices(db: Session, book_service: BookService):
+    book_service.create_book(db, [
+        {"titulo": f"Finanças {index}", "autor": "Autor", "categoria": "Finanças", "valor": valor}
+        for index, valor in enumerate([10.0, 52.37, 99.99])
+    ])
+    book_service.create_book(db, [{"titulo": "Outro", "autor": "Autor", "categoria": "Outra", "valor": 10.0}])
+
+    assert book_service.adjust_prices(db, "percent", 10, dry_run=True, categoria_exata="Finanças") == {"total": 3, "livros": None}
+
+    result = book_service.adjust_prices(db, "percent", 10, categoria_exata="Finanças")
+    assert result["total"] == 3
+    assert sorted(book["valor"] for book in result["livros"]) == [11.0, 57.61, 109.99]
+
+    result = book_service.adjust_prices(db, "round", 0.9, categoria_exata="Finanças", valor_min=50)
+    assert sorted(book["valor"] for book in result["livros"]) == [57.9, 109.9]
+
+    book_id = result["livros"][0]["id"]
+    assert book_service.adjust_prices(db, "set", 5, ids=[book_id])["livros"][0]["valor"] == 5.0
+    assert book_service.adjust_prices(db, "add", -100, ids=[book_id])["livros"][0]["valor"] == 0.0
+
+    # Os livros fora do filtro não mudam
+    assert book_service.list_books(db, categoria="Outra")[0]["valor"] == 10.0
+
+def test_adjust_prices_validation(db: Session, book_service: BookService):
+    for operation, value, filters in [("round", 1.5, {"valor_min": 0}), ("percent", -100, {"valor_min": 0}), ("set", 10, {})]:
+        with pytest.raises(HTTPException) as error:
+            book_service.adjust_prices(db, operation, value, **filters)
+        assert error.value.status_code == 400
+
+
+def test_get_books_in_request_order(db: Session, book_service: BookService):
+    created = book_service.create_book(db, [
+        {"titulo": f"Lote {index}", "autor": "Autor", "categoria": "Lote", "valor": 1.0} for index in range(5)
+    ])
+    book_ids = [book["id"] for book in reversed(created)]
+
+    books, missing = book_service.get_books(db, ["nao-existe"] + book_ids + book_ids[:1], chunk_size=2)
+    assert [book["id"] for book in books] == book_ids
+    assert missing == ["nao-existe"]
+
+
+def test_delete_book_leaves_tombstone(db: Session, book_service: BookService):
+    created = book_service.create_book(db, facet_books())
+    book_service.delete_book(db, created[0]["id"])
+
+    # O livro removido sai das leituras, mas continua na tabela como marca de remoção
+    assert created[0]["id"] not in {book["id"] for book in book_service.list_books(db)}
+    assert book_service.get_facets(db)["total"] == 2
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.get_book(db, created[0]["id"])
+    assert excinfo.value.status_code == 404
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.delete_book(db, created[0]["id"])
+    assert excinfo.value.status_code == 404
+    assert db.get(Book_Model, created[0]["id"]).deleted_at is not None
+
+    # O título e a categoria ficam livres para outro livro, e gravar o id removido o restaura
+    book_service.create_book(db, [{**created[0], "id": None}])
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.update_book(db, created[0])
+    assert excinfo.value.status_code == 409
+    restored = book_service.update_book(db, {**created[0], "titulo": "Restaurado"})
+    assert book_service.get_book(db, created[0]["id"]) == restored
+
+
+def test_list_books_since_returns_changes_and_tombstones(db: Session, book_service: BookService):
+    created = book_service.create_book(db, facet_books())
+    since = datetime.now(timezone.utc)
+    book_service.update_book(db, {**created[0], "valor": 1.0})
+    book_service.delete_book(db, created[1]["id"])
+
+    books, cursor = book_service.list_books_since(db, since, limit=1)
+    assert [book["id"] for book in books] == [created[0]["id"]]
+    assert books[0]["valor"] == 1.0 and books[0]["removido_em"] is None
+    books, cursor = book_service.list_books_since(db, since, limit=1, cursor=cursor)
+    assert [book["id"] for book in books] == [created[1]["id"]]
+    assert books[0]["removido_em"] is not None
+    assert cursor is None
+
+    # Antes da retenção das marcas de remoção, o cliente precisa sincronizar o catálogo completo
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.list_books_since(db, since - timedelta(days=365))
+    assert excinfo.value.status_code == 410
+
+
+def test_purge_tombstones_in_batches(db: Session, book_service: BookService):
+    created = book_service.create_book(db, facet_books())
+    for book in created:
+        book_service.delete_book(db, book["id"])
+
+    # Nenhuma marca de remoção é anterior ao corte
+    assert book_service.purge_tombstones(db, datetime.now(timezone.utc) - timedelta(days=1)) == 0
+
+    compactor = TombstoneCompactor(book_service, session_factory=TestingSessionLocal, retention_days=-1, batch_size=2, pause_seconds=0)
+    assert compactor.compact() == 3
+    assert db.query(Book_Model).count() == 0
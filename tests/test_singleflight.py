@@ -0,0 +1,73 @@
+import asyncio
+import pytest
+from utils.singleflight import SingleFlight
+
+# Função lenta que conta quantas vezes foi executada
+def counted(result="resultado", delay: float = 0.01, error: Exception = None):
+    calls = []
+
+    async def function():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+
+    return function, calls
+
+def test_single_flight_shares_concurrent_calls():
+    async def scenario():
+        flights = SingleFlight()
+        function, calls = counted()
+        results = await asyncio.gather(*(flights.do("chave", function) for _ in range(50)))
+        other_key = await flights.do("outra", function)
+        return results, other_key, calls, flights.in_flight()
+
+    results, other_key, calls, in_flight = asyncio.run(scenario())
+    assert results == ["resultado"] * 50
+    assert other_key == "resultado"
+    # Uma execução para as 50 requisições simultâneas e outra para a chave diferente
+    assert len(calls) == 2
+    assert in_flight == 0
+
+def test_single_flight_propagates_errors():
+    async def scenario():
+        flights = SingleFlight()
+        function, calls = counted(error=ValueError("falhou"))
+        results = await asyncio.gather(*(flights.do("chave", function) for _ in range(3)), return_exceptions=True)
+        return results, calls
+
+    results, calls = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+def test_single_flight_timeout():
+    async def scenario():
+        flights = SingleFlight(timeout_ms=10)
+        function, calls = counted(delay=0.2)
+        leader = asyncio.ensure_future(flights.do("chave", function))
+        await asyncio.sleep(0)
+        with pytest.raises(TimeoutError):
+            await flights.do("chave", function)
+        # A espera esgotada não interrompe a execução em andamento
+        return await leader, calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == "resultado"
+    assert len(calls) == 1
+
+def test_single_flight_leader_cancelled():
+    async def scenario():
+        flights = SingleFlight()
+        function, calls = counted(delay=0.05)
+        leader = asyncio.ensure_future(flights.do("chave", function))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("chave", function))
+        await asyncio.sleep(0)
+        leader.cancel()
+        # A requisição que aguardava assume a execução
+        return await follower, calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == "resultado"
+    assert len(calls) == 2
@@ -0,0 +1,271 @@
+import tracemalloc
+import uuid
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from db.config import Base
+from db.book_models import Book_Model, Change_Model
+from services.book_service import BookService
+from services.snapshot import CatalogSnapshot, SnapshotRefresher
+from utils.conditional import as_utc
+
+# Banco SQLite em memória próprio dos testes da réplica, com uma única conexão compartilhada com a
+# thread do atualizador
+engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="function")
+def db():
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    yield db
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+# Livros de exemplo com autores e categorias repetidos
+def sample_books(total: int):
+    return [
+        {
+            "titulo": f"Livro {index}",
+            "autor": f"Autor {index % 7}",
+            "categoria": ["Romance", "Ficção", "Poesia"][index % 3],
+            "valor": 10.0 + index
+        }
+        for index in range(total)
+    ]
+
+# Conta os comandos SQL executados no engine dos testes
+@pytest.fixture
+def statements():
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+def test_writes_are_recorded_in_change_log(db: Session):
+    book_service = BookService()
+    book = book_service.create_book(db, sample_books(1))[0]
+    book_service.upsert_book(db, {**book, "valor": 99.0})
+    book_service.delete_book(db, book["id"])
+
+    changes = db.execute(select(Change_Model).order_by(Change_Model.change_seq)).scalars().all()
+    assert [change.change_type for change in changes] == ["upsert", "upsert", "delete"]
+    assert {change.book_id for change in changes} == {book["id"]}
+    # A sequência segue a versão do catálogo de cada escrita
+    assert [change.catalog_version for change in changes] == [1, 2, 3]
+
+def test_snapshot_matches_database_listing(db: Session):
+    book_service = BookService()
+    book_service.create_book(db, sample_books(30))
+    snapshot = CatalogSnapshot()
+    snapshot.load(db)
+
+    by_id = lambda books: sorted(books, key=lambda book: book["id"])
+    for filters in ({}, {"categoria": "rom"}, {"autor": "autor 3"}, {"titulo": "livro 1"}, {"categoria": "Poesia", "autor": "2"}):
+        assert by_id(snapshot.list_books(**filters)) == by_id(book_service.list_books(db, **filters))
+
+    book_id = book_service.list_books(db)[0]["id"]
+    assert snapshot.get_entry(book_id) == book_service.get_book_entry(db, book_id)
+    assert snapshot.stats()["books"] == 30
+    assert snapshot.stats()["categories"] == 3
+
+def test_snapshot_refresh_applies_changes_from_other_writers(db: Session):
+    # As escritas passam por outro serviço, sem a réplica (como outro processo da API)
+    writer = BookService()
+    books = writer.create_book(db, sample_books(5))
+    snapshot = CatalogSnapshot()
+    snapshot.load(db)
+
+    writer.upsert_book(db, {**books[0], "titulo": "Novo título", "categoria": "Técnico"})
+    writer.delete_book(db, books[1]["id"])
+    writer.adjust_prices(db, "set", 1.0, ids=[books[2]["id"]])
+    created = writer.create_book(db, [{"titulo": "Outro", "autor": "Autor", "categoria": "Romance", "valor": 5.0}])[0]
+
+    assert snapshot.refresh(db) == 4
+    assert snapshot.refresh(db) == 0
+    assert snapshot.get_entry(books[0]["id"])["book"]["titulo"] == "Novo título"
+    assert snapshot.list_books(categoria="Técnico") == [snapshot.get_entry(books[0]["id"])["book"]]
+    assert snapshot.get_entry(books[1]["id"]) is None
+    assert snapshot.get_entry(books[2]["id"])["book"]["valor"] == 1.0
+    assert snapshot.get_entry(created["id"])["book"] == created
+
+    by_id = lambda books: sorted(books, key=lambda book: book["id"])
+    assert by_id(snapshot.list_books()) == by_id(writer.list_books(db))
+
+def test_service_reads_from_snapshot_without_sql(db: Session, statements: list):
+    book_service = BookService(snapshot=CatalogSnapshot())
+    books = book_service.create_book(db, sample_books(10))
+    # A escrita carrega a réplica no commit; a leitura seguinte já vê o livro atualizado
+    book_service.upsert_book(db, {**books[0], "valor": 50.0})
+
+    statements.clear()
+    assert len(book_service.list_books(db)) == 10
+    assert len(book_service.list_books(db, categoria="Romance")) == 4
+    assert book_service.get_book(db, books[0]["id"])["valor"] == 50.0
+    assert set(book_service.get_book_entries(db, [books[1]["id"], "nao-existe"])) == {books[1]["id"]}
+    with pytest.raises(HTTPException) as excinfo:
+        book_service.get_book(db, "nao-existe")
+    assert excinfo.value.status_code == 404
+    assert statements == []
+
+# Todas as páginas de uma listagem, seguindo os cursores, com os cursores de cada página
+def all_pages(book_service: BookService, db: Session, limit: int = 5, **params):
+    pages, cursor = [], None
+    while True:
+        books, cursor = book_service.list_books_page(db, limit=limit, cursor=cursor, **params)
+        pages.append((books, cursor))
+        if cursor is None:
+            return pages
+
+# Teste das páginas da réplica: mesmos livros, ordem e cursores das páginas lidas do banco
+def test_snapshot_pages_match_database_pages(db: Session):
+    database = BookService()
+    database.create_book(db, sample_books(23))
+    replica = BookService(snapshot=CatalogSnapshot())
+
+    for params in (
+        {},
+        {"order": "desc"},
+        {"sort": "titulo"},
+        {"sort": "autor", "order": "desc"},
+        {"sort": "valor", "order": "desc", "valor_min": 15.0, "valor_max": 30.0},
+        {"categoria_exata": "Romance", "sort": "valor"},
+        {"categoria": "o", "autor": "autor 1", "titulo": "livro"},
+    ):
+        assert all_pages(replica, db, **params) == all_pages(database, db, **params)
+
+    change_counter, updated_at = database.get_catalog_version(db)
+    assert replica.get_catalog_version(db) == (change_counter, as_utc(updated_at))
+    with pytest.raises(HTTPException) as excinfo:
+        replica.list_books_page(db, cursor=all_pages(database, db, sort="titulo")[0][1])
+    assert excinfo.value.status_code == 400
+
+# Teste das páginas após alterações aplicadas pela atualização, que mantém os índices ordenados
+def test_snapshot_pages_follow_refreshed_changes(db: Session):
+    database = BookService()
+    books = database.create_book(db, sample_books(40))
+    snapshot = CatalogSnapshot()
+    snapshot.load(db)
+
+    database.upsert_book(db, {**books[0], "titulo": "Zeta", "categoria": "Técnico"})
+    database.delete_book(db, books[1]["id"])
+    database.adjust_prices(db, "set", 1.0, ids=[books[2]["id"]])
+    database.create_book(db, [{"titulo": "Alfa", "autor": "Autor 9", "categoria": "Técnico", "valor": 5.0}])
+    snapshot.refresh(db)
+    replica = BookService(snapshot=snapshot)
+
+    for params in (
+        {"sort": "titulo"},
+        {"sort": "valor", "order": "desc"},
+        {"sort": "autor"},
+        # Categoria com poucos livros: as posições dela são ordenadas, sem percorrer o índice
+        {"categoria_exata": "Técnico", "sort": "titulo", "order": "desc"},
+    ):
+        assert all_pages(replica, db, limit=3, **params) == all_pages(database, db, limit=3, **params)
+
+# Teste de livro sem valor na réplica: o valor continua nulo, vem antes dos demais na ordenação
+# crescente (como no SQLite) e fica fora dos filtros de faixa
+def test_snapshot_keeps_null_prices(db: Session):
+    books = BookService().create_book(db, sample_books(6))
+    db.query(Book_Model).filter(Book_Model.book_id == books[3]["id"]).update({"book_price": None})
+    db.commit()
+    snapshot = CatalogSnapshot()
+    snapshot.load(db)
+
+    assert snapshot.get_entry(books[3]["id"])["book"]["valor"] is None
+    for order in ("asc", "desc"):
+        walked, after = [], None
+        while True:
+            page = snapshot.list_books_page(1, sort="valor", order=order, after=after)
+            if not page:
+                break
+            (book, value), = page
+            walked.append(book["valor"])
+            after = (value, book["id"])
+        expected = [None] + [book["valor"] for book in books if book["valor"] != books[3]["valor"]]
+        assert walked == (expected if order == "asc" else expected[::-1])
+    assert len(snapshot.list_books_page(10, sort="valor", valor_min=0.0)) == 5
+
+# Teste de `GET /books` com a réplica ligada: o ETag e as páginas vêm da memória, sem comandos SQL
+def test_get_books_route_with_snapshot_runs_no_sql(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from db.config import async_engine
+    from routers import book_routers
+    from services.async_book_service import AsyncBookService
+
+    snapshot_service = AsyncBookService(BookService(snapshot=CatalogSnapshot()))
+    monkeypatch.setattr(book_routers, "book_service", snapshot_service)
+    app = FastAPI()
+    app.include_router(book_routers.book_router)
+    client = TestClient(app)
+
+    title = f"Livro da réplica {uuid.uuid4()}"
+    created = client.post("/books", json=[
+        {"titulo": title, "autor": "Autor", "categoria": "Réplica", "valor": 12.5},
+        {"titulo": f"{title} 2", "autor": "Autor", "categoria": "Réplica", "valor": 13.5}
+    ])
+    assert created.status_code == 201
+    client.get("/books", params={"limit": 1})
+
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        first_page = client.get("/books", params={"limit": 1})
+        second_page = client.get("/books", params={"limit": 1, "cursor": first_page.json()["next_cursor"]})
+        filtered = client.get("/books", params={"categoria_exata": "Réplica", "sort": "valor"})
+        revalidated = client.get("/books", params={"limit": 1}, headers={"If-None-Match": first_page.headers["ETag"]})
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+
+    assert executed == []
+    assert first_page.status_code == second_page.status_code == filtered.status_code == 200
+    assert first_page.json()["data"] != second_page.json()["data"]
+    assert title in [book["titulo"] for book in filtered.json()["data"]]
+    assert revalidated.status_code == 304
+
+def test_snapshot_refresher_thread(db: Session):
+    snapshot = CatalogSnapshot()
+    refresher = SnapshotRefresher(snapshot, TestingSessionLocal, interval_ms=5)
+    BookService().create_book(db, sample_books(3))
+    refresher.start()
+    try:
+        for _ in range(200):
+            if snapshot.stats()["books"] == 3:
+                break
+            refresher._stop.wait(0.01)
+    finally:
+        refresher.stop()
+    assert snapshot.loaded
+    assert snapshot.stats()["books"] == 3
+    assert refresher.errors == 0
+
+def test_snapshot_uses_less_memory_than_orm_objects(db: Session):
+    BookService().create_book(db, sample_books(5000))
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    orm_books = db.execute(select(Book_Model)).scalars().all()
+    orm_size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    db.expunge_all()
+    del orm_books
+
+    before = tracemalloc.take_snapshot()
+    snapshot = CatalogSnapshot()
+    snapshot.load(db)
+    snapshot_size = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename"))
+    tracemalloc.stop()
+
+    assert snapshot.stats()["books"] == 5000
+    # Colunas com tipos fixos e autores e categorias internados ocupam bem menos que os objetos do ORM
+    assert snapshot_size < orm_size / 2
@@ -0,0 +1,63 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+# Utilitários de requisições HTTP condicionais (ETag, If-None-Match, If-Match e Last-Modified)
+
+# ETag forte de um livro: a versão do livro é o valor do contador do catálogo na sua última escrita,
+# então nunca se repete, nem se o livro for removido e criado novamente com o mesmo id
+def book_etag(version: int) -> str:
+    return f'"{version}"'
+
+# ETag de uma listagem: contador de alterações do catálogo + filtros da consulta
+def listing_etag(change_counter: int, **params) -> str:
+    normalized = {name: value for name, value in params.items() if value is not None}
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+    return f'"c{change_counter}-{digest}"'
+
+# Separa os valores de um cabeçalho If-Match/If-None-Match
+def parse_etags(header: str):
+    return [value.strip() for value in header.split(",") if value.strip()]
+
+# Comparação fraca (If-None-Match): ignora o prefixo W/
+def etag_matches(header: str, etag: str) -> bool:
+    if header is None:
+        return False
+    candidates = parse_etags(header)
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+# Converte os valores do If-Match para versões de livro; "*" aceita qualquer versão existente.
+# ETags fracas ou inválidas nunca correspondem (comparação forte).
+def parse_if_match(header: str):
+    if header is None:
+        return None
+
+    versions = []
+    for candidate in parse_etags(header):
+        if candidate == "*":
+            versions.append("*")
+        elif candidate.startswith('"') and candidate.endswith('"') and candidate[1:-1].isdigit():
+            versions.append(int(candidate[1:-1]))
+    return versions
+
+def as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def http_date(value: datetime) -> str:
+    return format_datetime(as_utc(value).replace(microsecond=0), usegmt=True)
+
+# Verifica se o cliente já possui a representação atual (resposta 304).
+# If-None-Match tem precedência sobre If-Modified-Since, como define a RFC 9110.
+def not_modified(if_none_match: str, if_modified_since: str, etag: str, last_modified: datetime) -> bool:
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return as_utc(last_modified).replace(microsecond=0) <= as_utc(since)
+
+    return False
@@ -0,0 +1,65 @@
+import csv
+import io
+import zlib
+from utils.serialization import dumps
+
+# Exportação do catálogo em blocos: cada lote de livros lido do cursor do banco vira um único
+# bloco de bytes da resposta, sem montar o catálogo em memória.
+
+# Colunas exportadas, na ordem das tuplas lidas por `BookService.stream_select`
+EXPORT_COLUMNS = ("id", "titulo", "autor", "categoria", "valor")
+
+# Tipo de conteúdo e extensão do arquivo de cada formato
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "columnar": ("application/x-ndjson", "columnar.ndjson"),
+}
+
+# Nível de compressão do gzip: níveis baixos mantêm a exportação limitada pela rede e não pela CPU
+EXPORT_GZIP_LEVEL = 1
+
+# Um livro por linha, no mesmo formato do `GET /books?stream=true`
+def encode_ndjson(rows) -> bytes:
+    return b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+
+# Linhas CSV sem cabeçalho, no mesmo formato aceito por `POST /books/import`
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+# Formato colunar: uma linha JSON por lote, com os valores de cada coluna em uma lista
+# (como os row groups de um Parquet), que comprime melhor e é carregado direto em data frames
+def encode_columnar(rows) -> bytes:
+    return dumps(dict(zip(EXPORT_COLUMNS, (list(column) for column in zip(*rows))))) + b"\n"
+
+EXPORT_ENCODERS = {"ndjson": encode_ndjson, "csv": encode_csv, "columnar": encode_columnar}
+
+# Primeiro bloco de cada formato (o cabeçalho do CSV)
+EXPORT_HEADERS = {"csv": encode_csv([EXPORT_COLUMNS])}
+
+# Blocos de bytes da exportação no formato pedido a partir dos lotes de livros (`batches`, iterador
+# assíncrono de listas de tuplas). Com `compress`, cada bloco é comprimido com gzip assim que é gerado.
+async def export_chunks(format: str, batches, compress: bool = False, level: int = EXPORT_GZIP_LEVEL):
+    encode = EXPORT_ENCODERS[format]
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31) if compress else None
+
+    def output(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    header = EXPORT_HEADERS.get(format)
+    if header:
+        chunk = output(header)
+        if chunk:
+            yield chunk
+
+    async for rows in batches:
+        if not rows:
+            continue
+        chunk = output(encode(rows))
+        if chunk:
+            yield chunk
+
+    if compressor:
+        yield compressor.flush()
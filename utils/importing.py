@@ -0,0 +1,127 @@
+import codecs
+import csv
+import json
+from pydantic import ValidationError
+from db.book_schemas import BookModel
+
+# Leitura incremental dos arquivos de importação de livros (CSV ou NDJSON) a partir do corpo da
+# requisição recebido em blocos: apenas a linha atual e o lote em validação ficam em memória.
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Tamanho máximo de uma linha (ou registro CSV com quebras de linha entre aspas)
+MAX_IMPORT_LINE_LENGTH = 1024 * 1024
+
+# Colunas obrigatórias do cabeçalho CSV; `id` é opcional
+CSV_REQUIRED_COLUMNS = ("titulo", "autor", "categoria", "valor")
+
+# Erro no formato do arquivo que impede continuar a leitura (codificação, cabeçalho, linha longa demais)
+class ImportFormatError(ValueError):
+    pass
+
+# Formato do arquivo pelo parâmetro `format` ou pelo Content-Type da requisição
+def import_format(content_type: str = None, format: str = None):
+    if format:
+        return format
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type not in IMPORT_FORMATS:
+        raise ImportFormatError("Informe o formato do arquivo: Content-Type text/csv ou application/x-ndjson, ou o parâmetro `format`")
+    return IMPORT_FORMATS[media_type]
+
+# Divide os blocos de bytes em linhas de texto UTF-8, numeradas a partir de 1
+async def iter_lines(chunks, max_line_length: int = MAX_IMPORT_LINE_LENGTH):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    line_number = 0
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                line_number += 1
+                yield line_number, line.rstrip("\r")
+            if len(buffer) > max_line_length:
+                raise ImportFormatError(f"Linha {line_number + 1} excede o tamanho máximo de {max_line_length} caracteres")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError as error:
+        raise ImportFormatError(f"O arquivo deve estar em UTF-8 (linha {line_number + 1})") from error
+
+    if buffer.strip():
+        yield line_number + 1, buffer.rstrip("\r")
+
+# Registros do CSV como (linha, dados, erro). A primeira linha é o cabeçalho; um campo entre aspas
+# pode conter quebras de linha, então um registro só termina quando as aspas estão fechadas.
+async def iter_csv_records(chunks, max_line_length: int = MAX_IMPORT_LINE_LENGTH):
+    header = None
+    pending, pending_length, quotes, start_line = [], 0, 0, None
+
+    async for line_number, line in iter_lines(chunks, max_line_length):
+        if not pending:
+            start_line = line_number
+        pending.append(line)
+        pending_length += len(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            if pending_length > max_line_length:
+                raise ImportFormatError(f"Registro da linha {start_line} excede o tamanho máximo de {max_line_length} caracteres")
+            continue
+
+        record = "\n".join(pending)
+        pending, pending_length, quotes = [], 0, 0
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [value.strip().lower() for value in values]
+            missing = [column for column in CSV_REQUIRED_COLUMNS if column not in header]
+            if missing:
+                raise ImportFormatError(f"Cabeçalho CSV sem as colunas obrigatórias: {', '.join(missing)}")
+            continue
+
+        if len(values) != len(header):
+            yield start_line, None, f"Esperadas {len(header)} colunas, encontradas {len(values)}"
+            continue
+        yield start_line, dict(zip(header, values)), None
+
+    if pending:
+        yield start_line, None, "Campo entre aspas não foi fechado"
+
+# Registros do NDJSON como (linha, dados, erro): um objeto JSON por linha
+async def iter_ndjson_records(chunks, max_line_length: int = MAX_IMPORT_LINE_LENGTH):
+    async for line_number, line in iter_lines(chunks, max_line_length):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, f"JSON inválido: {error}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Cada linha deve ser um objeto JSON"
+            continue
+        yield line_number, record, None
+
+def iter_import_records(format: str, chunks, max_line_length: int = MAX_IMPORT_LINE_LENGTH):
+    if format == "csv":
+        return iter_csv_records(chunks, max_line_length)
+    return iter_ndjson_records(chunks, max_line_length)
+
+# Mensagem curta do primeiro erro de validação do Pydantic
+def _validation_message(error: ValidationError):
+    first_error = error.errors()[0]
+    location = ".".join(str(part) for part in first_error["loc"])
+    return f"{location}: {first_error['msg']}" if location else first_error["msg"]
+
+# Valida um livro importado com o mesmo modelo do `POST /books`; células vazias do CSV contam como ausentes
+def validate_import_record(record: dict):
+    record = {name: value for name, value in record.items() if value != ""}
+    try:
+        return BookModel.model_validate(record).model_dump(), None
+    except ValidationError as error:
+        return None, _validation_message(error)
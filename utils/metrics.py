@@ -0,0 +1,160 @@
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from utils import query_timing
+
+# Métricas no formato Prometheus, expostas em `GET /metrics`; ligadas por padrão
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Com vários workers do uvicorn, cada processo grava suas métricas em arquivos nesse diretório
+# (modo multiprocesso do prometheus_client) e `/metrics` agrega todos eles
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+# Rótulo das requisições que não correspondem a nenhuma rota, para não criar uma série por caminho
+UNMATCHED_ROUTE = "unmatched"
+
+# O prometheus_client só é carregado com as métricas ligadas; desligadas, as métricas são `None`
+# e nenhum ponto de coleta as usa
+if METRICS_ENABLED:
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+    http_request_duration = Histogram(
+        "standlivros_http_request_duration_seconds",
+        "Duração das requisições HTTP por rota",
+        ["method", "route"]
+    )
+    http_requests_in_progress = Gauge(
+        "standlivros_http_requests_in_progress",
+        "Requisições HTTP em andamento",
+        multiprocess_mode="livesum"
+    )
+    http_response_size = Histogram(
+        "standlivros_http_response_size_bytes",
+        "Tamanho do corpo das respostas HTTP por rota",
+        ["method", "route"],
+        buckets=(100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+    )
+    http_errors = Counter(
+        "standlivros_http_errors_total",
+        "Respostas HTTP com erro (status >= 400) por rota e status",
+        ["method", "route", "status"]
+    )
+    db_queries = Counter(
+        "standlivros_db_queries_total",
+        "Comandos SQL executados por método do BookService",
+        ["operation"]
+    )
+    db_query_duration = Histogram(
+        "standlivros_db_query_duration_seconds",
+        "Tempo total no banco de cada chamada de um método do BookService",
+        ["operation"],
+        buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+    )
+    listing_rows = Histogram(
+        "standlivros_listing_rows",
+        "Livros retornados por listagem",
+        ["operation"],
+        buckets=(0, 1, 10, 50, 100, 500, 1_000, 10_000, 100_000)
+    )
+    cache_requests = Counter(
+        "standlivros_cache_requests_total",
+        "Consultas ao cache de leitura por tipo e resultado",
+        ["kind", "result"]
+    )
+    single_flight_requests = Counter(
+        "standlivros_single_flight_requests_total",
+        "Requisições de listagem agrupadas: execuções (leader), resultados compartilhados (shared) e esperas esgotadas (timeout)",
+        ["result"]
+    )
+else:
+    http_request_duration = http_requests_in_progress = http_response_size = http_errors = None
+    db_queries = db_query_duration = listing_rows = cache_requests = single_flight_requests = None
+
+# Comandos SQL de uma chamada de método do BookService, acumulados sem lock: cada chamada tem o
+# seu próprio objeto e as métricas compartilhadas são atualizadas uma única vez, no final
+class OperationStats:
+    __slots__ = ("queries", "duration")
+
+    def __init__(self):
+        self.queries = 0
+        self.duration = 0.0
+
+    def add_query(self, seconds: float):
+        self.queries += 1
+        self.duration += seconds
+
+_current_operation = ContextVar("db_operation", default=None)
+
+# Associa os comandos SQL executados no bloco ao método `operation` do BookService
+@contextmanager
+def track_operation(operation: str):
+    if not METRICS_ENABLED:
+        yield
+        return
+
+    stats = OperationStats()
+    token = _current_operation.set(stats)
+    try:
+        yield
+    finally:
+        _current_operation.reset(token)
+        db_queries.labels(operation).inc(stats.queries)
+        db_query_duration.labels(operation).observe(stats.duration)
+
+def observe_listing(operation: str, rows: int):
+    if METRICS_ENABLED:
+        listing_rows.labels(operation).observe(rows)
+
+# Soma a contagem e o tempo dos comandos SQL do engine no método em andamento (`utils/query_timing.py`)
+def instrument_engine(engine):
+    query_timing.instrument_engine(engine, _current_operation)
+
+# Middleware ASGI com latência, requisições em andamento, tamanho das respostas e erros por rota.
+# A rota é o modelo registrado no FastAPI (ex.: `/books/{book_id}`), conhecido após o roteamento.
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        response_size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_requests_in_progress.dec()
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            http_request_duration.labels(method, route).observe(time.perf_counter() - start)
+            http_response_size.labels(method, route).observe(response_size)
+            if status_code >= 400:
+                http_errors.labels(method, route, str(status_code)).inc()
+
+# Texto das métricas no formato Prometheus; no modo multiprocesso agrega os arquivos de todos os workers
+def render_metrics():
+    registry = REGISTRY
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+# Liga as métricas na aplicação: middleware das requisições e eventos de SQL nos engines
+def install_metrics(app, engines):
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_middleware(MetricsMiddleware)
@@ -0,0 +1,42 @@
+import json
+import os
+import sys
+from fastapi.routing import APIRoute
+
+# Esquema OpenAPI pré-gerado: gerado uma vez no build da imagem (`python -m utils.openapi`) e servido do
+# arquivo em `GET /openapi.json`, sem montar o esquema em cada worker. Com o arquivo presente, as rotas
+# também deixam de montar os modelos da documentação das respostas (`responses=`), usados só no esquema.
+
+# Caminho do esquema pré-gerado; sem a variável (ou sem o arquivo), o esquema é montado pelo FastAPI
+OPENAPI_SCHEMA_FILE = os.getenv("OPENAPI_SCHEMA_FILE") or None
+
+# Liga o esquema do arquivo quando ele já foi gerado
+OPENAPI_PREBUILT = OPENAPI_SCHEMA_FILE is not None and os.path.isfile(OPENAPI_SCHEMA_FILE)
+
+# Rota que descarta a documentação das respostas quando o esquema vem do arquivo; o `response_model`
+# é mantido, pois também valida e filtra as respostas
+class DocumentedRoute(APIRoute):
+    def __init__(self, path: str, endpoint, **kwargs):
+        if OPENAPI_PREBUILT:
+            kwargs["responses"] = None
+        super().__init__(path, endpoint, **kwargs)
+
+# Faz a aplicação servir o esquema do arquivo (o FastAPI reutiliza o `openapi_schema` já definido)
+def install_openapi_schema(app, path: str = OPENAPI_SCHEMA_FILE):
+    if OPENAPI_PREBUILT:
+        with open(path, encoding="utf-8") as schema_file:
+            app.openapi_schema = json.load(schema_file)
+
+# Gera o arquivo do esquema a partir da aplicação com a documentação completa
+def write_openapi_schema(path: str):
+    from main import app
+
+    with open(path, "w", encoding="utf-8") as schema_file:
+        json.dump(app.openapi(), schema_file, ensure_ascii=False)
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else OPENAPI_SCHEMA_FILE or "openapi.json"
+    # A aplicação é importada sem o arquivo, para que as rotas montem a documentação completa
+    os.environ.pop("OPENAPI_SCHEMA_FILE", None)
+    write_openapi_schema(path)
+    print(f"Esquema OpenAPI gravado em {path}")
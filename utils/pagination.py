@@ -0,0 +1,29 @@
+import base64
+import json
+
+# Codifica a chave do último livro da página em um cursor opaco para o cliente. Nas listagens
+# ordenadas o cursor também leva a ordenação e o valor da coluna ordenada do último livro; sem
+# ordenação, leva a direção quando ela é decrescente (`book_id` do maior para o menor).
+def encode_cursor(book_id: str, sort: str = None, order: str = None, key=None) -> str:
+    payload = {"id": book_id}
+    if sort is not None:
+        payload.update(sort=sort, order=order, key=key)
+    elif order == "desc":
+        payload.update(order=order)
+    payload = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+# Decodifica o cursor recebido e retorna a chave do último livro da página anterior:
+# {"id": book_id, "sort": coluna ou None, "order": "asc"/"desc", "key": valor da coluna}
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+        book_id = payload["id"]
+        sort, order, key = payload.get("sort"), payload.get("order"), payload.get("key")
+    except (ValueError, KeyError, TypeError, AttributeError) as error:
+        raise ValueError("Cursor de paginação inválido") from error
+
+    if not isinstance(book_id, str) or order not in (None, "asc", "desc") or (sort is not None and (not isinstance(sort, str) or order is None)):
+        raise ValueError("Cursor de paginação inválido")
+    return {"id": book_id, "sort": sort, "order": order or "asc", "key": key}
@@ -0,0 +1,173 @@
+import hmac
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+from utils import query_timing
+
+# Instrumentação opcional das requisições: desligada por padrão, quando nem o middleware nem os
+# eventos do SQLAlchemy são registrados
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Token exigido no cabeçalho `X-Profile-Token` para usar `?__profile=1`; sem token o profiler fica desligado
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN") or None
+
+# Intervalo entre as amostras de pilha do profiler, em milissegundos
+PROFILING_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "1"))
+
+# Tempos acumulados de uma requisição: etapas medidas com `profile_stage` e comandos SQL executados
+class RequestProfile:
+    __slots__ = ("stages", "query_count", "query_time")
+
+    def __init__(self):
+        self.stages = {}
+        self.query_count = 0
+        self.query_time = 0.0
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_query(self, seconds: float):
+        self.query_count += 1
+        self.query_time += seconds
+
+    # Valor do cabeçalho `Server-Timing` (durações em milissegundos)
+    def server_timing(self, total: float):
+        entries = [f'db;dur={self.query_time * 1000:.2f};desc="{self.query_count} queries"']
+        entries += [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        entries.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(entries)
+
+# Perfil da requisição em andamento; fica vazio quando a instrumentação está desligada
+_current_profile = ContextVar("request_profile", default=None)
+
+# Soma o tempo do bloco na etapa `name` da requisição em andamento (sem custo fora de uma requisição perfilada)
+@contextmanager
+def profile_stage(name: str):
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+
+# Soma a contagem e o tempo dos comandos SQL do engine no perfil da requisição (`utils/query_timing.py`)
+def instrument_engine(engine):
+    query_timing.instrument_engine(engine, _current_profile)
+
+# Nome de um quadro da pilha no formato `módulo:função`
+def _frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+# Profiler por amostragem: uma thread lê periodicamente a pilha da thread perfilada e conta as
+# pilhas no formato "collapsed" (raiz;...;folha N), aceito por flamegraph.pl e speedscope.
+# Com várias requisições simultâneas no mesmo event loop, as amostras incluem todas elas.
+class StackSampler:
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# Middleware ASGI que mede cada requisição e envia os tempos no cabeçalho `Server-Timing`.
+# Com `?__profile=1` e o token de administrador, a resposta é substituída pelas pilhas amostradas.
+class ProfilingMiddleware:
+    def __init__(self, app, admin_token: str = None, sample_interval_ms: float = PROFILING_SAMPLE_INTERVAL_MS):
+        self.app = app
+        self.admin_token = admin_token
+        self.sample_interval = sample_interval_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        start = time.perf_counter()
+        try:
+            if self._profile_requested(scope):
+                await self._sampled(scope, receive, send, profile, start)
+                return
+
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("Server-Timing", profile.server_timing(time.perf_counter() - start))
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+
+    def _profile_requested(self, scope) -> bool:
+        if self.admin_token is None or b"__profile" not in scope.get("query_string", b""):
+            return False
+        query = parse_qs(scope["query_string"].decode("latin-1"))
+        if query.get("__profile") != ["1"]:
+            return False
+        return hmac.compare_digest(Headers(scope=scope).get("x-profile-token", ""), self.admin_token)
+
+    # Executa a requisição com o profiler ligado, descarta a resposta original e devolve as pilhas
+    async def _sampled(self, scope, receive, send, profile, start):
+        original_status = None
+
+        async def discard(message):
+            nonlocal original_status
+            if message["type"] == "http.response.start":
+                original_status = message["status"]
+
+        sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            sampler.stop()
+
+        body = sampler.collapsed().encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"server-timing", profile.server_timing(time.perf_counter() - start).encode("latin-1")),
+                (b"x-profiled-status", str(original_status).encode("latin-1")),
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+# Liga a instrumentação na aplicação: middleware de tempos e eventos de SQL nos engines
+def install_profiling(app, engines, admin_token: str = PROFILING_ADMIN_TOKEN):
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_middleware(ProfilingMiddleware, admin_token=admin_token)
@@ -0,0 +1,32 @@
+import time
+from sqlalchemy import event
+
+# Medição dos comandos SQL compartilhada pelo perfil das requisições (`utils/profiling.py`) e pelas
+# métricas (`utils/metrics.py`): um único par de eventos por engine mede cada comando uma vez e entrega
+# a duração a cada acumulador ativo no contexto atual.
+
+# ContextVars dos acumuladores registrados; o valor ativo (ou `None`) tem o método `add_query(seconds)`
+_collectors = []
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    if context is not None and any(collector.get() is not None for collector in _collectors):
+        context._query_start = time.perf_counter()
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    seconds = time.perf_counter() - start
+    for collector in _collectors:
+        stats = collector.get()
+        if stats is not None:
+            stats.add_query(seconds)
+
+# Registra o acumulador `collector` e os eventos de SQL no engine (síncrono ou assíncrono), uma vez só
+def instrument_engine(engine, collector):
+    if collector not in _collectors:
+        _collectors.append(collector)
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
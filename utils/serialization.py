@@ -0,0 +1,23 @@
+import json
+from fastapi.responses import Response
+from utils.profiling import profile_stage
+
+# Serialização JSON do caminho rápido das rotas de leitura: usa o orjson quando instalado
+# e cai para o `json` da biblioteca padrão caso contrário
+try:
+    import orjson
+
+    def dumps(content) -> bytes:
+        return orjson.dumps(content)
+except ImportError:  # pragma: no cover - o orjson faz parte do requirements.txt
+    def dumps(content) -> bytes:
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Resposta JSON pré-renderizada. Retornar essa resposta diretamente faz o FastAPI pular a
+# revalidação pelo `response_model`, que continua sendo usado apenas na documentação OpenAPI.
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with profile_stage("serialize"):
+            return dumps(content)
@@ -0,0 +1,72 @@
+import asyncio
+import os
+from utils.metrics import METRICS_ENABLED, single_flight_requests
+
+# Agrupamento de requisições idênticas simultâneas (single-flight): enquanto a primeira requisição de uma
+# chave executa a consulta e serializa a resposta, as requisições seguintes com a mesma chave aguardam e
+# recebem o mesmo resultado (ou o mesmo erro). Nada é guardado depois que a execução termina.
+
+# Liga o agrupamento nas listagens e nas facetas
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Espera máxima de uma requisição pelo resultado de outra com a mesma chave, em milissegundos
+SINGLE_FLIGHT_TIMEOUT_MS = float(os.getenv("SINGLE_FLIGHT_TIMEOUT_MS", "10000"))
+
+def _count(result: str):
+    if METRICS_ENABLED:
+        single_flight_requests.labels(result).inc()
+
+class SingleFlight:
+    def __init__(self, timeout_ms: float = SINGLE_FLIGHT_TIMEOUT_MS):
+        self.timeout = timeout_ms / 1000
+        # Execuções em andamento por (event loop, chave)
+        self._flights = {}
+
+    # Retorna o resultado de `function()` para a chave, executando-a apenas se não houver uma execução
+    # em andamento. `timeout` (em segundos) limita a espera das requisições que aguardam outra; a que
+    # executa fica limitada pelo tempo máximo dos comandos no banco. Levanta `TimeoutError` ao esgotar.
+    async def do(self, key, function, timeout: float = None):
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key)
+        timeout = self.timeout if timeout is None else timeout
+
+        while True:
+            future = self._flights.get(flight_key)
+            if future is None:
+                return await self._lead(flight_key, loop, function)
+
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.CancelledError:
+                # A requisição que executava foi cancelada: a próxima da fila assume a execução
+                if future.cancelled():
+                    continue
+                raise
+            except TimeoutError:
+                _count("timeout")
+                raise
+            _count("shared")
+            return result
+
+    async def _lead(self, flight_key, loop, function):
+        future = self._flights[flight_key] = loop.create_future()
+        _count("leader")
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as error:
+            future.set_exception(error)
+            # O erro é entregue às requisições que aguardam; sem nenhuma, evita o aviso de exceção não lida
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[flight_key]
+
+    # Quantidade de execuções em andamento
+    def in_flight(self) -> int:
+        return len(self._flights)